@@ -0,0 +1,229 @@
+"""
+Stand-in for the Transmission daemon used by the benchmarks.
+
+The stub serves a synthetic torrent library on the JSON-RPC endpoint. The fake
+transmission-remote executable (fake_transmission_remote.py) forwards each call to the
+same stub, so both clients see one library. Every request is counted, and GET /stats
+returns the counters as JSON.
+"""
+# Built-in/Generic Imports
+import json
+import time
+import random
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Union
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, fake_daemon"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+# The header the fake transmission-remote sends, so its calls are counted as subprocess calls.
+CLI_HEADER = "X-Benchmark-Client"
+SESSION_ID = "benchmark-session"
+DOWNLOAD_DIR = "/downloads/complete"
+TRACKERS = ("https://tracker.example.com/announce", "udp://open.example.org:1337/announce")
+RATIO_DISTRIBUTIONS = ("split", "uniform", "exponential")
+
+
+def build_library(
+    torrent_count: int,
+    removal_ratio: float = 2.0,
+    distribution: str = "split",
+    removable_fraction: float = 0.05,
+    seed: int = 1,
+) -> dict[int, dict]:
+    """
+    Builds a synthetic torrent library in the RPC torrent-get format.
+
+    Args:
+        torrent_count (int):
+        \t\\- The number of torrents.
+        removal_ratio (float, optional):
+        \t\\- The removal ratio the distribution is built around. Defaults to 2.0.
+        distribution (str, optional):
+        \t\\- split: removable_fraction of the torrents meet the ratio. uniform: 0 to 2x the ratio.
+        \t\\- exponential: mean of half the ratio. Defaults to "split".
+        removable_fraction (float, optional):
+        \t\\- The share of torrents that meet the ratio with the split distribution. Defaults to 0.05.
+        seed (int, optional):
+        \t\\- The random seed. Defaults to 1.
+
+    Returns:
+        dict[int, dict]:
+        \t\\- The torrents by ID.
+    """
+    generator = random.Random(seed)
+    library: dict[int, dict] = {}
+    for torrent_id in range(1, torrent_count + 1):
+        if distribution == "split":
+            if generator.random() < removable_fraction:
+                ratio = generator.uniform(removal_ratio, removal_ratio * 3)
+            else:
+                ratio = generator.uniform(0, removal_ratio * 0.99)
+        elif distribution == "uniform":
+            ratio = generator.uniform(0, removal_ratio * 2)
+        else:
+            ratio = generator.expovariate(2 / removal_ratio)
+        # A few torrents are still downloading.
+        downloading = generator.random() < 0.02
+        added_date = int(time.time()) - generator.randrange(86400, 365 * 86400)
+        library[torrent_id] = {
+            "id": torrent_id,
+            "hashString": hashlib.sha1(f"{seed}:{torrent_id}".encode()).hexdigest(),
+            "name": f"Synthetic.Torrent.{torrent_id:06d}",
+            "uploadRatio": round(ratio, 2),
+            "percentDone": round(generator.random(), 4) if downloading else 1.0,
+            "downloadDir": DOWNLOAD_DIR,
+            "status": 4 if downloading else 6,
+            "isFinished": False,
+            "totalSize": generator.randrange(10**8, 5 * 10**10),
+            "secondsSeeding": 0 if downloading else generator.randrange(0, int(time.time()) - added_date),
+            "addedDate": added_date,
+            "trackers": [{"announce": generator.choice(TRACKERS)}],
+            "rateUpload": generator.choice((0, 0, 0, generator.randrange(1000, 5 * 10**6))),
+        }
+    return library
+
+
+class StubTransmission(object):
+    """
+    Stub Transmission daemon serving a synthetic library on a local port.
+
+    Args:
+        library (dict[int, dict]):
+        \t\\- The torrents by ID from build_library.
+        latency (float, optional):
+        \t\\- The seconds added to every request. Defaults to 0.
+    """
+
+    def __init__(self, library: dict[int, dict], latency: float = 0) -> None:
+        self.library = library
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._id_by_hash: dict[str, int] = {torrent["hashString"]: torrent_id for torrent_id, torrent in library.items()}
+        self._removed_since_delta: list[int] = []
+        self.stats: dict[str, int] = {
+            "rpc_requests": 0,
+            "cli_calls": 0,
+            "handshakes": 0,
+            "torrents_removed": 0,
+            "torrents_moved": 0,
+        }
+        self._server: Union[ThreadingHTTPServer, None] = None
+
+    @property
+    def port(self) -> int:
+        """The listening port."""
+        return self._server.server_address[1] if self._server else 0
+
+    def start(self) -> None:
+        """Starts the stub on a free local port."""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # The headers and body are sent in one write without Nagle delays, like the real daemon.
+            wbufsize = -1
+            disable_nagle_algorithm = True
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+            def _reply(self, status: int, body: bytes, headers: Union[dict, None] = None) -> None:
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                with stub._lock:
+                    body = json.dumps(dict(stub.stats, torrents=len(stub.library))).encode()
+                self._reply(200, body)
+
+            def do_POST(self) -> None:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                is_cli = self.headers.get(CLI_HEADER) is not None
+                if not is_cli and self.headers.get("X-Transmission-Session-Id") != SESSION_ID:
+                    with stub._lock:
+                        stub.stats["handshakes"] += 1
+                    self._reply(409, b"", {"X-Transmission-Session-Id": SESSION_ID})
+                    return
+                if stub.latency:
+                    time.sleep(stub.latency)
+                with stub._lock:
+                    stub.stats["cli_calls" if is_cli else "rpc_requests"] += 1
+                    arguments = stub.handle(request.get("method", ""), request.get("arguments", {}))
+                self._reply(200, json.dumps({"result": "success", "arguments": arguments}).encode())
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        """Stops the stub."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _select(self, ids: Union[list, str, int, None]) -> list[int]:
+        if ids is None:
+            return list(self.library)
+        if not isinstance(ids, list):
+            ids = [ids]
+        selected: list[int] = []
+        for torrent_id in ids:
+            if isinstance(torrent_id, str) and not torrent_id.isdigit():
+                torrent_id = self._id_by_hash.get(torrent_id)
+            if torrent_id is not None and int(torrent_id) in self.library:
+                selected.append(int(torrent_id))
+        return selected
+
+    def handle(self, method: str, arguments: dict) -> dict:
+        """
+        Handles one RPC method. The caller holds the lock.
+
+        Args:
+            method (str):
+            \t\\- The RPC method.
+            arguments (dict):
+            \t\\- The RPC arguments.
+
+        Returns:
+            dict:
+            \t\\- The response arguments.
+        """
+        if method == "torrent-get":
+            fields = arguments.get("fields") or []
+            if arguments.get("ids") == "recently-active":
+                # The synthetic library does not change between cycles.
+                removed, self._removed_since_delta = self._removed_since_delta, []
+                return {"torrents": [], "removed": removed}
+            torrents = [self.library[torrent_id] for torrent_id in self._select(arguments.get("ids"))]
+            if fields:
+                torrents = [{field: torrent.get(field) for field in fields} for torrent in torrents]
+            return {"torrents": torrents}
+        if method == "torrent-remove":
+            for torrent_id in self._select(arguments.get("ids")):
+                torrent = self.library.pop(torrent_id)
+                self._id_by_hash.pop(torrent["hashString"], None)
+                self._removed_since_delta.append(torrent_id)
+                self.stats["torrents_removed"] += 1
+            return {}
+        if method == "torrent-set-location":
+            # The stub only records the new location. The data is not moved.
+            for torrent_id in self._select(arguments.get("ids")):
+                self.library[torrent_id]["downloadDir"] = arguments.get("location")
+                self.stats["torrents_moved"] += 1
+            return {}
+        return {}
@@ -0,0 +1,130 @@
+"""
+Fake transmission-remote executable for the benchmarks.
+
+Each call is forwarded to the stub daemon from fake_daemon.py and printed in the
+transmission-remote output format. Supported calls:
+    transmission-remote host:port [--auth user:pass] --list
+    transmission-remote host:port [--auth user:pass] --torrent all|ids --info
+    transmission-remote host:port [--auth user:pass] --torrent ids --remove|--remove-and-delete
+    transmission-remote host:port [--auth user:pass] --torrent ids --find|--move location
+"""
+# Built-in/Generic Imports
+import re
+import sys
+import json
+import time
+import http.client
+from urllib.parse import quote
+
+# The header the stub counts as one subprocess call.
+CLI_HEADER = "X-Benchmark-Client"
+
+STATES = {0: "Stopped", 1: "Verifying", 2: "Verifying", 3: "Queued", 4: "Downloading", 5: "Queued", 6: "Seeding"}
+
+
+def rpc(server: str, method: str, arguments: dict) -> dict:
+    host, _, port = server.partition(":")
+    connection = http.client.HTTPConnection(host, int(port or 9091), timeout=300)
+    connection.request(
+        "POST",
+        "/transmission/rpc",
+        body=json.dumps({"method": method, "arguments": arguments}),
+        headers={"Content-Type": "application/json", CLI_HEADER: "1"},
+    )
+    response = json.loads(connection.getresponse().read())
+    connection.close()
+    return response["arguments"]
+
+
+def format_info(torrent: dict) -> list[str]:
+    ratio = torrent["uploadRatio"]
+    state = "Finished" if torrent["isFinished"] and torrent["status"] == 0 else STATES.get(torrent["status"], "Unknown")
+    return [
+        "NAME",
+        f"  Id: {torrent['id']}",
+        f"  Name: {torrent['name']}",
+        f"  Hash: {torrent['hashString']}",
+        f"  Magnet: magnet:?xt=urn:btih:{torrent['hashString']}"
+        + "".join(f"&tr={quote(tracker['announce'], safe='')}" for tracker in torrent["trackers"]),
+        "  Labels: ",
+        "",
+        "TRANSFER",
+        f"  State: {state}",
+        f"  Location: {torrent['downloadDir']}",
+        f"  Percent Done: {torrent['percentDone'] * 100:g}%",
+        f"  Upload Speed: {torrent['rateUpload'] / 1000:.1f} kB/s",
+        f"  Ratio: {'None' if ratio < 0 else f'{ratio:.2f}'}",
+        "",
+        "HISTORY",
+        f"  Date added:       {time.ctime(torrent['addedDate'])}",
+        f"  Seeding Time:     {torrent['secondsSeeding'] // 86400} days ({torrent['secondsSeeding']} seconds)",
+        "",
+        "ORIGINS",
+        f"  Total size: {torrent['totalSize'] / 1e9:.2f} GB ({torrent['totalSize'] / 1e9:.2f} GB wanted)",
+        "",
+        "LIMITS & BANDWIDTH",
+        "  Ratio Limit: Default",
+        "",
+    ]
+
+
+def main(arguments: list[str]) -> int:
+    server = arguments[0]
+    selection = arguments[arguments.index("--torrent") + 1] if "--torrent" in arguments else "all"
+    # Like transmission-remote, only a list of numeric IDs and ranges is split. Any other value is one hash.
+    if selection == "all":
+        ids = None
+    elif re.fullmatch(r"[0-9]+(-[0-9]+)?(,[0-9]+(-[0-9]+)?)*", selection):
+        ids = []
+        for value in selection.split(","):
+            first, _, last = value.partition("-")
+            ids.extend(range(int(first), int(last or first) + 1))
+    else:
+        ids = [selection]
+    fields = [
+        "id",
+        "hashString",
+        "name",
+        "uploadRatio",
+        "percentDone",
+        "downloadDir",
+        "status",
+        "isFinished",
+        "totalSize",
+        "secondsSeeding",
+        "addedDate",
+        "trackers",
+        "rateUpload",
+    ]
+
+    lines: list[str] = []
+    if "--list" in arguments:
+        torrents = rpc(server, "torrent-get", {"fields": fields})["torrents"]
+        lines.append("    ID   Done       Have  ETA           Up    Down  Ratio  Status       Name")
+        for torrent in torrents:
+            lines.append(
+                f"{torrent['id']:>6}   {torrent['percentDone']:.0%}   1.00 GB  Done   0.0   0.0   "
+                f"{torrent['uploadRatio']:.1f}  {STATES.get(torrent['status'], 'Unknown'):<11}  {torrent['name']}"
+            )
+        lines.append("Sum:             1.00 GB               0.0     0.0")
+    elif "--info" in arguments:
+        arguments_dict = {"fields": fields} if ids is None else {"fields": fields, "ids": ids}
+        for torrent in rpc(server, "torrent-get", arguments_dict)["torrents"]:
+            lines.extend(format_info(torrent))
+    elif "--remove" in arguments or "--remove-and-delete" in arguments:
+        rpc(server, "torrent-remove", {"ids": ids, "delete-local-data": "--remove-and-delete" in arguments})
+        lines.append(f'{server}/transmission/rpc/ responded: "success"')
+    elif "--find" in arguments or "--move" in arguments:
+        location = arguments[arguments.index("--find" if "--find" in arguments else "--move") + 1]
+        rpc(server, "torrent-set-location", {"ids": ids, "location": location, "move": "--move" in arguments})
+        lines.append(f'{server}/transmission/rpc/ responded: "success"')
+    else:
+        print(f"Unsupported arguments: {' '.join(arguments)}", file=sys.stderr)
+        return 1
+
+    sys.stdout.write("\n".join(lines) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
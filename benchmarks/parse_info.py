@@ -0,0 +1,131 @@
+"""
+Micro-benchmark for the transmission-remote --info parser.
+
+The captured fixture output is repeated to build a large --torrent all --info output.
+The single-pass parser is compared with the previous parser that scanned each
+torrent's lines once per field.
+
+Usage:
+    python benchmarks/parse_info.py --torrents 5000 --repeat 5
+"""
+# Built-in/Generic Imports
+import os
+import sys
+import argparse
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+# Local Functions
+from common.parser import parse_torrent_info  # noqa: E402
+
+# Local Dataclasses
+from common.common import Torrent  # noqa: E402
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, parse_info"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "info_all.txt")
+
+
+def build_output(torrent_count: int) -> list[str]:
+    """
+    Builds a --torrent all --info output by repeating the fixture torrents with new IDs.
+
+    Args:
+        torrent_count (int):
+        \t\\- The number of torrents in the output.
+
+    Returns:
+        list[str]:
+        \t\\- The output lines.
+    """
+    with open(FIXTURE_PATH, "r", encoding="utf-8") as fixture:
+        fixture_lines = fixture.read().splitlines()
+
+    # Splits the fixture into one block per torrent.
+    blocks: list[list[str]] = []
+    for line in fixture_lines:
+        if line == "NAME":
+            blocks.append([])
+        blocks[-1].append(line)
+
+    output: list[str] = []
+    for torrent_id in range(1, torrent_count + 1):
+        for line in blocks[torrent_id % len(blocks)]:
+            output.append(f"  Id: {torrent_id}" if line.startswith("  Id:") else line)
+    return output
+
+
+def legacy_parse(torrent_info: list[str]) -> Torrent:
+    """The previous parser. Each field scanned every line of one torrent's --info output."""
+    torrent_id = [entry for entry in torrent_info if "Id:" in entry][0].strip().replace("Id: ", "")
+    name = [entry for entry in torrent_info if "Name:" in entry][0].strip().replace("Name: ", "")
+    possible_float = [entry for entry in torrent_info if "Ratio:" in entry]
+    progress = [entry for entry in torrent_info if "Percent Done:" in entry][0].strip().replace("Percent Done: ", "")
+    stop_location = [entry for entry in torrent_info if "Location:" in entry][0].strip().replace("Location: ", "")
+    state = [entry for entry in torrent_info if "State:" in entry][0].strip().replace("State: ", "")
+    # The previous "Ratio:" match also hits "Ratio Limit:", so only the first entry is used here.
+    ratio_value = possible_float[0].strip().replace("Ratio: ", "")
+    ratio = float(ratio_value) if "." in ratio_value else 0.0
+    return Torrent(
+        id=int(torrent_id),
+        hash="",
+        name=name,
+        ratio=ratio,
+        percent_done=float(progress.rstrip("%")) / 100,
+        location=stop_location,
+        state=state,
+        size=0,
+        seeding_time=0,
+        added_date=0.0,
+        trackers=(),
+        upload_rate=0.0,
+    )
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--torrents", type=int, default=5000, help="torrents in the generated output")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="timing repeats (best run is reported)")
+    args = arg_parser.parse_args()
+
+    output = build_output(torrent_count=args.torrents)
+
+    # The previous code ran one --info call per torrent, so the legacy parser gets one block at a time.
+    per_torrent_blocks: list[list[str]] = []
+    for line in output:
+        if line == "NAME":
+            per_torrent_blocks.append([])
+        per_torrent_blocks[-1].append(line)
+
+    parsed = list(parse_torrent_info(lines=output))
+    assert len(parsed) == args.torrents, f"Parsed {len(parsed)} of {args.torrents} torrents"
+
+    single_pass = min(
+        timeit.repeat(lambda: list(parse_torrent_info(lines=output)), number=1, repeat=args.repeat)
+    )
+    legacy = min(
+        timeit.repeat(
+            lambda: [legacy_parse(torrent_info=block) for block in per_torrent_blocks], number=1, repeat=args.repeat
+        )
+    )
+
+    print(f"Torrents:            {args.torrents}")
+    print(f"Output lines:        {len(output)}")
+    print(f"Single-pass parser:  {single_pass * 1000:.2f} ms ({single_pass / args.torrents * 1e6:.2f} us/torrent)")
+    print(f"Legacy parser:       {legacy * 1000:.2f} ms ({legacy / args.torrents * 1e6:.2f} us/torrent)")
+    print(f"Speedup:             {legacy / single_pass:.2f}x")
+    # The parse time excludes process startup. The legacy path also ran one --info subprocess per torrent.
+    print(f"Subprocess calls:    1 (single-pass) vs {args.torrents + 1} (legacy)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+End-to-end benchmark of the removal check against a stub Transmission daemon.
+
+A synthetic library is served by the stub RPC server, and a fake transmission-remote
+executable is put first on PATH. Each scenario runs in a child process, so the peak RSS
+belongs to that scenario. The results are written as JSON, so runs from two versions
+can be compared.
+
+Usage:
+    python benchmarks/remove_cycle.py --sizes 1000,10000,100000 --modes rpc,remote --cycles 3
+    python benchmarks/remove_cycle.py --sizes 10000 --distribution uniform --latency 0.005 --output before.json
+"""
+# Built-in/Generic Imports
+import os
+import sys
+import json
+import stat
+import shutil
+import asyncio
+import logging
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import urllib.request
+from time import perf_counter
+
+BENCHMARK_PATH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_PATH, "..", "src"))
+sys.path.insert(0, BENCHMARK_PATH)
+
+# Local Functions
+from fake_daemon import DOWNLOAD_DIR, RATIO_DISTRIBUTIONS, StubTransmission, build_library  # noqa: E402
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, remove_cycle"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+MODES = ("rpc", "remote", "async-rpc", "async-remote")
+SAMPLE_SETTINGS_PATH = os.path.join(BENCHMARK_PATH, "..", "src", "sample_settings.yaml")
+
+
+def get_stats(port: int) -> dict:
+    """Gets the stub request counters."""
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/stats") as response:
+        return json.loads(response.read())
+
+
+def run_child(config: dict) -> dict:
+    """
+    Runs the removal checks of one scenario. This runs in the child process.
+
+    Args:
+        config (dict):
+        \t\\- The scenario settings from run_scenario.
+
+    Returns:
+        dict:
+        \t\\- The per-cycle results and the peak RSS.
+    """
+    import yaml
+
+    from launch import get_startup_settings
+    from remove.remove import start_remove
+    from remove.pipeline import start_remove_async
+    from remove.sync import TorrentSync
+    from remove.orphans import DirectoryIndex
+    from common.limiter import CallLimiter
+    from common.resilience import CircuitBreaker
+    from common.notify import Notifier
+
+    logging.basicConfig(level=config["log_level"])
+
+    with open(SAMPLE_SETTINGS_PATH, "r", encoding="utf-8") as settings_file:
+        yaml_config = yaml.safe_load(settings_file)
+    yaml_config["general"].update(
+        {"async_pipeline": config["mode"].startswith("async"), "delta_sync": config["delta_sync"], "state_database": ""}
+    )
+    yaml_config["connection"].update(
+        {"server": f"127.0.0.1:{config['port']} --auth benchmark:benchmark", "use_rpc": config["mode"].endswith("rpc")}
+    )
+    yaml_config["removal"].update(
+        {
+            "removal_ratio": config["removal_ratio"],
+            "root_download_path": config["root_download_path"],
+            "batch_removal": config["batch_removal"],
+            "delete_local_data": config["delete_local_data"],
+            "find_orphans": config["find_orphans"],
+            "orphan_min_age_hours": 0,
+        }
+    )
+    startup_settings = get_startup_settings(yaml_config=yaml_config)
+    torrent_sync = TorrentSync(full_sync_interval=startup_settings.full_sync_interval) if config["delta_sync"] else None
+    directory_index = DirectoryIndex() if config["find_orphans"] else None
+    call_limiter = CallLimiter(
+        rate=startup_settings.call_rate,
+        max_concurrency=startup_settings.max_call_concurrency,
+        latency_tolerance=startup_settings.call_latency_tolerance,
+    )
+    circuit_breaker = CircuitBreaker(
+        name="transmission",
+        failure_threshold=startup_settings.circuit_failure_threshold,
+        reset_timeout=startup_settings.circuit_reset_seconds,
+    )
+    # Alerts are disabled, so no SMTP server is needed.
+    notifier = Notifier(enabled=False)
+
+    cycles: list[dict] = []
+    for cycle in range(config["cycles"]):
+        before = get_stats(port=config["port"])
+        start = perf_counter()
+        if startup_settings.async_pipeline:
+            asyncio.run(
+                start_remove_async(
+                    startup_settings=startup_settings,
+                    torrent_sync=torrent_sync,
+                    notifier=notifier,
+                    directory_index=directory_index,
+                    call_limiter=call_limiter,
+                    circuit_breaker=circuit_breaker,
+                )
+            )
+        else:
+            start_remove(
+                startup_settings=startup_settings,
+                torrent_sync=torrent_sync,
+                notifier=notifier,
+                directory_index=directory_index,
+                call_limiter=call_limiter,
+                circuit_breaker=circuit_breaker,
+            )
+        wall_seconds = perf_counter() - start
+        after = get_stats(port=config["port"])
+
+        removed = after["torrents_removed"] - before["torrents_removed"]
+        cycles.append(
+            {
+                "cycle": cycle + 1,
+                "wall_seconds": round(wall_seconds, 6),
+                "rpc_requests": after["rpc_requests"] - before["rpc_requests"],
+                "rpc_handshakes": after["handshakes"] - before["handshakes"],
+                "subprocess_calls": after["cli_calls"] - before["cli_calls"],
+                "torrents_removed": removed,
+                "removals_per_second": round(removed / wall_seconds, 3) if wall_seconds else None,
+            }
+        )
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    rss_scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "cycles": cycles,
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * rss_scale,
+        "peak_subprocess_rss_bytes": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * rss_scale,
+    }
+
+
+def run_scenario(args: argparse.Namespace, torrent_count: int, mode: str) -> dict:
+    """
+    Starts the stub daemon for one library size and client mode and runs the checks in a child process.
+
+    Args:
+        args (argparse.Namespace):
+        \t\\- The command line arguments.
+        torrent_count (int):
+        \t\\- The library size.
+        mode (str):
+        \t\\- The client mode (ex: rpc).
+
+    Returns:
+        dict:
+        \t\\- The scenario result.
+    """
+    library = build_library(
+        torrent_count=torrent_count,
+        removal_ratio=args.removal_ratio,
+        distribution=args.distribution,
+        removable_fraction=args.removable_fraction,
+        seed=args.seed,
+    )
+    removable = sum(1 for torrent in library.values() if torrent["uploadRatio"] >= args.removal_ratio)
+    stub = StubTransmission(library=library, latency=args.latency)
+    work_path = tempfile.mkdtemp(prefix="transmission_ext_benchmark_")
+    try:
+        # One small folder per removable torrent, so the folder deletion is part of the check.
+        if not args.delete_local_data:
+            for torrent in library.values():
+                if torrent["uploadRatio"] >= args.removal_ratio:
+                    torrent_path = os.path.join(work_path, "root", DOWNLOAD_DIR.strip("/"), torrent["name"])
+                    os.makedirs(torrent_path)
+                    with open(os.path.join(torrent_path, "data.bin"), "wb") as data_file:
+                        data_file.write(b"\0" * args.file_size)
+        # One orphaned folder per 100 torrents, so the orphan check has data to report.
+        if args.find_orphans:
+            for orphan_number in range(max(torrent_count // 100, 1)):
+                os.makedirs(os.path.join(work_path, "root", DOWNLOAD_DIR.strip("/"), f"orphan-{orphan_number}"))
+
+        # The shim puts the fake transmission-remote first on PATH.
+        bin_path = os.path.join(work_path, "bin")
+        os.makedirs(bin_path)
+        shim_path = os.path.join(bin_path, "transmission-remote")
+        with open(shim_path, "w", encoding="utf-8") as shim:
+            shim.write(
+                f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(BENCHMARK_PATH, "fake_transmission_remote.py")}" "$@"\n'
+            )
+        os.chmod(shim_path, os.stat(shim_path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+        stub.start()
+        config = {
+            "port": stub.port,
+            "mode": mode,
+            "cycles": args.cycles,
+            "delta_sync": args.delta_sync,
+            "batch_removal": args.batch_removal,
+            "delete_local_data": args.delete_local_data,
+            "find_orphans": args.find_orphans,
+            "removal_ratio": args.removal_ratio,
+            "root_download_path": os.path.join(work_path, "root"),
+            "log_level": args.log_level,
+        }
+        environment = dict(os.environ, PATH=f"{bin_path}{os.pathsep}{os.environ.get('PATH', '')}")
+        start = perf_counter()
+        child = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", json.dumps(config)],
+            env=environment,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        if child.returncode:
+            raise RuntimeError(f"The {mode} scenario with {torrent_count} torrents failed with code {child.returncode}")
+        result = json.loads(child.stdout.splitlines()[-1])
+        return {
+            "torrents": torrent_count,
+            "removable": removable,
+            "mode": mode,
+            "total_seconds": round(perf_counter() - start, 6),
+            **result,
+        }
+    finally:
+        stub.stop()
+        shutil.rmtree(work_path, ignore_errors=True)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--sizes", default="1000,10000", help="comma-separated library sizes")
+    arg_parser.add_argument("--modes", default="rpc,remote", help=f"comma-separated client modes from {', '.join(MODES)}")
+    arg_parser.add_argument("--cycles", type=int, default=3, help="removal checks per scenario")
+    arg_parser.add_argument("--distribution", choices=RATIO_DISTRIBUTIONS, default="split", help="ratio distribution")
+    arg_parser.add_argument("--removable-fraction", type=float, default=0.05, help="removable share for split")
+    arg_parser.add_argument("--removal-ratio", type=float, default=2.0, help="removal ratio")
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every daemon request")
+    arg_parser.add_argument("--file-size", type=int, default=4096, help="bytes written to each removable torrent")
+    arg_parser.add_argument("--delta-sync", action="store_true", help="keep the torrent table between checks")
+    arg_parser.add_argument("--batch-removal", action="store_true", help="remove every match with one call")
+    arg_parser.add_argument("--delete-local-data", action="store_true", help="let the daemon delete the data")
+    arg_parser.add_argument("--find-orphans", action="store_true", help="index the download root and report orphans")
+    arg_parser.add_argument("--seed", type=int, default=1, help="library random seed")
+    arg_parser.add_argument("--log-level", default="WARNING", help="log level in the child process")
+    arg_parser.add_argument("--output", help="JSON result file (stdout when not set)")
+    arg_parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(config=json.loads(args.child))))
+        return
+
+    modes = [mode for mode in args.modes.split(",") if mode]
+    unknown_modes = set(modes) - set(MODES)
+    if unknown_modes:
+        arg_parser.error(f"Unknown mode(s): {', '.join(sorted(unknown_modes))}")
+
+    scenarios: list[dict] = []
+    for torrent_count in (int(size) for size in args.sizes.split(",") if size):
+        for mode in modes:
+            scenario = run_scenario(args=args, torrent_count=torrent_count, mode=mode)
+            print(
+                f"{mode:>13} {torrent_count:>7} torrents: first cycle {scenario['cycles'][0]['wall_seconds']:.3f} s, "
+                f"peak RSS {scenario['peak_rss_bytes'] / 1048576:.1f} MiB",
+                file=sys.stderr,
+            )
+            scenarios.append(scenario)
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("child", "output")},
+        "scenarios": scenarios,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
 # Built-in/Generic Imports
+import sys
 from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, Iterator, NoReturn, Union
+
+if TYPE_CHECKING:
+    # Local Classes
+    from common.policy import RemovalPolicy
 
 
 class GeneralTransmissionExtError(Exception):
@@ -16,6 +22,20 @@ class TransmissionExtError(Exception):
     pass
 
 
+class TransmissionConnectionError(TransmissionExtError):
+    """Exception raised when a call to the Transmission daemon fails and can be retried."""
+
+    __module__ = "builtins"
+    pass
+
+
+class CircuitOpenError(TransmissionExtError):
+    """Exception raised when a call is skipped because the service failed repeatedly."""
+
+    __module__ = "builtins"
+    pass
+
+
 __author__ = "IncognitoCoding"
 __copyright__ = "Copyright 2021, common"
 __credits__ = ["IncognitoCoding"]
@@ -25,6 +45,54 @@ __maintainer__ = "IncognitoCoding"
 __status__ = "Development"
 
 
+def get_function_name() -> str:
+    """
+    Gets the name of the calling function.
+
+    This returns the same name as ictoolkit.get_function_name without inspecting the
+    whole stack, so the debug lines stay cheap and ictoolkit is not imported at startup.
+
+    Returns:
+        str:
+        \t\\- The calling function name.
+    """
+    return sys._getframe(1).f_code.co_name
+
+
+def get_ext_error(exc_args: dict) -> Exception:
+    """
+    Creates the fexception formatted error of the exc_args custom type.
+
+    fexception is imported on the first error, so the startup and the RPC client path do not load it.
+
+    Args:
+        exc_args (dict):
+        \t\\- The fexception message arguments (ex: main_message, custom_type, expected_result and returned_result).
+
+    Returns:
+        Exception:
+        \t\\- The custom type error.
+    """
+    from fexception import FCustomException
+
+    return exc_args["custom_type"](FCustomException(message_args=exc_args))
+
+
+def raise_ext_error(exc_args: dict) -> NoReturn:
+    """
+    Raises the fexception formatted error of the exc_args custom type.
+
+    Args:
+        exc_args (dict):
+        \t\\- The fexception message arguments (ex: main_message, custom_type, expected_result and returned_result).
+
+    Raises:
+        custom_type:
+        \t\\- The exc_args main_message.
+    """
+    raise get_ext_error(exc_args=exc_args)
+
+
 @dataclass
 class EmailSettings(object):
     """
@@ -66,6 +134,43 @@ class EmailSettings(object):
     to_email: str
 
 
+@dataclass
+class MigrationSettings(object):
+    """
+    Storage migration settings.
+
+    Args:
+        target_location (str):
+        \t\\- The Transmission download directory the torrent data moves to.
+        migration_policy (RemovalPolicy):
+        \t\\- The compiled rules that select the torrents to move.
+        copy_workers (int):
+        \t\\- The most torrents copied at once.
+        device_concurrency (int):
+        \t\\- The most copies reading from or writing to one storage device at once.
+        device_limits (dict[str, int]):
+        \t\\- The device concurrency by download directory that replaces device_concurrency for the device holding it.
+        set_location_batch (int):
+        \t\\- The most torrents in one Transmission location change call.
+    """
+
+    __slots__ = (
+        "target_location",
+        "migration_policy",
+        "copy_workers",
+        "device_concurrency",
+        "device_limits",
+        "set_location_batch",
+    )
+
+    target_location: str
+    migration_policy: "RemovalPolicy"
+    copy_workers: int
+    device_concurrency: int
+    device_limits: dict[str, int]
+    set_location_batch: int
+
+
 @dataclass
 class StartupSettings(object):
     """
@@ -74,34 +179,459 @@ class StartupSettings(object):
     Args:
         remove_sleep (int):
         \t\\- The amount of time to sleep between removal checks.
+        adaptive_sleep (bool):
+        \t\\- Sleeps until the next torrent is predicted to reach the removal ratio instead of remove_sleep.
+        min_remove_sleep (int):
+        \t\\- The shortest adaptive sleep in seconds.
+        max_remove_sleep (int):
+        \t\\- The longest adaptive sleep in seconds.
         email_alerts (bool):
         \t\\- Sends email alerts.
         alert_program_errors (bool):
         \t\\- Sends email alerts if an exception is thrown.
+        email_digest (bool):
+        \t\\- Merges the email alerts of one check into one email.
+        email_rate_limit (int):
+        \t\\- The fewest seconds between two email alerts with the same subject.
+        async_pipeline (bool):
+        \t\\- Runs the removal as a concurrent asyncio pipeline.
+        inspect_concurrency (int):
+        \t\\- The most torrent inspection calls running at once in the pipeline.
+        delta_sync (bool):
+        \t\\- Refreshes only the recently active torrents between full syncs.
+        full_sync_interval (int):
+        \t\\- The seconds between full torrent syncs when delta sync is enabled.
+        state_database (str):
+        \t\\- The SQLite file that keeps the torrent state between restarts. Empty disables the file.
+        metrics_port (int):
+        \t\\- The local port that serves the Prometheus metrics. 0 disables the endpoint.
+        trace_file (str):
+        \t\\- The Chrome trace-event JSON file that gets the check spans. Empty disables the tracing.
+        profile_cycles (int):
+        \t\\- The number of checks profiled with cProfile after the value changes or SIGUSR1 is received.
+        queue_logging (bool):
+        \t\\- Writes the log records on a background thread, so the log I/O does not delay the checks.
         server (str):
         \t\\- Transmission connection details.
-        removal_ratio (float):
-        \t\\- Set the torrent ratio that needs meet to delete.
+        use_rpc (bool):
+        \t\\- Uses the Transmission RPC endpoint instead of transmission-remote.
+        call_rate (float):
+        \t\\- The most Transmission calls per second. 0 disables the rate limit.
+        max_call_concurrency (int):
+        \t\\- The most Transmission calls in flight. The adaptive limit stays at or below this value.
+        call_latency_tolerance (float):
+        \t\\- The multiple of the usual call latency that lowers the adaptive limit.
+        call_retries (int):
+        \t\\- The retries of a failed Transmission call with jittered backoff.
+        circuit_failure_threshold (int):
+        \t\\- The failed Transmission calls in a row that open the circuit.
+        circuit_reset_seconds (int):
+        \t\\- The seconds an open circuit fails the calls right away before one call checks the daemon again.
+        server_name (str):
+        \t\\- The name that labels the server's logs, metrics and emails. Empty for the single connection server.
+        servers (tuple[StartupSettings, ...]):
+        \t\\- The settings of each server in the connection servers list. Empty when one server is set.
+        removal_ratio (Union[float, None]):
+        \t\\- Set the torrent ratio that needs meet to delete. None when the removal policy is set without a ratio.
+        removal_policy (RemovalPolicy):
+        \t\\- The compiled removal rules. Defaults to the removal ratio or the Finished state when no policy is set.
         root_download_path (str):
         \t\\- Root path of /downloads.
+        batch_removal (bool):
+        \t\\- Removes all torrents that meet the ratio with one call per check.
+        delete_local_data (bool):
+        \t\\- Transmission deletes the torrent data during the removal.
+        verify_timeout (int):
+        \t\\- The longest time in seconds to wait for a removal to verify.
+        deletion_workers (int):
+        \t\\- The most torrent folders deleted at once.
+        deletion_file_workers (int):
+        \t\\- The most files unlinked at once across all torrent folders.
+        disk_pressure (bool):
+        \t\\- Removes more torrents when the download volume runs low on free space.
+        free_space_low (int):
+        \t\\- The free space percent that starts the disk pressure removals.
+        free_space_high (int):
+        \t\\- The free space percent the disk pressure removals stop at.
+        pressure_priority (str):
+        \t\\- The disk pressure removal order (ratio, oldest or largest).
+        pressure_min_seed_hours (int):
+        \t\\- The fewest seeding hours before a torrent can be removed for disk pressure.
+        find_orphans (bool):
+        \t\\- Reports the data in the torrent download folders that no torrent references.
+        reclaim_orphans (bool):
+        \t\\- Deletes the data that no torrent references.
+        orphan_min_age_hours (int):
+        \t\\- The fewest hours since the data was modified before it is an orphan.
+        orphan_exclude (list[str]):
+        \t\\- The paths under the root download path that are never orphans.
         email_settings (EmailSettings):
         \t\\- The email settings dataclass.
+        migration_settings (Union[MigrationSettings, None]):
+        \t\\- The storage migration settings dataclass. None when the migration is disabled.
     """
 
     __slots__ = (
         "remove_sleep",
+        "adaptive_sleep",
+        "min_remove_sleep",
+        "max_remove_sleep",
         "email_alerts",
         "alert_program_errors",
+        "email_digest",
+        "email_rate_limit",
+        "async_pipeline",
+        "inspect_concurrency",
+        "delta_sync",
+        "full_sync_interval",
+        "state_database",
+        "metrics_port",
+        "trace_file",
+        "profile_cycles",
+        "queue_logging",
         "server",
+        "use_rpc",
+        "call_rate",
+        "max_call_concurrency",
+        "call_latency_tolerance",
+        "call_retries",
+        "circuit_failure_threshold",
+        "circuit_reset_seconds",
+        "server_name",
+        "servers",
         "removal_ratio",
+        "removal_policy",
         "root_download_path",
+        "batch_removal",
+        "delete_local_data",
+        "verify_timeout",
+        "deletion_workers",
+        "deletion_file_workers",
+        "disk_pressure",
+        "free_space_low",
+        "free_space_high",
+        "pressure_priority",
+        "pressure_min_seed_hours",
+        "find_orphans",
+        "reclaim_orphans",
+        "orphan_min_age_hours",
+        "orphan_exclude",
         "email_settings",
+        "migration_settings",
     )
 
     remove_sleep: int
+    adaptive_sleep: bool
+    min_remove_sleep: int
+    max_remove_sleep: int
     email_alerts: bool
     alert_program_errors: bool
+    email_digest: bool
+    email_rate_limit: int
+    async_pipeline: bool
+    inspect_concurrency: int
+    delta_sync: bool
+    full_sync_interval: int
+    state_database: str
+    metrics_port: int
+    trace_file: str
+    profile_cycles: int
+    queue_logging: bool
     server: str
-    removal_ratio: float
+    use_rpc: bool
+    call_rate: float
+    max_call_concurrency: int
+    call_latency_tolerance: float
+    call_retries: int
+    circuit_failure_threshold: int
+    circuit_reset_seconds: int
+    server_name: str
+    servers: tuple["StartupSettings", ...]
+    removal_ratio: Union[float, None]
+    removal_policy: "RemovalPolicy"
     root_download_path: str
+    batch_removal: bool
+    delete_local_data: bool
+    verify_timeout: int
+    deletion_workers: int
+    deletion_file_workers: int
+    disk_pressure: bool
+    free_space_low: int
+    free_space_high: int
+    pressure_priority: str
+    pressure_min_seed_hours: int
+    find_orphans: bool
+    reclaim_orphans: bool
+    orphan_min_age_hours: int
+    orphan_exclude: list[str]
     email_settings: EmailSettings
+    migration_settings: Union[MigrationSettings, None]
+
+
+# The tracker tuples shared by the torrents. Most torrents come from a few trackers.
+_shared_trackers: dict[tuple[str, ...], tuple[str, ...]] = {}
+
+
+@dataclass
+class Torrent(object):
+    """
+    Torrent details returned from Transmission.
+
+    The location and state strings are interned and equal tracker tuples are shared, so
+    the memory use of a large library grows mostly with the names and hashes.
+
+    Args:
+        id (int):
+        \t\\- The Transmission torrent ID.
+        hash (str):
+        \t\\- The torrent info hash.
+        name (str):
+        \t\\- The torrent name.
+        ratio (float):
+        \t\\- The torrent share ratio.
+        percent_done (float):
+        \t\\- The download progress between 0.0 and 1.0.
+        location (str):
+        \t\\- The torrent download directory.
+        state (str):
+        \t\\- The torrent state (ex: Seeding, Finished).
+        size (int):
+        \t\\- The torrent size in bytes.
+        seeding_time (int):
+        \t\\- The total seeding time in seconds.
+        added_date (float):
+        \t\\- The time the torrent was added in seconds since the epoch. 0 when unknown.
+        trackers (tuple[str, ...]):
+        \t\\- The tracker host names.
+        upload_rate (float):
+        \t\\- The current upload speed in bytes per second.
+    """
+
+    __slots__ = (
+        "id",
+        "hash",
+        "name",
+        "ratio",
+        "percent_done",
+        "location",
+        "state",
+        "size",
+        "seeding_time",
+        "added_date",
+        "trackers",
+        "upload_rate",
+    )
+
+    id: int
+    hash: str
+    name: str
+    ratio: float
+    percent_done: float
+    location: str
+    state: str
+    size: int
+    seeding_time: int
+    added_date: float
+    trackers: tuple[str, ...]
+    upload_rate: float
+
+    def __post_init__(self) -> None:
+        # Most torrents are complete and idle. Each parsed value is a new float object, so a 1.0
+        # progress and a 0.0 upload rate are swapped for the shared constants and the parsed floats are freed.
+        if self.percent_done == 1.0:
+            self.percent_done = 1.0
+        if not self.upload_rate:
+            self.upload_rate = 0.0
+        self.location = sys.intern(self.location)
+        self.state = sys.intern(self.state)
+        trackers = self.trackers
+        if trackers:
+            self.trackers = _shared_trackers.setdefault(trackers, trackers)
+
+
+class TorrentTable(object):
+    """
+    Torrent records indexed by hash and Transmission ID.
+
+    Adding a torrent with a known hash replaces the record. Transmission reuses IDs after
+    a restart, so adding a torrent with a known ID drops the record that held the ID.
+
+    Args:
+        torrents (Iterable[Torrent], optional):
+        \t\\- The first torrents. Defaults to None.
+    """
+
+    __slots__ = ("_by_hash", "_hash_by_id")
+
+    def __init__(self, torrents: Union[Iterable[Torrent], None] = None) -> None:
+        self._by_hash: dict[str, Torrent] = {}
+        self._hash_by_id: dict[int, str] = {}
+        if torrents is not None:
+            self.replace(torrents=torrents)
+
+    def __len__(self) -> int:
+        return len(self._by_hash)
+
+    def __iter__(self) -> Iterator[Torrent]:
+        return iter(self._by_hash.values())
+
+    def __contains__(self, torrent_hash: object) -> bool:
+        return torrent_hash in self._by_hash
+
+    def __repr__(self) -> str:
+        return f"TorrentTable({len(self._by_hash)} torrent(s))"
+
+    def get(self, torrent_hash: str) -> Union[Torrent, None]:
+        """
+        Gets a torrent by hash.
+
+        Args:
+            torrent_hash (str):
+            \t\\- The torrent info hash.
+
+        Returns:
+            Union[Torrent, None]:
+            \t\\- The torrent or None when the hash is not in the table.
+        """
+        return self._by_hash.get(torrent_hash)
+
+    def get_by_id(self, torrent_id: int) -> Union[Torrent, None]:
+        """
+        Gets a torrent by Transmission ID.
+
+        Args:
+            torrent_id (int):
+            \t\\- The Transmission torrent ID.
+
+        Returns:
+            Union[Torrent, None]:
+            \t\\- The torrent or None when the ID is not in the table.
+        """
+        torrent_hash = self._hash_by_id.get(torrent_id)
+        return self._by_hash.get(torrent_hash) if torrent_hash is not None else None
+
+    def add(self, torrent: Torrent) -> None:
+        """
+        Adds or replaces a torrent.
+
+        Args:
+            torrent (Torrent):
+            \t\\- The torrent.
+        """
+        by_hash = self._by_hash
+        previous = by_hash.get(torrent.hash)
+        if previous is not None and previous.id != torrent.id:
+            self._hash_by_id.pop(previous.id, None)
+        previous_hash = self._hash_by_id.get(torrent.id)
+        if previous_hash is not None and previous_hash != torrent.hash:
+            by_hash.pop(previous_hash, None)
+        by_hash[torrent.hash] = torrent
+        self._hash_by_id[torrent.id] = torrent.hash
+
+    def remove(self, torrent: Torrent) -> None:
+        """
+        Removes a torrent by hash. Unknown torrents are ignored.
+
+        Args:
+            torrent (Torrent):
+            \t\\- The torrent.
+        """
+        removed = self._by_hash.pop(torrent.hash, None)
+        if removed is not None and self._hash_by_id.get(removed.id) == removed.hash:
+            del self._hash_by_id[removed.id]
+
+    def remove_id(self, torrent_id: int) -> Union[Torrent, None]:
+        """
+        Removes a torrent by Transmission ID.
+
+        Args:
+            torrent_id (int):
+            \t\\- The Transmission torrent ID.
+
+        Returns:
+            Union[Torrent, None]:
+            \t\\- The removed torrent or None when the ID is not in the table.
+        """
+        torrent_hash = self._hash_by_id.pop(torrent_id, None)
+        if torrent_hash is None:
+            return None
+        return self._by_hash.pop(torrent_hash, None)
+
+    def replace(self, torrents: Iterable[Torrent]) -> None:
+        """
+        Replaces every torrent in the table.
+
+        Args:
+            torrents (Iterable[Torrent]):
+            \t\\- The torrents.
+        """
+        self._by_hash = {torrent.hash: torrent for torrent in torrents}
+        self._hash_by_id = {torrent.id: torrent.hash for torrent in self._by_hash.values()}
+
+    def values(self) -> list[Torrent]:
+        """
+        Gets every torrent.
+
+        Returns:
+            list[Torrent]:
+            \t\\- The torrents in the order they were added.
+        """
+        return list(self._by_hash.values())
+
+
+@dataclass
+class DeletionResult(object):
+    """
+    Torrent folder deletion result.
+
+    Args:
+        path (str):
+        \t\\- The deleted path.
+        bytes_freed (int):
+        \t\\- The size of the removed files in bytes.
+        files_removed (int):
+        \t\\- The number of removed files.
+        errors (list[str]):
+        \t\\- The errors returned while deleting.
+    """
+
+    __slots__ = (
+        "path",
+        "bytes_freed",
+        "files_removed",
+        "errors",
+    )
+
+    path: str
+    bytes_freed: int
+    files_removed: int
+    errors: list[str]
+
+
+@dataclass
+class CopyResult(object):
+    """
+    Torrent data copy result.
+
+    Args:
+        path (str):
+        \t\\- The copy path.
+        bytes_copied (int):
+        \t\\- The bytes written by this copy. The files finished by an earlier copy are not counted.
+        files_copied (int):
+        \t\\- The number of files written by this copy.
+        errors (list[str]):
+        \t\\- The errors returned while copying.
+    """
+
+    __slots__ = (
+        "path",
+        "bytes_copied",
+        "files_copied",
+        "errors",
+    )
+
+    path: str
+    bytes_copied: int
+    files_copied: int
+    errors: list[str]
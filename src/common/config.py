@@ -0,0 +1,138 @@
+"""This module is designed to detect settings file changes, so the settings are only reloaded after an edit."""
+# Built-in/Generic Imports
+import os
+import hashlib
+from typing import Any, Union
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, config"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+# The settings sections read by get_startup_settings. Every other root key belongs to the logging configuration.
+SETTINGS_SECTIONS: tuple[str, ...] = ("general", "connection", "removal", "migration", "email")
+
+
+def flatten_config(config: dict, prefix: str = "") -> dict[str, Any]:
+    """
+    Flattens a nested configuration into dotted keys.
+
+    Args:
+        config (dict):
+        \t\\- The configuration.
+        prefix (str, optional):
+        \t\\- The key prefix. Defaults to "".
+
+    Returns:
+        dict[str, Any]:
+        \t\\- The values by dotted key (ex: removal.removal_ratio).
+    """
+    flat_config: dict[str, Any] = {}
+    for key, value in config.items():
+        dotted_key = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            flat_config.update(flatten_config(config=value, prefix=f"{dotted_key}."))
+        else:
+            flat_config[dotted_key] = value
+    return flat_config
+
+
+def changed_config_keys(old_config: dict, new_config: dict) -> list[str]:
+    """
+    Gets the dotted keys that were added, removed or changed.
+
+    Args:
+        old_config (dict):
+        \t\\- The previous configuration.
+        new_config (dict):
+        \t\\- The new configuration.
+
+    Returns:
+        list[str]:
+        \t\\- The sorted dotted keys.
+    """
+    old_flat_config = flatten_config(config=old_config)
+    new_flat_config = flatten_config(config=new_config)
+    return sorted(
+        key
+        for key in old_flat_config.keys() | new_flat_config.keys()
+        if old_flat_config.get(key, KeyError) != new_flat_config.get(key, KeyError)
+    )
+
+
+class SettingsCache(object):
+    """
+    Caches the parsed settings and detects settings file edits.
+
+    Each check is one os.stat call. The file is only read and hashed when the modified time
+    or size changed, so saving the file without edits does not count as a change.
+
+    Args:
+        path (str):
+        \t\\- The settings file path.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        # The parsed YAML and the settings built from it.
+        self.config: Union[dict, None] = None
+        self.startup_settings: Any = None
+        self._stat_key: Union[tuple[int, int], None] = None
+        self._digest: Union[str, None] = None
+        self._pending: Union[tuple[tuple[int, int], str], None] = None
+
+    def has_changed(self) -> bool:
+        """
+        Checks if the settings file changed since the last accepted load.
+
+        Raises:
+            FileNotFoundError:
+            \t\\- The settings file does not exist.
+
+        Returns:
+            bool:
+            \t\\- True when the file needs to be loaded.
+        """
+        file_stat = os.stat(self.path)
+        stat_key = (file_stat.st_mtime_ns, file_stat.st_size)
+        if self.startup_settings is not None and stat_key == self._stat_key:
+            return False
+
+        with open(self.path, "rb") as file:
+            digest = hashlib.sha256(file.read()).hexdigest()
+        if self.startup_settings is not None and digest == self._digest:
+            # Touched without edits.
+            self._stat_key = stat_key
+            return False
+
+        self._pending = (stat_key, digest)
+        return True
+
+    def invalidate(self) -> None:
+        """Forgets the cached load, so the next check reloads the settings and the logging configuration."""
+        self.config = None
+        self.startup_settings = None
+        self._stat_key = None
+        self._digest = None
+        self._pending = None
+
+    def accept(self, config: dict, startup_settings: Any) -> None:
+        """
+        Caches a successful load. A failed load is not accepted, so the next check loads the file again.
+
+        Args:
+            config (dict):
+            \t\\- The parsed YAML.
+            startup_settings (Any):
+            \t\\- The settings built from the YAML.
+        """
+        if self._pending:
+            self._stat_key, self._digest = self._pending
+            self._pending = None
+        self.config = config
+        self.startup_settings = startup_settings
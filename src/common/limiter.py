@@ -0,0 +1,237 @@
+"""This module is designed to limit the call rate and the calls in flight to the Transmission daemon and adapt the limit to the daemon load."""
+# Built-in/Generic Imports
+import math
+import time
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator
+
+# Local Functions
+from common.metrics import METRICS
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, limiter"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+# The share of the gap to a slower call that the baseline latency moves by, so a lasting change is followed slowly.
+BASELINE_DRIFT: float = 0.01
+# The fewest seconds a call must be slower than the baseline to count as slow, so fast calls are not judged on noise.
+LATENCY_SLACK: float = 0.05
+# The fewest seconds between two limit decreases, so one slow burst only halves the limit once.
+DECREASE_COOLDOWN: float = 1.0
+# The seconds between the slot checks of a waiting asyncio call.
+ASYNC_POLL_INTERVAL: float = 0.01
+
+
+class CallLimiter(object):
+    """
+    Client-side limiter for the Transmission daemon calls.
+
+    A token bucket caps the call rate with a burst of one second of calls. An adaptive
+    concurrency limit caps the calls in flight with additive increase and multiplicative
+    decrease. A call that returns close to the fastest recent call of the same kind raises
+    the limit by 1/limit, which is about one more call per round of calls. An error or a
+    call slower than latency_tolerance times that baseline halves the limit. The limit
+    starts at max_concurrency and stays between 1 and max_concurrency.
+
+    The limiter is kept between checks, so the limit carries the daemon load over to the
+    next check. The limit, the calls in flight and the wait time are recorded as metrics.
+
+    Args:
+        rate (float, optional):
+        \t\\- The most calls per second. 0 disables the token bucket. Defaults to 0.
+        max_concurrency (int, optional):
+        \t\\- The most calls in flight. Defaults to 8.
+        latency_tolerance (float, optional):
+        \t\\- The multiple of the baseline latency that counts as slow. Defaults to 2.0.
+    """
+
+    def __init__(self, rate: float = 0, max_concurrency: int = 8, latency_tolerance: float = 2.0) -> None:
+        self._condition = threading.Condition()
+        self.rate = rate
+        self.max_concurrency = max(max_concurrency, 1)
+        self.latency_tolerance = latency_tolerance
+        self._limit = float(self.max_concurrency)
+        self._in_flight = 0
+        self._tokens = max(rate, 1.0)
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+        # The latency baseline in seconds by call kind (ex: torrent-get:all).
+        self._baselines: dict[str, float] = {}
+
+    @property
+    def limit(self) -> int:
+        """The current concurrency limit."""
+        return int(self._limit)
+
+    def configure(self, rate: float, max_concurrency: int, latency_tolerance: float) -> None:
+        """
+        Applies the limiter settings. The current limit is lowered to the new maximum.
+
+        Args:
+            rate (float):
+            \t\\- The most calls per second. 0 disables the token bucket.
+            max_concurrency (int):
+            \t\\- The most calls in flight.
+            latency_tolerance (float):
+            \t\\- The multiple of the baseline latency that counts as slow.
+        """
+        with self._condition:
+            if rate != self.rate:
+                self.rate = rate
+                self._tokens = min(self._tokens, max(rate, 1.0))
+            if max_concurrency != self.max_concurrency:
+                # A raised maximum is reached with the additive increase.
+                self.max_concurrency = max(max_concurrency, 1)
+                self._limit = min(self._limit, self.max_concurrency)
+            self.latency_tolerance = latency_tolerance
+            self._condition.notify_all()
+        METRICS.set("call_concurrency_limit", self.limit)
+
+    def _try_acquire(self, slot: bool) -> float:
+        """
+        Takes a token and a slot when both are free. The condition lock must be held.
+
+        Returns:
+            float:
+            \t\\- 0 when acquired, the seconds until the next token, or -1 when the call waits for a slot.
+        """
+        if self.rate > 0:
+            now = time.monotonic()
+            self._tokens = min(max(self.rate, 1.0), self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+        if slot and self._in_flight >= int(self._limit):
+            return -1
+        if self.rate > 0:
+            self._tokens -= 1
+        if slot:
+            self._in_flight += 1
+        return 0
+
+    def _release(self, kind: str, duration: float, failed: bool) -> None:
+        """Frees the slot and adapts the limit to the call latency or error. The condition lock must not be held."""
+        logger = logging.getLogger(__name__)
+
+        decreased_from = None
+        recovered = False
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+            baseline = self._baselines.get(kind)
+            if baseline is None or duration < baseline:
+                self._baselines[kind] = duration
+            else:
+                self._baselines[kind] = baseline + (duration - baseline) * BASELINE_DRIFT
+            slow = (
+                baseline is not None
+                and duration > baseline * self.latency_tolerance
+                and duration - baseline > LATENCY_SLACK
+            )
+            if failed or slow:
+                now = time.monotonic()
+                if self._limit > 1 and now - self._last_decrease >= DECREASE_COOLDOWN:
+                    decreased_from = self.limit
+                    self._limit = max(1.0, math.floor(self._limit / 2))
+                    self._last_decrease = now
+            elif self._limit < self.max_concurrency:
+                self._limit = min(float(self.max_concurrency), self._limit + 1 / self._limit)
+                recovered = self._limit == self.max_concurrency
+            limit = self.limit
+            in_flight = self._in_flight
+        METRICS.set("call_concurrency_limit", limit)
+        METRICS.set("calls_in_flight", in_flight)
+        if decreased_from is not None:
+            METRICS.inc("call_limit_decreases")
+            logger.info(
+                "Lowered the Transmission call concurrency limit from %s to %s after a %s %s call (%.3f seconds, baseline %.3f seconds)",
+                decreased_from,
+                limit,
+                "failed" if failed else "slow",
+                kind,
+                duration,
+                baseline or 0.0,
+            )
+        elif recovered:
+            logger.info("Raised the Transmission call concurrency limit back to %s", limit)
+
+    @contextmanager
+    def acquire(self, kind: str, slot: bool = True) -> Iterator[None]:
+        """
+        Waits for a token and a free slot and holds the slot for the block.
+
+        Args:
+            kind (str):
+            \t\\- The call kind that the latency is compared within (ex: torrent-get:all).
+            slot (bool, optional):
+            \t\\- Holds a concurrency slot and adapts the limit to the call. Only a token is taken when False. Defaults to True.
+        """
+        wait_start = time.perf_counter()
+        with self._condition:
+            while True:
+                wait = self._try_acquire(slot=slot)
+                if not wait:
+                    break
+                self._condition.wait(timeout=wait if wait > 0 else None)
+            if slot:
+                METRICS.set("calls_in_flight", self._in_flight)
+        METRICS.observe("call_wait_seconds", time.perf_counter() - wait_start)
+        if not slot:
+            yield
+            return
+
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        # A caller that stops reading early or a cancelled task is not a daemon failure.
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._release(kind=kind, duration=time.perf_counter() - start, failed=failed)
+
+    @asynccontextmanager
+    async def acquire_async(self, kind: str, slot: bool = True) -> AsyncIterator[None]:
+        """
+        Waits for a token and a free slot without blocking the event loop and holds the slot for the block.
+
+        Args:
+            kind (str):
+            \t\\- The call kind that the latency is compared within (ex: --info:ids).
+            slot (bool, optional):
+            \t\\- Holds a concurrency slot and adapts the limit to the call. Only a token is taken when False. Defaults to True.
+        """
+        wait_start = time.perf_counter()
+        while True:
+            with self._condition:
+                wait = self._try_acquire(slot=slot)
+                if not wait:
+                    if slot:
+                        METRICS.set("calls_in_flight", self._in_flight)
+                    break
+            await asyncio.sleep(wait if wait > 0 else ASYNC_POLL_INTERVAL)
+        METRICS.observe("call_wait_seconds", time.perf_counter() - wait_start)
+        if not slot:
+            yield
+            return
+
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        # A caller that stops reading early or a cancelled task is not a daemon failure.
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._release(kind=kind, duration=time.perf_counter() - start, failed=failed)
@@ -0,0 +1,135 @@
+"""This module is designed to move the log handler I/O to a background thread and format log records as JSON lines."""
+# Built-in/Generic Imports
+import json
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Union
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, logqueue"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats each record as one JSON object per line.
+
+    Set a handler formatter to this class in the logging settings with the "()" key
+    (ex: "()": common.logqueue.JsonFormatter). The exception traceback is added as the
+    exception field.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+            "thread": record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class _RoutingQueueHandler(QueueHandler):
+    """Queues the records of one logger with the handlers the logger had before the queue was added."""
+
+    def __init__(self, log_queue: queue.SimpleQueue, handlers: tuple[logging.Handler, ...]) -> None:
+        super().__init__(log_queue)
+        self.handlers = handlers
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The message arguments are merged now, because mutable arguments may change before the writer
+        # thread gets the record. The handler formatting runs on the writer thread.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self.queue.put_nowait((record, self.handlers))
+
+
+class _RoutingQueueListener(QueueListener):
+    """Writes each queued record to the handlers of the logger that queued it."""
+
+    def handle(self, item: tuple[logging.LogRecord, tuple[logging.Handler, ...]]) -> None:  # type: ignore[override]
+        record, handlers = item
+        for handler in handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+_listener: Union[_RoutingQueueListener, None] = None
+# The original handlers by logger, so the loggers can be restored when the queue stops.
+_original_handlers: dict[logging.Logger, list[logging.Handler]] = {}
+_lock = threading.Lock()
+_atexit_registered = False
+
+
+def start_queue_logging() -> None:
+    """
+    Moves the configured log handlers behind one queue and a background writer thread.
+
+    Each logger keeps its own handlers and levels. The logging calls only add the record to
+    the queue, so slow log storage and file rotation do not delay the removal checks. This
+    does nothing when the queue is already running. The queued records are written before
+    the process exits.
+    """
+    global _listener, _atexit_registered
+
+    with _lock:
+        if _listener is not None:
+            return
+        loggers: list[logging.Logger] = [logging.getLogger()] + [
+            logger for logger in logging.Logger.manager.loggerDict.values() if isinstance(logger, logging.Logger)
+        ]
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        all_handlers: list[logging.Handler] = []
+        for logger in loggers:
+            if not logger.handlers:
+                continue
+            _original_handlers[logger] = list(logger.handlers)
+            all_handlers += [handler for handler in logger.handlers if handler not in all_handlers]
+            logger.handlers = [_RoutingQueueHandler(log_queue=log_queue, handlers=tuple(logger.handlers))]
+        _listener = _RoutingQueueListener(log_queue, *all_handlers)
+        _listener.start()
+        if not _atexit_registered:
+            # The logging module flushes its handlers at exit after this runs.
+            atexit.register(stop_queue_logging)
+            _atexit_registered = True
+
+
+def stop_queue_logging() -> None:
+    """
+    Writes the queued records and gives each logger its original handlers back.
+
+    A logger that was configured again while the queue ran keeps its new handlers.
+    """
+    global _listener
+
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener = None
+        for logger, handlers in _original_handlers.items():
+            if len(logger.handlers) == 1 and isinstance(logger.handlers[0], _RoutingQueueHandler):
+                logger.handlers = handlers
+        _original_handlers.clear()
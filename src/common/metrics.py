@@ -0,0 +1,380 @@
+"""This module is designed to record counters, gauges and latency histograms and serve them in the Prometheus text format."""
+# Built-in/Generic Imports
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Union
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, metrics"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+METRIC_PREFIX: str = "transmission_ext_"
+
+# The histogram bucket upper bounds in seconds.
+LATENCY_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+METRIC_HELP: dict[str, str] = {
+    "cycle_duration_seconds": "Duration of one removal check.",
+    "phase_duration_seconds": "Duration of one removal check phase.",
+    "client_call_duration_seconds": "Latency of one Transmission RPC request or transmission-remote call.",
+    "client_call_errors": "Failed Transmission RPC requests or transmission-remote calls.",
+    "torrents_scanned": "Torrents checked against the removal rules.",
+    "torrents_removed": "Torrents removed from Transmission.",
+    "torrents_pressure_picked": "Torrents picked for removal to free disk space.",
+    "bytes_freed": "Bytes freed by the torrent folder deletions.",
+    "orphans_found": "Newly found paths that no torrent references.",
+    "orphan_bytes_reclaimed": "Bytes freed by the orphaned path deletions.",
+    "torrents_migrated": "Torrents moved to the migration target location in Transmission.",
+    "bytes_migrated": "Bytes copied to the migration target location.",
+    "email_duration_seconds": "Latency of one email delivery.",
+    "email_errors": "Failed email deliveries.",
+    "call_wait_seconds": "Time one Transmission call waited for the call limiter.",
+    "call_concurrency_limit": "Current adaptive limit of the Transmission calls in flight.",
+    "calls_in_flight": "Transmission calls in flight.",
+    "call_limit_decreases": "Decreases of the Transmission call concurrency limit after a slow or failed call.",
+    "call_retries": "Retries of a Transmission or SMTP call after a transient failure.",
+    "circuit_state": "Circuit breaker state (0 closed, 1 half-open, 2 open).",
+    "circuit_opens": "Times a circuit breaker opened after repeated failures.",
+    "torrent_errors": "Torrents skipped in one check after a failed Transmission call or data copy.",
+}
+
+LabelKey = tuple[tuple[str, str], ...]
+
+# The labels added to every metric recorded in the current thread or task (ex: the server name).
+_context_labels: ContextVar[dict[str, str]] = ContextVar("metric_labels", default={})
+
+
+class Metrics(object):
+    """
+    Thread-safe registry of counters, gauges and histograms.
+
+    Metric names are given without the transmission_ext_ prefix. Counters get the
+    Prometheus _total suffix when rendered. The labels set with labels() are added to
+    every metric recorded inside the block.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[tuple[str, LabelKey], float] = {}
+        self._gauges: dict[tuple[str, LabelKey], float] = {}
+        # Each histogram holds the bucket counts, the sum and the count.
+        self._histograms: dict[tuple[str, LabelKey], list] = {}
+        # The summary baselines by summary labels.
+        self._cycle_baseline: dict[LabelKey, dict[str, float]] = {}
+
+    @contextmanager
+    def labels(self, **labels: str) -> Iterator[None]:
+        """
+        Adds labels to every metric recorded inside the block by the current thread or task.
+
+        Tasks and threads started with asyncio.to_thread inside the block inherit the labels.
+        """
+        token = _context_labels.set({**_context_labels.get(), **labels})
+        try:
+            yield
+        finally:
+            _context_labels.reset(token)
+
+    def _key(self, name: str, labels: dict[str, str]) -> tuple[str, LabelKey]:
+        context_labels = _context_labels.get()
+        if context_labels:
+            labels = {**context_labels, **labels}
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        """
+        Increases a counter.
+
+        Args:
+            name (str):
+            \t\\- The counter name (ex: torrents_removed).
+            value (float, optional):
+            \t\\- The increase. Defaults to 1.
+        """
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        """
+        Sets a gauge.
+
+        Args:
+            name (str):
+            \t\\- The gauge name (ex: calls_in_flight).
+            value (float):
+            \t\\- The current value.
+        """
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """
+        Records one histogram value.
+
+        Args:
+            name (str):
+            \t\\- The histogram name (ex: cycle_duration_seconds).
+            value (float):
+            \t\\- The value in seconds.
+        """
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(LATENCY_BUCKETS), 0.0, 0]
+            for index, upper_bound in enumerate(LATENCY_BUCKETS):
+                if value <= upper_bound:
+                    histogram[0][index] += 1
+                    break
+            histogram[1] += value
+            histogram[2] += 1
+
+    @contextmanager
+    def timer(self, name: str, error_counter: Union[str, None] = None, **labels: str) -> Iterator[None]:
+        """
+        Records the duration of the block in a histogram.
+
+        Args:
+            name (str):
+            \t\\- The histogram name.
+            error_counter (str, optional):
+            \t\\- The counter increased when the block raises. Defaults to None.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            if error_counter:
+                self.inc(error_counter, **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def total(self, name: str, **labels: str) -> float:
+        """
+        Gets the counter total or the histogram sum across all labels or the labels that match.
+
+        Args:
+            name (str):
+            \t\\- The counter or histogram name.
+
+        Returns:
+            float:
+            \t\\- The total.
+        """
+        pairs = set(labels.items())
+        with self._lock:
+            if name.endswith("_seconds"):
+                return sum(
+                    histogram[1]
+                    for (key_name, key_labels), histogram in self._histograms.items()
+                    if key_name == name and pairs <= set(key_labels)
+                )
+            return sum(
+                value
+                for (key_name, key_labels), value in self._counters.items()
+                if key_name == name and pairs <= set(key_labels)
+            )
+
+    def count(self, name: str, **labels: str) -> int:
+        """
+        Gets the number of values recorded by a histogram across all labels or the labels that match.
+
+        Args:
+            name (str):
+            \t\\- The histogram name.
+
+        Returns:
+            int:
+            \t\\- The count.
+        """
+        pairs = set(labels.items())
+        with self._lock:
+            return sum(
+                histogram[2]
+                for (key_name, key_labels), histogram in self._histograms.items()
+                if key_name == name and pairs <= set(key_labels)
+            )
+
+    def cycle_summary(self, duration: float, **labels: str) -> str:
+        """
+        Formats the activity since the previous summary with the same labels as one log line.
+
+        Args:
+            duration (float):
+            \t\\- The check duration in seconds.
+
+        Returns:
+            str:
+            \t\\- The summary.
+        """
+        current = {
+            "calls": self.count("client_call_duration_seconds", **labels),
+            "call_seconds": self.total("client_call_duration_seconds", **labels),
+            "call_errors": self.total("client_call_errors", **labels),
+            "scanned": self.total("torrents_scanned", **labels),
+            "removed": self.total("torrents_removed", **labels),
+            "bytes_freed": self.total("bytes_freed", **labels),
+            "emails": self.count("email_duration_seconds", **labels),
+            "email_errors": self.total("email_errors", **labels),
+        }
+        pairs = set(labels.items())
+        summary_key = tuple(sorted(labels.items()))
+        with self._lock:
+            for (name, key_labels), histogram in self._histograms.items():
+                if name == "phase_duration_seconds" and pairs <= set(key_labels):
+                    phase_key = f"phase {dict(key_labels).get('phase', '')}"
+                    current[phase_key] = current.get(phase_key, 0) + histogram[1]
+            baseline = self._cycle_baseline.get(summary_key, {})
+            self._cycle_baseline[summary_key] = current
+        delta = {key: value - baseline.get(key, 0) for key, value in current.items()}
+        phases = ", ".join(f"{key[6:]} {value:.3f}" for key, value in sorted(delta.items()) if key.startswith("phase "))
+        label_text = f" ({', '.join(f'{key}={value}' for key, value in summary_key)})" if summary_key else ""
+        return (
+            f"Check summary{label_text}: {duration:.3f} seconds ({phases or 'no phases'}), {delta['calls']:.0f} Transmission call(s) taking "
+            f"{delta['call_seconds']:.3f} seconds with {delta['call_errors']:.0f} error(s), "
+            f"{delta['scanned']:.0f} torrent(s) scanned, {delta['removed']:.0f} removed, "
+            f"{delta['bytes_freed']:.0f} bytes freed, {delta['emails']:.0f} email(s) sent with "
+            f"{delta['email_errors']:.0f} error(s)"
+        )
+
+    def render(self) -> str:
+        """
+        Renders every metric in the Prometheus text format.
+
+        Returns:
+            str:
+            \t\\- The metrics text.
+        """
+
+        def format_labels(labels: LabelKey, extra: Union[tuple[str, str], None] = None) -> str:
+            pairs = list(labels) + ([extra] if extra else [])
+            if not pairs:
+                return ""
+            escaped_pairs = ((key, str(value).replace("\\", "\\\\").replace('"', '\\"')) for key, value in pairs)
+            return "{" + ",".join(f'{key}="{value}"' for key, value in escaped_pairs) + "}"
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+
+        lines: list[str] = []
+        typed: set[str] = set()
+        for (name, labels), value in counters:
+            full_name = f"{METRIC_PREFIX}{name}_total"
+            if full_name not in typed:
+                typed.add(full_name)
+                lines.append(f"# HELP {full_name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {full_name} counter")
+            lines.append(f"{full_name}{format_labels(labels)} {value:g}")
+        for (name, labels), value in gauges:
+            full_name = f"{METRIC_PREFIX}{name}"
+            if full_name not in typed:
+                typed.add(full_name)
+                lines.append(f"# HELP {full_name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {full_name} gauge")
+            lines.append(f"{full_name}{format_labels(labels)} {value:g}")
+        for (name, labels), (bucket_counts, value_sum, value_count) in histograms:
+            full_name = f"{METRIC_PREFIX}{name}"
+            if full_name not in typed:
+                typed.add(full_name)
+                lines.append(f"# HELP {full_name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {full_name} histogram")
+            cumulative = 0
+            for upper_bound, bucket_count in zip(LATENCY_BUCKETS, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"{full_name}_bucket{format_labels(labels, ('le', f'{upper_bound:g}'))} {cumulative}")
+            lines.append(f"{full_name}_bucket{format_labels(labels, ('le', '+Inf'))} {value_count}")
+            lines.append(f"{full_name}_sum{format_labels(labels)} {value_sum:g}")
+            lines.append(f"{full_name}_count{format_labels(labels)} {value_count}")
+        return "\n".join(lines) + "\n"
+
+
+# The process-wide registry used by the clients, removal functions and notifier.
+METRICS = Metrics()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves the registry on /metrics."""
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = METRICS.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        logging.getLogger(__name__).debug("Metrics request from %s: %s", self.address_string(), format % args)
+
+
+_server: Union[ThreadingHTTPServer, None] = None
+# The address of the last failed listen, so the failure is only logged once.
+_failed_address: Union[tuple[str, int], None] = None
+# Each server worker applies the settings, so the endpoint changes are serialized.
+_server_lock = threading.Lock()
+
+
+def serve_metrics(port: int, host: str = "127.0.0.1") -> None:
+    """
+    Starts, moves or stops the metrics endpoint (http://host:port/metrics).
+
+    The endpoint is optional, so a port that cannot be bound (ex: still in use after a
+    restart) is logged and the check continues without it. The next call tries again.
+
+    Args:
+        port (int):
+        \t\\- The listening port. 0 stops the endpoint.
+        host (str, optional):
+        \t\\- The listening address. Defaults to "127.0.0.1".
+    """
+    with _server_lock:
+        _serve_metrics(port=port, host=host)
+
+
+def _serve_metrics(port: int, host: str) -> None:
+    global _server, _failed_address
+    logger = logging.getLogger(__name__)
+
+    if _server is not None:
+        if port and _server.server_address[:2] == (host, port):
+            return
+        _server.shutdown()
+        _server.server_close()
+        _server = None
+    if not port:
+        return
+
+    try:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as exc:
+        # The error is logged once per address, so a busy port does not log on every check.
+        if _failed_address != (host, port):
+            logger.error(
+                "The metrics endpoint could not listen on %s:%s. Continuing without metrics. Exception: %s", host, port, exc
+            )
+        else:
+            logger.debug("The metrics endpoint still could not listen on %s:%s. Exception: %s", host, port, exc)
+        _failed_address = (host, port)
+        return
+    _failed_address = None
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    logger.info("Serving metrics on http://%s:%s/metrics", host, port)
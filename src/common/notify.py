@@ -0,0 +1,406 @@
+"""This module is designed to send email notifications from a background worker over one reused SMTP session."""
+# Built-in/Generic Imports
+import time
+import queue
+import smtplib
+import logging
+import threading
+from collections import deque
+from email.message import EmailMessage
+from typing import Union
+
+# Local Functions
+from common.metrics import METRICS
+from common.tracing import TRACER
+from common.resilience import CircuitBreaker, retry_call
+
+# Local Dataclasses
+from common.common import EmailSettings
+
+# Local Exceptions
+from common.common import CircuitOpenError
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, notify"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+# The seconds an unused SMTP session stays open before the worker closes it.
+SMTP_IDLE_TIMEOUT: float = 60.0
+
+
+class SMTPTemporaryError(smtplib.SMTPException):
+    """A send failure that can succeed later (ex: a dropped connection or a 4xx reply)."""
+
+
+# The SMTP failures that are retried and held. The other SMTP errors (ex: a 535 login or a 550 recipient failure) drop the message.
+SMTP_TRANSIENT_ERRORS: tuple[type[Exception], ...] = (SMTPTemporaryError,)
+# The retries of a failed message before it is held.
+SMTP_RETRIES: int = 2
+# The failed sends in a row, retries included, that stop the sends for SMTP_RESET_TIMEOUT seconds.
+SMTP_FAILURE_THRESHOLD: int = 3
+SMTP_RESET_TIMEOUT: float = 300.0
+# The fewest seconds between two sends of the held messages.
+HELD_RETRY_INTERVAL: float = 30.0
+# The most held messages. The oldest message is dropped first.
+MAX_HELD_NOTIFICATIONS: int = 100
+
+
+def is_temporary_smtp_error(exc: BaseException) -> bool:
+    """
+    Checks if a send failure can succeed later.
+
+    Args:
+        exc (BaseException):
+        \t\\- The send failure.
+
+    Returns:
+        bool:
+        \t\\- True for a dropped connection, a network error or a 4xx reply.
+    """
+    if isinstance(exc, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return bool(exc.recipients) and all(400 <= code < 500 for code, _ in exc.recipients.values())
+    # smtplib errors are OSError subclasses. Only the network errors are left here.
+    return isinstance(exc, OSError) and not isinstance(exc, smtplib.SMTPException)
+
+
+class _Flush(object):
+    """Queue marker that sends the digest and signals the caller."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+
+
+# Queue marker that stops the worker.
+_STOP = object()
+
+
+class Notifier(object):
+    """
+    Queues email notifications and delivers them from a background worker.
+
+    The worker keeps one SMTP session open between messages and closes it after
+    SMTP_IDLE_TIMEOUT seconds without messages. The digest mode holds the notifications
+    until flush() and sends them as one message. The rate limit drops repeated
+    notifications with the same subject and reports the dropped count in the next one.
+
+    A failed message is retried with jittered backoff. A message that still fails is held
+    and sent again when the SMTP server is back. After SMTP_FAILURE_THRESHOLD failed sends
+    in a row, a circuit breaker holds the messages without calling the server until
+    SMTP_RESET_TIMEOUT seconds passed.
+
+    Args:
+        email_settings (EmailSettings, optional):
+        \t\\- The email settings. Nothing is sent until the settings are configured. Defaults to None.
+        enabled (bool, optional):
+        \t\\- Sends the notifications. Defaults to True.
+        digest (bool, optional):
+        \t\\- Merges the notifications of one check into one message. Defaults to False.
+        rate_limit (int, optional):
+        \t\\- The fewest seconds between two notifications with the same subject. Defaults to 0.
+    """
+
+    def __init__(
+        self,
+        email_settings: Union[EmailSettings, None] = None,
+        enabled: bool = True,
+        digest: bool = False,
+        rate_limit: int = 0,
+    ) -> None:
+        self.email_settings = email_settings
+        self.enabled = enabled
+        self.digest = digest
+        self.rate_limit = rate_limit
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Union[threading.Thread, None] = None
+        self._lock = threading.Lock()
+        self._last_sent: dict[str, float] = {}
+        self._suppressed: dict[str, int] = {}
+        # Worker state. Only the worker thread uses these.
+        self._smtp: Union[smtplib.SMTP, None] = None
+        self._smtp_settings: Union[EmailSettings, None] = None
+        self._digest_events: list[tuple[str, str]] = []
+        self._held: deque[tuple[str, str]] = deque(maxlen=MAX_HELD_NOTIFICATIONS)
+        self._breaker = CircuitBreaker(
+            name="smtp", failure_threshold=SMTP_FAILURE_THRESHOLD, reset_timeout=SMTP_RESET_TIMEOUT
+        )
+
+    def configure(self, email_settings: EmailSettings, enabled: bool, digest: bool, rate_limit: int) -> None:
+        """
+        Applies reloaded settings. The SMTP session reconnects when the email settings changed.
+
+        Args:
+            email_settings (EmailSettings):
+            \t\\- The email settings.
+            enabled (bool):
+            \t\\- Sends the notifications.
+            digest (bool):
+            \t\\- Merges the notifications of one check into one message.
+            rate_limit (int):
+            \t\\- The fewest seconds between two notifications with the same subject.
+        """
+        self.email_settings = email_settings
+        self.enabled = enabled
+        self.digest = digest
+        self.rate_limit = rate_limit
+
+    def notify(self, subject: str, body: str) -> None:
+        """
+        Queues a notification. This returns without waiting for the delivery.
+
+        Args:
+            subject (str):
+            \t\\- The email subject.
+            body (str):
+            \t\\- The email body.
+        """
+        logger = logging.getLogger(__name__)
+        if not self.enabled or self.email_settings is None:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            last_sent = self._last_sent.get(subject)
+            if self.rate_limit and last_sent is not None and now - last_sent < self.rate_limit:
+                self._suppressed[subject] = self._suppressed.get(subject, 0) + 1
+                logger.debug("The notification (%s) was suppressed by the %s-second rate limit", subject, self.rate_limit)
+                return
+            self._last_sent[subject] = now
+            suppressed = self._suppressed.pop(subject, 0)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="notifier", daemon=True)
+                self._thread.start()
+
+        if suppressed:
+            body = f"{body}\n\n{suppressed} more notification(s) with this subject were suppressed by the rate limit."
+        self._queue.put((subject, body))
+
+    def flush(self, timeout: Union[float, None] = None) -> bool:
+        """
+        Sends the digest and waits for the queued notifications to be delivered.
+
+        Args:
+            timeout (float, optional):
+            \t\\- The longest wait in seconds. 0 returns right away. Waits until delivered when not set. Defaults to None.
+
+        Returns:
+            bool:
+            \t\\- True when the queued notifications were delivered before the timeout.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        marker = _Flush()
+        self._queue.put(marker)
+        return marker.done.wait(timeout=timeout)
+
+    def close(self, timeout: Union[float, None] = None) -> None:
+        """
+        Delivers the queued notifications and stops the worker. The held notifications are logged as not sent.
+
+        Args:
+            timeout (float, optional):
+            \t\\- The longest wait in seconds. Defaults to None.
+        """
+        logger = logging.getLogger(__name__)
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self.flush(timeout=timeout)
+        self._queue.put(_STOP)
+        self._thread.join(timeout=timeout)
+        if not self._thread.is_alive() and self._held:
+            logger.warning(
+                "%s held notification(s) were not sent: %s",
+                len(self._held),
+                ", ".join(subject for subject, _ in self._held),
+            )
+
+    def _worker(self) -> None:
+        """Delivers the queued notifications until stopped."""
+        logger = logging.getLogger(__name__)
+
+        while True:
+            # The held notifications are sent again once the circuit lets a send through.
+            timeout = max(self._breaker.retry_in(), HELD_RETRY_INTERVAL) if self._held else SMTP_IDLE_TIMEOUT
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._disconnect()
+                return
+            # An unexpected failure (ex: a bad smtp port or a line break in a header) drops the
+            # notification. The worker keeps running, so later notifications and flush() still work.
+            try:
+                if item is None:
+                    if self._held:
+                        self._send_held()
+                    else:
+                        self._disconnect()
+                elif isinstance(item, _Flush):
+                    self._send_digest()
+                elif self.digest:
+                    self._digest_events.append(item)
+                elif self._send(subject=item[0], body=item[1]) and self._held:
+                    self._send_held()
+            except Exception as exc:
+                METRICS.inc("email_errors")
+                logger.error("The notification could not be sent. Exception: %s", exc)
+                self._disconnect()
+            finally:
+                if isinstance(item, _Flush):
+                    item.done.set()
+
+    def _send_digest(self) -> None:
+        """Sends the digest notifications as one message."""
+        events, self._digest_events = self._digest_events, []
+        if len(events) == 1:
+            self._send(subject=events[0][0], body=events[0][1])
+        elif events:
+            body = "\n\n".join(f"{subject}\n{'-' * len(subject)}\n{body}" for subject, body in events)
+            self._send(subject=f"Transmission Remove - {len(events)} Notifications", body=body)
+
+    def _hold(self, subject: str, body: str) -> None:
+        """
+        Holds a notification until the SMTP server is back. The oldest notification is dropped when the hold is full.
+
+        Args:
+            subject (str):
+            \t\\- The email subject.
+            body (str):
+            \t\\- The email body.
+        """
+        logger = logging.getLogger(__name__)
+        if len(self._held) == self._held.maxlen:
+            logger.error("The held notification (%s) was dropped to hold a newer notification", self._held[0][0])
+        self._held.append((subject, body))
+
+    def _send_held(self) -> None:
+        """Sends the held notifications in order until one fails again."""
+        logger = logging.getLogger(__name__)
+
+        logger.info("Sending %s held notification(s)", len(self._held))
+        while self._held:
+            subject, body = self._held.popleft()
+            if not self._send(subject=subject, body=body, hold=False):
+                self._held.appendleft((subject, body))
+                return
+
+    def _connect(self) -> smtplib.SMTP:
+        """
+        Opens the SMTP session or returns the open session.
+
+        The smtp setting accepts an optional port (ex: smtp.yourdomain.com:2525).
+
+        Returns:
+            smtplib.SMTP:
+            \t\\- The SMTP session.
+        """
+        email_settings = self.email_settings
+        if self._smtp is not None and self._smtp_settings == email_settings:
+            return self._smtp
+        self._disconnect()
+
+        host, _, port = email_settings.smtp.partition(":")
+        smtp = smtplib.SMTP(host, int(port) if port else (587 if email_settings.use_tls else 25), timeout=30)
+        try:
+            if email_settings.use_tls:
+                smtp.starttls()
+            if email_settings.authentication_required:
+                smtp.login(email_settings.username, email_settings.password)
+        except BaseException:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        self._smtp_settings = email_settings
+        return smtp
+
+    def _disconnect(self) -> None:
+        """Closes the SMTP session."""
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                self._smtp.close()
+            self._smtp = None
+            self._smtp_settings = None
+
+    def _deliver(self, message: EmailMessage) -> None:
+        """
+        Sends one message through the circuit breaker. The session is closed after a failure.
+
+        A dropped connection, a network error or a 4xx reply is raised as SMTPTemporaryError.
+        The other SMTP errors are permanent and raised as they are.
+
+        Args:
+            message (EmailMessage):
+            \t\\- The message.
+        """
+        with self._breaker.guard(failure_types=SMTP_TRANSIENT_ERRORS):
+            try:
+                self._connect().send_message(message)
+            except BaseException as exc:
+                self._disconnect()
+                if is_temporary_smtp_error(exc):
+                    raise SMTPTemporaryError(str(exc)) from exc
+                raise
+
+    def _send(self, subject: str, body: str, hold: bool = True) -> bool:
+        """
+        Sends one message. A failed send is retried with jittered backoff. Failures are logged.
+
+        Args:
+            subject (str):
+            \t\\- The email subject.
+            body (str):
+            \t\\- The email body.
+            hold (bool, optional):
+            \t\\- Holds the message when the SMTP server cannot be reached. Defaults to True.
+
+        Returns:
+            bool:
+            \t\\- False when the SMTP server could not be reached, so the message can be sent again.
+        """
+        logger = logging.getLogger(__name__)
+
+        message = EmailMessage()
+        message["Subject"] = subject
+        message["From"] = self.email_settings.from_email
+        message["To"] = self.email_settings.to_email
+        message.set_content(body)
+
+        start = time.perf_counter()
+        try:
+            retry_call(
+                lambda: self._deliver(message=message),
+                description="SMTP",
+                retries=SMTP_RETRIES,
+                retry_on=SMTP_TRANSIENT_ERRORS,
+            )
+        except (CircuitOpenError, *SMTP_TRANSIENT_ERRORS) as exc:
+            METRICS.inc("email_errors")
+            if hold:
+                self._hold(subject=subject, body=body)
+            logger.error(
+                "The notification (%s) could not be sent and is held until the SMTP server is back. Exception: %s",
+                subject,
+                exc,
+            )
+            return False
+        except smtplib.SMTPException as exc:
+            METRICS.inc("email_errors")
+            logger.error("The notification (%s) could not be sent. Exception: %s", subject, exc)
+            return True
+        METRICS.observe("email_duration_seconds", time.perf_counter() - start)
+        TRACER.record("email", start, subject=subject)
+        logger.debug("Sent the notification (%s)", subject)
+        return True
@@ -0,0 +1,300 @@
+"""This module is designed to parse the transmission-remote --info output in a single pass."""
+# Built-in/Generic Imports
+import time
+from functools import lru_cache
+from itertools import compress, repeat, tee
+from typing import Iterable, Iterator
+from urllib.parse import unquote, urlsplit
+
+# Local Functions
+from common.common import raise_ext_error
+
+# Local Dataclasses
+from common.common import Torrent
+
+# Local Exceptions
+from common.common import TransmissionExtError
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, parser"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+# Maps the --info line keys to the torrent fields. Keys are matched exactly, so lines
+# such as "Ratio Limit:" or "Honors Session Limits:" do not match "Ratio:".
+INFO_FIELDS: dict[str, str] = {
+    "Id": "id",
+    "Name": "name",
+    "Hash": "hash",
+    "State": "state",
+    "Location": "location",
+    "Percent Done": "progress",
+    "Ratio": "ratio",
+    "Total size": "size",
+    "Seeding Time": "seeding_time",
+    "Date added": "added_date",
+    "Magnet": "magnet",
+    "Upload Speed": "upload_rate",
+}
+
+# The NAME section header and the indented "Key: " prefixes of the mapped keys.
+INFO_PREFIXES: tuple[str, ...] = ("NAME",) + tuple(f"  {key}: " for key in INFO_FIELDS)
+
+# The fields every torrent entry must return.
+REQUIRED_FIELDS: tuple[str, ...] = ("id", "name", "ratio", "progress", "location", "state")
+
+# transmission-remote formats sizes with 1000-based units.
+SIZE_UNITS: dict[str, int] = {"B": 1, "kB": 1000, "MB": 1000**2, "GB": 1000**3, "TB": 1000**4}
+
+# transmission-remote names a downloading or seeding torrent by its peer traffic. These
+# states are converted to Downloading or Seeding by progress, so the states match the RPC client.
+ACTIVE_STATES: frozenset[str] = frozenset({"Idle", "Up & Down", "Downloading", "Seeding"})
+
+# transmission-remote writes the month names in English whatever the locale.
+MONTHS: dict[str, int] = {
+    month: number
+    for number, month in enumerate(("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1)
+}
+
+
+def _to_bytes(value: str) -> int:
+    """
+    Converts a transmission-remote size to bytes.
+
+    Args:
+        value (str):
+        \t\\- The size (ex: 3.54 GB (3.54 GB wanted) or 12.5 kB/s).
+
+    Returns:
+        int:
+        \t\\- The size in bytes. 0 when the size is not readable.
+    """
+    # Speeds use the size units per second.
+    parts = value.replace("/s", "", 1).split()
+    try:
+        return int(float(parts[0]) * SIZE_UNITS[parts[1]])
+    except (IndexError, KeyError, ValueError):
+        return 0
+
+
+def _to_seconds(value: str) -> int:
+    """
+    Converts a transmission-remote duration to seconds.
+
+    Args:
+        value (str):
+        \t\\- The duration (ex: 20 hours (72465 seconds)).
+
+    Returns:
+        int:
+        \t\\- The duration in seconds. 0 when the duration is not readable.
+    """
+    _, _, seconds = value.rpartition("(")
+    try:
+        return int(seconds.split()[0])
+    except (IndexError, ValueError):
+        return 0
+
+
+def _to_timestamp(value: str) -> float:
+    """
+    Converts a transmission-remote local date to seconds since the epoch.
+
+    Args:
+        value (str):
+        \t\\- The date (ex: Tue Jan 11 14:45:59 2022).
+
+    Returns:
+        float:
+        \t\\- The timestamp. 0 when the date is not readable.
+    """
+    # The date has a fixed format, so it is split instead of going through strptime for every torrent.
+    try:
+        _, month, day, clock, year = value.split()
+        hour, minute, second = clock.split(":")
+        return time.mktime((int(year), MONTHS[month], int(day), int(hour), int(minute), int(second), 0, 0, -1))
+    except (KeyError, OverflowError, ValueError):
+        return 0.0
+
+
+@lru_cache(maxsize=1024)
+def _to_tracker_hosts(parameters: str) -> tuple[str, ...]:
+    """
+    Gets the tracker host names from the magnet link parameters.
+
+    Args:
+        parameters (str):
+        \t\\- The magnet link parameters from the first tracker on (ex: tr=udp%3A%2F%2Ftracker.example.com%3A1337&tr=...).
+
+    Returns:
+        tuple[str, ...]:
+        \t\\- The tracker host names.
+    """
+    return tuple(
+        urlsplit(unquote(parameter[3:])).hostname or "" for parameter in parameters.split("&") if parameter.startswith("tr=")
+    )
+
+
+def _to_trackers(magnet: str) -> tuple[str, ...]:
+    """
+    Gets the tracker host names from the magnet link.
+
+    Args:
+        magnet (str):
+        \t\\- The magnet link.
+
+    Returns:
+        tuple[str, ...]:
+        \t\\- The tracker host names.
+    """
+    # The trackers follow the hash and name. Most torrents share a few tracker lists, so
+    # each distinct list is decoded once.
+    _, separator, trackers = magnet.partition("&tr=")
+    return _to_tracker_hosts(f"tr={trackers}") if separator else ()
+
+
+def _to_torrent(fields: dict[str, str]) -> Torrent:
+    """
+    Converts the parsed --info fields to a torrent dataclass.
+
+    Args:
+        fields (dict[str, str]):
+        \t\\- The parsed field values of one torrent.
+
+    Raises:
+        TransmissionExtError:
+        \t\\- The torrent '{field}' did not return '1' entry.
+        TransmissionExtError:
+        \t\\- The torrent 'ratio' line did return a float value.
+
+    Returns:
+        Torrent:
+        \t\\- The torrent details.
+    """
+    for field in REQUIRED_FIELDS:
+        if field not in fields:
+            exc_args = {
+                "main_message": f"The torrent '{field}' did not return '1' entry.",
+                "custom_type": TransmissionExtError,
+                "expected_result": 1,
+                "returned_result": 0,
+            }
+            raise_ext_error(exc_args=exc_args)
+
+    # Ratio Examples: 1.3, None, Inf
+    possible_float: str = fields["ratio"]
+    ratio: float
+    if possible_float == "None":
+        ratio = 0.0
+    elif possible_float == "Inf":
+        ratio = float("inf")
+    else:
+        try:
+            ratio = float(possible_float)
+        except ValueError:
+            exc_args = {
+                "main_message": "The torrent 'ratio' line did return a float value.",
+                "custom_type": TransmissionExtError,
+                "expected_result": "A float value within the string",
+                "returned_result": f"Ratio: {possible_float}",
+            }
+            raise_ext_error(exc_args=exc_args)
+
+    # Percent Done Example: 100%
+    try:
+        percent_done = float(fields["progress"].rstrip("%")) / 100
+    except ValueError:
+        percent_done = 0.0
+
+    # Example: "Idle" -> "Seeding" for a complete torrent without peers.
+    state = fields["state"]
+    if state in ACTIVE_STATES:
+        state = "Seeding" if percent_done == 1.0 else "Downloading"
+    elif state == "Will Verify":
+        state = "Verifying"
+
+    return Torrent(
+        id=int(fields["id"]),
+        hash=fields.get("hash", ""),
+        name=fields["name"],
+        ratio=ratio,
+        percent_done=percent_done,
+        location=fields["location"],
+        state=state,
+        size=_to_bytes(fields.get("size", "")),
+        seeding_time=_to_seconds(fields.get("seeding_time", "")),
+        added_date=_to_timestamp(fields.get("added_date", "")),
+        trackers=_to_trackers(fields.get("magnet", "")),
+        upload_rate=float(_to_bytes(fields.get("upload_rate", ""))),
+    )
+
+
+def parse_torrent_info(lines: Iterable[str]) -> Iterator[Torrent]:
+    """
+    Parses the transmission-remote --info output into torrent dataclasses.
+
+    Every line is read once. The output can hold one torrent or many torrents
+    (ex: --torrent all --info). Each torrent starts with the NAME section, followed
+    by the TRANSFER, HISTORY, ORIGINS and LIMITS & BANDWIDTH sections.
+
+    Args:
+        lines (Iterable[str]):
+        \t\\- The --info output lines.
+
+    Raises:
+        TransmissionExtError:
+        \t\\- The torrent '{field}' did not return '1' entry.
+        TransmissionExtError:
+        \t\\- The torrent 'ratio' line did return a float value.
+
+    Yields:
+        Torrent:
+        \t\\- The torrent details in output order.
+    """
+    fields: dict[str, str] = {}
+    # The prefix check runs in C through map/compress, so only the NAME headers and the
+    # mapped field lines reach the Python loop.
+    lines, check_lines = tee(lines)
+    for line in compress(lines, map(str.startswith, check_lines, repeat(INFO_PREFIXES))):
+        if line[0] == "N":
+            # The NAME section starts a new torrent.
+            if fields:
+                yield _to_torrent(fields)
+            fields = {}
+        else:
+            # Example: "  Percent Done: 100%" -> ("  Percent Done", ": ", "100%")
+            key, _, value = line.partition(": ")
+            fields[INFO_FIELDS[key[2:]]] = value.strip()
+    if fields:
+        yield _to_torrent(fields)
+
+
+def parse_torrent_ids(lines: Iterable[str]) -> Iterator[int]:
+    """
+    Parses the transmission-remote --list output into torrent IDs.
+
+    Args:
+        lines (Iterable[str]):
+        \t\\- The --list output lines.
+
+    Yields:
+        int:
+        \t\\- The torrent ID of each row. The header and "Sum:" rows are skipped.
+    """
+    # Example Return:
+    # - ['    ID   Done       Have  ETA           Up    Down  Ratio  Status       Name',
+    #    '   149   100%    3.54 GB  Done         0.0     0.0    0.1  Idle         Sample.Torrent.Name',
+    #    '   150*  100%   41.20 GB  Done         0.0     0.0    2.5  Finished     Another.Torrent.Name',
+    #    'Sum:             44.74 GB               0.0     0.0']
+    for line in lines:
+        columns = line.split(None, 1)
+        if columns:
+            # Torrents with an error are flagged with an asterisk after the ID.
+            torrent_id = columns[0].rstrip("*")
+            if torrent_id.isdigit():
+                yield int(torrent_id)
@@ -0,0 +1,489 @@
+"""This module is designed to compile the removal policy rules and evaluate them over a column-oriented torrent table."""
+# Built-in/Generic Imports
+import time
+import operator
+from array import array
+from functools import reduce
+from itertools import compress
+from typing import Callable, Iterable, Union
+
+# Local Functions
+from common.common import get_ext_error
+
+# Local Dataclasses
+from common.common import Torrent
+
+# Local Exceptions
+from common.common import TransmissionExtError
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, policy"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+# The rule keys that combine other rules.
+GROUP_KEYS: tuple[str, ...] = ("any", "all", "not")
+# The numeric rule keys with the torrent column and the scale from the setting unit.
+NUMERIC_RULES: dict[str, tuple[str, float]] = {
+    "ratio": ("ratio", 1),
+    "seeding_days": ("seeding_time", 86400),
+    "size_gb": ("size", 1000**3),
+}
+# The rule keys matched against the torrent text columns.
+TEXT_RULES: tuple[str, ...] = ("location", "tracker", "state")
+# Age is measured from the added date at the time of the evaluation.
+AGE_RULE: str = "age_days"
+RULE_KEYS: tuple[str, ...] = GROUP_KEYS + tuple(NUMERIC_RULES) + TEXT_RULES + (AGE_RULE,)
+
+
+class TorrentColumns(object):
+    """
+    Column-oriented copy of a torrent list.
+
+    Each torrent field is held in one sequence, so a rule reads only the column it
+    needs. The numeric columns are compact arrays.
+
+    Args:
+        torrents (Iterable[Torrent]):
+        \t\\- The torrents.
+    """
+
+    __slots__ = ("torrents", "ratio", "seeding_time", "added_date", "size", "location", "state", "trackers")
+
+    def __init__(self, torrents: Iterable[Torrent]) -> None:
+        self.torrents: list[Torrent] = list(torrents)
+        self.ratio = array("d", [torrent.ratio for torrent in self.torrents])
+        self.seeding_time = array("d", [torrent.seeding_time for torrent in self.torrents])
+        self.added_date = array("d", [torrent.added_date for torrent in self.torrents])
+        self.size = array("d", [torrent.size for torrent in self.torrents])
+        self.location: list[str] = [torrent.location for torrent in self.torrents]
+        self.state: list[str] = [torrent.state for torrent in self.torrents]
+        self.trackers: list[tuple[str, ...]] = [torrent.trackers for torrent in self.torrents]
+
+    def __len__(self) -> int:
+        return len(self.torrents)
+
+
+# A compiled rule. It gets the table and the evaluation time and returns one match flag per torrent.
+Predicate = Callable[[TorrentColumns, float], list]
+
+
+def _policy_error(main_message: str, returned_result: object) -> TransmissionExtError:
+    """
+    Builds the error raised for an invalid policy setting.
+
+    Args:
+        main_message (str):
+        \t\\- The error message.
+        returned_result (object):
+        \t\\- The invalid setting.
+
+    Returns:
+        TransmissionExtError:
+        \t\\- The error.
+    """
+    exc_args = {
+        "main_message": main_message,
+        "custom_type": TransmissionExtError,
+        "expected_result": f"A mapping with any of the rule keys ({', '.join(RULE_KEYS)})",
+        "returned_result": returned_result,
+        "suggested_resolution": "Please verify the removal policy in the YAML file and try again.",
+    }
+    return get_ext_error(exc_args=exc_args)
+
+
+def _get_bounds(key: str, value: object) -> tuple[Union[float, None], Union[float, None]]:
+    """
+    Reads the bounds of a numeric rule. A number is the minimum.
+
+    Args:
+        key (str):
+        \t\\- The rule key.
+        value (object):
+        \t\\- The rule setting (ex: 2.0 or {min: 1, max: 5}).
+
+    Raises:
+        TransmissionExtError:
+        \t\\- The removal policy rule '{key}' needs a number or a min/max mapping.
+
+    Returns:
+        tuple[Union[float, None], Union[float, None]]:
+        \t\\- The inclusive minimum and the exclusive maximum. None when not set.
+    """
+    if isinstance(value, dict) and value and set(value) <= {"min", "max"}:
+        bounds = (value.get("min"), value.get("max"))
+    else:
+        bounds = (value, None)
+    # An empty rule (ex: ratio: with no value) or a mapping of empty bounds has nothing to compare.
+    if bounds == (None, None):
+        raise _policy_error(f"The removal policy rule '{key}' needs a number or a min/max mapping.", {key: value})
+    for bound in bounds:
+        if bound is not None and (isinstance(bound, bool) or not isinstance(bound, (int, float))):
+            raise _policy_error(f"The removal policy rule '{key}' needs a number or a min/max mapping.", {key: value})
+    return bounds  # type: ignore
+
+
+def _get_names(key: str, value: object) -> tuple[str, ...]:
+    """
+    Reads the names of a text rule. A single name is allowed.
+
+    Args:
+        key (str):
+        \t\\- The rule key.
+        value (object):
+        \t\\- The rule setting (ex: Finished or [Finished, Stopped]).
+
+    Raises:
+        TransmissionExtError:
+        \t\\- The removal policy rule '{key}' needs a name or a list of names.
+
+    Returns:
+        tuple[str, ...]:
+        \t\\- The names.
+    """
+    names = [value] if isinstance(value, str) else value
+    if not isinstance(names, list) or not names or not all(isinstance(name, str) and name for name in names):
+        raise _policy_error(f"The removal policy rule '{key}' needs a name or a list of names.", {key: value})
+    return tuple(names)
+
+
+def _numeric_predicate(column: str, minimum: Union[float, None], maximum: Union[float, None]) -> Predicate:
+    """
+    Compiles a range check on a numeric column.
+
+    Args:
+        column (str):
+        \t\\- The column name.
+        minimum (float, optional):
+        \t\\- The inclusive minimum.
+        maximum (float, optional):
+        \t\\- The exclusive maximum.
+
+    Returns:
+        Predicate:
+        \t\\- The compiled rule.
+    """
+    if minimum is not None and maximum is not None:
+        return lambda table, now: [minimum <= value < maximum for value in getattr(table, column)]
+    if maximum is not None:
+        return lambda table, now: [value < maximum for value in getattr(table, column)]
+    return lambda table, now: [value >= minimum for value in getattr(table, column)]
+
+
+def _age_predicate(minimum: Union[float, None], maximum: Union[float, None]) -> Predicate:
+    """
+    Compiles a range check on the torrent age in days. Torrents without an added date never match.
+
+    Args:
+        minimum (float, optional):
+        \t\\- The inclusive minimum age in days.
+        maximum (float, optional):
+        \t\\- The exclusive maximum age in days.
+
+    Returns:
+        Predicate:
+        \t\\- The compiled rule.
+    """
+
+    def predicate(table: TorrentColumns, now: float) -> list:
+        # The age range is turned into an added date range, so each torrent is one comparison.
+        newest = now - minimum * 86400 if minimum is not None else now
+        oldest = now - maximum * 86400 if maximum is not None else 0.0
+        return [oldest < added_date <= newest for added_date in table.added_date]
+
+    return predicate
+
+
+def _location_predicate(locations: tuple[str, ...]) -> Predicate:
+    """
+    Compiles a download location check. A location matches itself and its subfolders.
+
+    Args:
+        locations (tuple[str, ...]):
+        \t\\- The download locations (ex: /downloads/complete/sonarr).
+
+    Returns:
+        Predicate:
+        \t\\- The compiled rule.
+    """
+    prefixes = tuple(location.rstrip("/") + "/" for location in locations)
+    return lambda table, now: [(location + "/").startswith(prefixes) for location in table.location]
+
+
+def _tracker_predicate(domains: tuple[str, ...]) -> Predicate:
+    """
+    Compiles a tracker check. A domain matches itself and its subdomains.
+
+    Args:
+        domains (tuple[str, ...]):
+        \t\\- The tracker domains (ex: tracker.example.com or example.com).
+
+    Returns:
+        Predicate:
+        \t\\- The compiled rule.
+    """
+    domains = tuple(domain.lower() for domain in domains)
+    suffixes = tuple(f".{domain}" for domain in domains)
+
+    def predicate(table: TorrentColumns, now: float) -> list:
+        # Torrents share a few tracker lists, so each distinct list is checked once.
+        matched: dict[tuple[str, ...], bool] = {}
+        flags: list[bool] = []
+        for trackers in table.trackers:
+            flag = matched.get(trackers)
+            if flag is None:
+                flag = matched[trackers] = any(
+                    host.lower() in domains or host.lower().endswith(suffixes) for host in trackers
+                )
+            flags.append(flag)
+        return flags
+
+    return predicate
+
+
+def _state_predicate(states: tuple[str, ...]) -> Predicate:
+    """
+    Compiles a torrent state check.
+
+    Args:
+        states (tuple[str, ...]):
+        \t\\- The torrent states (ex: Finished).
+
+    Returns:
+        Predicate:
+        \t\\- The compiled rule.
+    """
+    state_set = frozenset(states)
+    return lambda table, now: [state in state_set for state in table.state]
+
+
+def _combine(predicates: list[Predicate], combine_operator: Callable[[bool, bool], bool]) -> Predicate:
+    """
+    Combines the rules column-wise.
+
+    Args:
+        predicates (list[Predicate]):
+        \t\\- The compiled rules.
+        combine_operator (Callable[[bool, bool], bool]):
+        \t\\- operator.and_ or operator.or_.
+
+    Returns:
+        Predicate:
+        \t\\- The compiled rule.
+    """
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda table, now: reduce(
+        lambda flags, predicate: list(map(combine_operator, flags, predicate(table, now))),
+        predicates[1:],
+        predicates[0](table, now),
+    )
+
+
+def _compile(rule: object) -> tuple[Predicate, str]:
+    """
+    Compiles one rule mapping. The keys of one mapping must all match.
+
+    Args:
+        rule (object):
+        \t\\- The rule mapping from the YAML file.
+
+    Raises:
+        TransmissionExtError:
+        \t\\- The removal policy rule is not a mapping of rule keys.
+        TransmissionExtError:
+        \t\\- The removal policy rule '{key}' needs a list of rules.
+
+    Returns:
+        tuple[Predicate, str]:
+        \t\\- The compiled rule and its description.
+    """
+    if not isinstance(rule, dict) or not rule or not set(rule) <= set(RULE_KEYS):
+        raise _policy_error("The removal policy rule is not a mapping of rule keys.", rule)
+
+    predicates: list[Predicate] = []
+    descriptions: list[str] = []
+    for key, value in rule.items():
+        if key in ("any", "all"):
+            if not isinstance(value, list) or not value:
+                raise _policy_error(f"The removal policy rule '{key}' needs a list of rules.", {key: value})
+            compiled = [_compile(child) for child in value]
+            predicates.append(
+                _combine([predicate for predicate, _ in compiled], operator.or_ if key == "any" else operator.and_)
+            )
+            separator = " or " if key == "any" else " and "
+            descriptions.append(f"({separator.join(description for _, description in compiled)})")
+        elif key == "not":
+            predicate, description = _compile(value)
+            predicates.append(lambda table, now, predicate=predicate: [not flag for flag in predicate(table, now)])
+            descriptions.append(f"not {description}")
+        elif key in NUMERIC_RULES or key == AGE_RULE:
+            minimum, maximum = _get_bounds(key, value)
+            if key == AGE_RULE:
+                predicates.append(_age_predicate(minimum, maximum))
+            else:
+                column, scale = NUMERIC_RULES[key]
+                predicates.append(
+                    _numeric_predicate(
+                        column,
+                        minimum * scale if minimum is not None else None,
+                        maximum * scale if maximum is not None else None,
+                    )
+                )
+            bounds = [f"{key} >= {minimum:g}"] if minimum is not None else []
+            bounds += [f"{key} < {maximum:g}"] if maximum is not None else []
+            descriptions.append(" and ".join(bounds))
+        else:
+            names = _get_names(key, value)
+            if key == "location":
+                predicates.append(_location_predicate(names))
+            elif key == "tracker":
+                predicates.append(_tracker_predicate(names))
+            else:
+                predicates.append(_state_predicate(names))
+            descriptions.append(f"{key} in ({', '.join(names)})")
+
+    description = descriptions[0] if len(descriptions) == 1 else f"({' and '.join(descriptions)})"
+    return _combine(predicates, operator.and_), description
+
+
+def _get_ratio_targets(rule: dict, negated: bool = False) -> set[float]:
+    """
+    Gets the ratios a torrent starts to match the rules at as its ratio grows.
+
+    A ratio minimum is a target. Under a not rule the ratio maximum is the target instead.
+
+    Args:
+        rule (dict):
+        \t\\- The compiled rule mapping.
+        negated (bool, optional):
+        \t\\- The rule is under an odd number of not rules. Defaults to False.
+
+    Returns:
+        set[float]:
+        \t\\- The target ratios.
+    """
+    targets: set[float] = set()
+    for key, value in rule.items():
+        if key in ("any", "all"):
+            for child in value:
+                targets |= _get_ratio_targets(child, negated)
+        elif key == "not":
+            targets |= _get_ratio_targets(value, not negated)
+        elif key == "ratio":
+            minimum, maximum = _get_bounds(key, value)
+            target = maximum if negated else minimum
+            if target is not None:
+                targets.add(float(target))
+    return targets
+
+
+class RemovalPolicy(object):
+    """
+    Compiled removal rules.
+
+    The rules are compiled once into column predicates. Each evaluation builds one
+    column-oriented table and runs every rule over whole columns.
+
+    The ratio targets are the ratios a torrent starts to match at as its ratio grows. The
+    ratio forecast predicts the next removal from them.
+
+    Args:
+        rules (dict):
+        \t\\- The policy mapping from the YAML file (ex: {"any": [{"ratio": 2.0}, {"state": "Finished"}]}).
+
+    Raises:
+        TransmissionExtError:
+        \t\\- The removal policy rule is not a mapping of rule keys.
+        TransmissionExtError:
+        \t\\- The removal policy rule '{key}' needs a list of rules.
+        TransmissionExtError:
+        \t\\- The removal policy rule '{key}' needs a number or a min/max mapping.
+        TransmissionExtError:
+        \t\\- The removal policy rule '{key}' needs a name or a list of names.
+    """
+
+    __slots__ = ("rules", "description", "ratio_targets", "_predicate")
+
+    def __init__(self, rules: dict) -> None:
+        self.rules = rules
+        self._predicate, self.description = _compile(rules)
+        self.ratio_targets: tuple[float, ...] = tuple(sorted(_get_ratio_targets(rules)))
+
+    @classmethod
+    def from_ratio(cls, removal_ratio: float) -> "RemovalPolicy":
+        """
+        Builds the default policy. Torrents that meet the ratio or finished seeding are removed.
+
+        Args:
+            removal_ratio (float):
+            \t\\- The removal ratio.
+
+        Returns:
+            RemovalPolicy:
+            \t\\- The policy.
+        """
+        return cls({"any": [{"ratio": removal_ratio}, {"state": "Finished"}]})
+
+    def __repr__(self) -> str:
+        return f"RemovalPolicy({self.description})"
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, RemovalPolicy) and other.rules == self.rules
+
+    def evaluate(self, torrents: Union[Iterable[Torrent], TorrentColumns], now: Union[float, None] = None) -> list:
+        """
+        Checks every torrent against the rules.
+
+        Args:
+            torrents (Union[Iterable[Torrent], TorrentColumns]):
+            \t\\- The torrents or their column-oriented table.
+            now (float, optional):
+            \t\\- The evaluation time in seconds since the epoch. Defaults to the current time.
+
+        Returns:
+            list:
+            \t\\- One match flag per torrent in table order.
+        """
+        table = torrents if isinstance(torrents, TorrentColumns) else TorrentColumns(torrents)
+        if not len(table):
+            return []
+        return self._predicate(table, time.time() if now is None else now)
+
+    def select(self, torrents: Union[Iterable[Torrent], TorrentColumns], now: Union[float, None] = None) -> list[Torrent]:
+        """
+        Gets the torrents that match the rules.
+
+        Args:
+            torrents (Union[Iterable[Torrent], TorrentColumns]):
+            \t\\- The torrents or their column-oriented table.
+            now (float, optional):
+            \t\\- The evaluation time in seconds since the epoch. Defaults to the current time.
+
+        Returns:
+            list[Torrent]:
+            \t\\- The matching torrents in table order.
+        """
+        table = torrents if isinstance(torrents, TorrentColumns) else TorrentColumns(torrents)
+        return list(compress(table.torrents, self.evaluate(table, now=now)))
+
+    def matches(self, torrent: Torrent, now: Union[float, None] = None) -> bool:
+        """
+        Checks one torrent against the rules.
+
+        Args:
+            torrent (Torrent):
+            \t\\- The torrent.
+            now (float, optional):
+            \t\\- The evaluation time in seconds since the epoch. Defaults to the current time.
+
+        Returns:
+            bool:
+            \t\\- True when the torrent matches.
+        """
+        return bool(self.evaluate([torrent], now=now)[0])
@@ -0,0 +1,517 @@
+"""This module is designed to communicate with Transmission through transmission-remote."""
+# Built-in/Generic Imports
+import time
+import asyncio
+import subprocess
+from contextlib import nullcontext
+from typing import AsyncIterator, Iterator, Union
+
+# Local Functions
+from common.common import raise_ext_error
+from common.metrics import METRICS
+from common.limiter import CallLimiter
+from common.resilience import CircuitBreaker, retry_call, retry_call_async
+from common.tracing import TRACER
+from common.parser import parse_torrent_ids, parse_torrent_info
+
+# Local Dataclasses
+from common.common import Torrent
+
+# Local Exceptions
+from common.common import TransmissionConnectionError, TransmissionExtError
+
+# Libraries
+# ictoolkit is imported where it is used and fexception on the first error, so the RPC client path does not load them.
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, remote"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+class TransmissionRemote(object):
+    """
+    transmission-remote client.
+
+    This client is the fallback when the Transmission RPC endpoint is not used. A call that
+    exits with an error status raises instead of returning partial output. The calls that
+    return the whole output are retried with jittered backoff.
+
+    Args:
+        server (str):
+        \t\\- The YAML server string (ex: "x.x.x.x:9091 --auth username:password").
+        limiter (CallLimiter, optional):
+        \t\\- The limiter that every transmission-remote call waits for. Defaults to None.
+        breaker (CircuitBreaker, optional):
+        \t\\- The circuit breaker of the Transmission daemon. Defaults to None.
+        retries (int, optional):
+        \t\\- The most retries of a failed call. Defaults to 0.
+    """
+
+    def __init__(
+        self,
+        server: str,
+        limiter: Union[CallLimiter, None] = None,
+        breaker: Union[CircuitBreaker, None] = None,
+        retries: int = 0,
+    ) -> None:
+        self.server = server
+        self.limiter = limiter
+        self.breaker = breaker
+        self.retries = retries
+
+    def close(self) -> None:
+        """transmission-remote does not keep a connection open."""
+        pass
+
+    @staticmethod
+    def _method(arguments: list[str]) -> str:
+        # The last option names the call. A location after --find is not a call name.
+        return next(argument for argument in reversed(arguments) if argument.startswith("--"))
+
+    @staticmethod
+    def _torrent_selections(ids: list[Union[int, str]]) -> list[str]:
+        """
+        Gets the --torrent values that select the torrents.
+
+        transmission-remote only splits a comma-separated list of numeric IDs. Any other value
+        is taken as one hash, so a hash list would match no torrent. The numeric IDs share one
+        value and each hash gets its own value.
+
+        Args:
+            ids (list[Union[int, str]]):
+            \t\\- The torrent IDs or hashes.
+
+        Returns:
+            list[str]:
+            \t\\- The --torrent values. Each value is one call.
+        """
+        numeric_ids = [str(torrent_id) for torrent_id in ids if isinstance(torrent_id, int)]
+        hashes = [torrent_id for torrent_id in ids if not isinstance(torrent_id, int)]
+        return ([",".join(numeric_ids)] if numeric_ids else []) + hashes
+
+    @classmethod
+    def _call_kind(cls, arguments: list[str]) -> str:
+        # The calls for every torrent are slower than the calls for a few torrents, so the latency is judged separately.
+        return f"{cls._method(arguments)}:{'all' if 'all' in arguments else 'ids'}"
+
+    @classmethod
+    def _raise_exit_status(cls, arguments: list[str], returncode: int) -> None:
+        """Raises for a call that exited with an error status, so a daemon failure is not taken as empty output."""
+        METRICS.inc("client_call_errors", client="transmission-remote", method=cls._method(arguments))
+        exc_args = {
+            "main_message": "transmission-remote did not complete the call.",
+            "custom_type": TransmissionConnectionError,
+            "expected_result": "Exit status 0",
+            "returned_result": f"{cls._method(arguments)}: exit status {returncode}",
+            "suggested_resolution": "Verify the Transmission daemon is running and reachable with the connection server setting.",
+        }
+        raise_ext_error(exc_args=exc_args)
+
+    def _stream(self, arguments: list[str], slot: bool = True) -> Iterator[str]:
+        """
+        Runs transmission-remote with the server arguments and yields the output lines as they arrive.
+
+        The output is never held in full, so the caller can start on the first lines while
+        transmission-remote is still writing. The process is stopped when the caller stops
+        reading early.
+
+        Args:
+            arguments (list[str]):
+            \t\\- The transmission-remote arguments after the server string.
+            slot (bool, optional):
+            \t\\- Holds a call limiter slot for the call. Only a call limiter token is taken when False. Defaults to True.
+
+        Raises:
+            TransmissionExtError:
+            \t\\- Transmission Remove was not able to detect an installed version of transmission-remote.
+            TransmissionConnectionError:
+            \t\\- transmission-remote did not complete the call.
+            CircuitOpenError:
+            \t\\- The transmission circuit is open after repeated failures.
+
+        Yields:
+            str:
+            \t\\- The command output lines without the line breaks.
+        """
+        from ictoolkit import str_to_list
+
+        # Separate commands must be in a list with each spaced entry on a separate line.
+        program_arguments = str_to_list(value=f"transmission-remote {self.server}", sep=" ") + arguments
+        call_limit = self.limiter.acquire(kind=self._call_kind(arguments), slot=slot) if self.limiter else nullcontext()
+        with call_limit, self.breaker.guard() if self.breaker else nullcontext():
+            start = time.perf_counter()
+            try:
+                process = subprocess.Popen(
+                    program_arguments,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    encoding="utf-8",
+                    errors="replace",
+                )
+            except FileNotFoundError:
+                METRICS.inc("client_call_errors", client="transmission-remote", method=self._method(arguments))
+
+                # A missing program is a setup error and not a daemon failure, so it is not retried or counted by the circuit breaker.
+                exc_args = {
+                    "main_message": "Transmission Remove was not able to detect an installed version of transmission-remote.",
+                    "custom_type": TransmissionExtError,
+                    "expected_result": "Response when running: transmission-remote",
+                    "returned_result": "The system cannot find the file specified",
+                    "suggested_resolution": [
+                        "Verify you have installed transmission-cli",
+                        "Run 'transmission-remote' from the command line and check for usage output.",
+                    ],
+                }
+                raise_ext_error(exc_args=exc_args)
+            finished = False
+            try:
+                for line in process.stdout:  # type: ignore
+                    yield line.rstrip("\r\n")
+                finished = True
+            finally:
+                if not finished and process.poll() is None:
+                    # The caller stopped reading before the end of the output.
+                    process.kill()
+                process.stdout.close()  # type: ignore
+                process.wait()
+                METRICS.observe(
+                    "client_call_duration_seconds",
+                    time.perf_counter() - start,
+                    client="transmission-remote",
+                    method=self._method(arguments),
+                )
+                TRACER.record("transmission-remote", start, method=self._method(arguments))
+            if process.returncode:
+                self._raise_exit_status(arguments=arguments, returncode=process.returncode)
+
+    def _run(self, arguments: list[str]) -> list[str]:
+        """
+        Runs transmission-remote with the server arguments.
+
+        Args:
+            arguments (list[str]):
+            \t\\- The transmission-remote arguments after the server string.
+
+        Raises:
+            TransmissionExtError:
+            \t\\- Transmission Remove was not able to detect an installed version of transmission-remote.
+            TransmissionConnectionError:
+            \t\\- transmission-remote did not complete the call.
+            CircuitOpenError:
+            \t\\- The transmission circuit is open after repeated failures.
+
+        Returns:
+            list[str]:
+            \t\\- The command output lines.
+        """
+        return retry_call(
+            lambda: list(self._stream(arguments)),
+            description=f"transmission-remote {self._method(arguments)}",
+            retries=self.retries,
+        )
+
+    def iter_torrents(self, ids: Union[list[Union[int, str]], None] = None) -> Iterator[Torrent]:
+        """
+        Yields the torrent details of one --info call for the IDs and one call for each hash as the output arrives.
+
+        Only the lines of the torrent being parsed are held, so the memory use does not grow
+        with the library size.
+
+        Args:
+            ids (list[Union[int, str]], optional):
+            \t\\- Limits the results to these torrent IDs or hashes. All torrents return when not set. Defaults to None.
+
+        Raises:
+            TransmissionExtError:
+            \t\\- Transmission Remove was not able to detect an installed version of transmission-remote.
+            TransmissionExtError:
+            \t\\- The torrent '{field}' did not return '1' entry.
+            TransmissionExtError:
+            \t\\- The torrent 'ratio' line did return a float value.
+
+        Yields:
+            Torrent:
+            \t\\- The torrent details in output order.
+        """
+        # Required Command: transmission-remote {server} --torrent all --info
+        # Specific torrents use a comma-separated ID list (ex: --torrent 149,150 --info) or one call per hash.
+        torrent_selections = ["all"] if ids is None else self._torrent_selections(ids)
+        for torrent_selection in torrent_selections:
+            yield from parse_torrent_info(lines=self._stream(["--torrent", torrent_selection, "--info"]))
+
+    def iter_torrent_ids(self) -> Iterator[int]:
+        """
+        Yields every torrent ID of one --list call as the output arrives.
+
+        Yields:
+            int:
+            \t\\- The torrent IDs.
+        """
+        yield from parse_torrent_ids(lines=self._stream(["--list"]))
+
+    def get_torrents(self, ids: Union[list[Union[int, str]], None] = None) -> list[Torrent]:
+        """
+        Gets the torrent details with one --info call for the IDs and one call for each hash.
+
+        Args:
+            ids (list[Union[int, str]], optional):
+            \t\\- Limits the results to these torrent IDs or hashes. All torrents return when not set. Defaults to None.
+
+        Raises:
+            TransmissionExtError:
+            \t\\- Transmission Remove was not able to detect an installed version of transmission-remote.
+            TransmissionExtError:
+            \t\\- The torrent '{field}' did not return '1' entry.
+            TransmissionExtError:
+            \t\\- The torrent 'ratio' line did return a float value.
+
+        Returns:
+            list[Torrent]:
+            \t\\- The torrent details.
+        """
+        # Example Return (one entry per torrent):
+        # - ['NAME', '  Id: 149',
+        #    '  Name: Sample.Torrent.Name',
+        #    '  Hash: fc298a353253232532541e3ba5adbec712f',
+        #    '  Magnet: magnet:?xt=urn:btih:135315sadfa3153151rfasdfasdfadsf2f&dn=Sample.Torrent.Name&tr=https%3A%2F%2Ftracker.13351632.com%2Fannounce.php%3Fpasskey%1532523513243113',
+        #    '',
+        #    'TRANSFER',
+        #    '  State: Idle',
+        #    '  Location: /downloads/complete/sonarr',
+        #    '  Percent Done: 100%',
+        #    '  ETA: 0 seconds (0 seconds)',
+        #    '  Download Speed: 0 kB/s',
+        #    '  Upload Speed: 0 kB/s',
+        #    '  Have: 3.54 GB (3.54 GB verified)',
+        #    '  Availability: 100%',
+        #    '  Total size: 3.54 GB (3.54 GB wanted)',
+        #    '  Downloaded: 3.54 GB',
+        #    '  Uploaded: 497.8 MB',
+        #    '  Ratio: 0.1',
+        #    '  Corrupt DL: None',
+        #    '  Peers: connected to 0, uploading to 0, downloading from 0',
+        #    '',
+        #    'HISTORY',
+        #    '  Date added:       Tue Jan 11 14:45:59 2022',
+        #    '  Date finished:    Tue Jan 11 15:16:41 2022',
+        #    '  Date started:     Sun Jul  3 12:15:27 2022',
+        #    '  Latest activity:  Wed Jan 12 07:30:57 2022',
+        #    '  Downloading Time: 34 minutes (2091 seconds)',
+        #    '  Seeding Time:     20 hours (72465 seconds)',
+        #    '', 'ORIGINS',
+        #    '  Public torrent: No',
+        #    '  Creator: mktorrent 1.0',
+        #    '  Piece Count: 1688',
+        #    '  Piece Size: 2.00 MiB',
+        #    '', 'LIMITS & BANDWIDTH',
+        #    '  Download Limit: Unlimited',
+        #    '  Upload Limit: Unlimited',
+        #    '  Ratio Limit: Default',
+        #    '  Honors Session Limits: Yes',
+        #    '  Peer limit: 50',
+        #    '  Bandwidth Priority: Normal',
+        #    '']
+
+        # Calls function to parse every torrent in one pass. A failed call is retried from the start.
+        return retry_call(
+            lambda: list(self.iter_torrents(ids=ids)), description="transmission-remote --info", retries=self.retries
+        )
+
+    async def _stream_async(self, arguments: list[str], slot: bool = True) -> AsyncIterator[str]:
+        """
+        Runs transmission-remote with the server arguments and yields the output lines as they arrive without blocking the event loop.
+
+        Args:
+            arguments (list[str]):
+            \t\\- The transmission-remote arguments after the server string.
+            slot (bool, optional):
+            \t\\- Holds a call limiter slot for the call. Only a call limiter token is taken when False. Defaults to True.
+
+        Raises:
+            TransmissionExtError:
+            \t\\- Transmission Remove was not able to detect an installed version of transmission-remote.
+            TransmissionConnectionError:
+            \t\\- transmission-remote did not complete the call.
+            CircuitOpenError:
+            \t\\- The transmission circuit is open after repeated failures.
+
+        Yields:
+            str:
+            \t\\- The command output lines without the line breaks.
+        """
+        from ictoolkit import str_to_list
+
+        program_arguments = str_to_list(value=f"transmission-remote {self.server}", sep=" ") + arguments
+        call_limit = (
+            self.limiter.acquire_async(kind=self._call_kind(arguments), slot=slot) if self.limiter else nullcontext()
+        )
+        async with call_limit:
+            with self.breaker.guard() if self.breaker else nullcontext():
+                start = time.perf_counter()
+                try:
+                    # The line limit leaves room for magnet links with many trackers.
+                    process = await asyncio.create_subprocess_exec(
+                        *program_arguments,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.DEVNULL,
+                        limit=2**20,
+                    )
+                except FileNotFoundError:
+                    METRICS.inc("client_call_errors", client="transmission-remote", method=self._method(arguments))
+
+                    exc_args = {
+                        "main_message": "Transmission Remove was not able to detect an installed version of transmission-remote.",
+                        "custom_type": TransmissionExtError,
+                        "expected_result": "Response when running: transmission-remote",
+                        "returned_result": "The system cannot find the file specified",
+                        "suggested_resolution": [
+                            "Verify you have installed transmission-cli",
+                            "Run 'transmission-remote' from the command line and check for usage output.",
+                        ],
+                    }
+                    raise_ext_error(exc_args=exc_args)
+                finished = False
+                try:
+                    async for line in process.stdout:  # type: ignore
+                        yield line.decode("utf-8", errors="replace").rstrip("\r\n")
+                    finished = True
+                finally:
+                    # The exit is only reported by the child watcher. Killing an exited process would reap it
+                    # before the watcher, and the watcher would report exit status 255.
+                    if not finished and process.returncode is None:
+                        try:
+                            # The caller stopped reading before the end of the output.
+                            process.kill()
+                        except ProcessLookupError:
+                            pass
+                    await process.wait()
+                    METRICS.observe(
+                        "client_call_duration_seconds",
+                        time.perf_counter() - start,
+                        client="transmission-remote",
+                        method=self._method(arguments),
+                    )
+                    TRACER.record("transmission-remote", start, method=self._method(arguments))
+                if process.returncode:
+                    self._raise_exit_status(arguments=arguments, returncode=process.returncode)
+
+    async def _run_async(self, arguments: list[str]) -> list[str]:
+        """
+        Runs transmission-remote with the server arguments without blocking the event loop.
+
+        Args:
+            arguments (list[str]):
+            \t\\- The transmission-remote arguments after the server string.
+
+        Raises:
+            TransmissionExtError:
+            \t\\- Transmission Remove was not able to detect an installed version of transmission-remote.
+            TransmissionConnectionError:
+            \t\\- transmission-remote did not complete the call.
+            CircuitOpenError:
+            \t\\- The transmission circuit is open after repeated failures.
+
+        Returns:
+            list[str]:
+            \t\\- The command output lines.
+        """
+
+        async def run() -> list[str]:
+            return [line async for line in self._stream_async(arguments)]
+
+        return await retry_call_async(
+            run, description=f"transmission-remote {self._method(arguments)}", retries=self.retries
+        )
+
+    async def iter_torrent_ids_async(self) -> AsyncIterator[int]:
+        """
+        Yields every torrent ID of one --list call as the output arrives.
+
+        Yields:
+            int:
+            \t\\- The torrent IDs.
+        """
+        # The --list call only takes a token. The inspect calls that its output feeds need the slots.
+        async for line in self._stream_async(["--list"], slot=False):
+            for torrent_id in parse_torrent_ids(lines=(line,)):
+                yield torrent_id
+
+    async def get_torrent_ids_async(self) -> list[int]:
+        """
+        Gets every torrent ID with one --list call.
+
+        Returns:
+            list[int]:
+            \t\\- The torrent IDs.
+        """
+        return [torrent_id async for torrent_id in self.iter_torrent_ids_async()]
+
+    async def get_torrents_async(self, ids: list[int]) -> list[Torrent]:
+        """
+        Gets the torrent details with one --info call without blocking the event loop.
+
+        Args:
+            ids (list[int]):
+            \t\\- The torrent IDs.
+
+        Returns:
+            list[Torrent]:
+            \t\\- The torrent details.
+        """
+        torrents: list[Torrent] = []
+        for torrent_selection in self._torrent_selections(ids):
+            torrent_info = await self._run_async(["--torrent", torrent_selection, "--info"])
+            torrents.extend(parse_torrent_info(lines=torrent_info))
+        return torrents
+
+    def remove_torrents(self, ids: list[Union[int, str]], delete_local_data: bool = False) -> bool:
+        """
+        Removes torrents from Transmission with one --remove call for the IDs and one call for each hash.
+
+        Args:
+            ids (list[Union[int, str]]):
+            \t\\- The torrent IDs or hashes.
+            delete_local_data (bool, optional):
+            \t\\- Transmission deletes the downloaded data. Defaults to False.
+
+        Returns:
+            bool:
+            \t\\- True when Transmission returned a successful response to every call.
+        """
+        remove_argument = "--remove-and-delete" if delete_local_data else "--remove"
+        # Successful Removal Response: ['x.x.x.x:9091/transmission/rpc/ responded: "success"']
+        successful = True
+        for torrent_selection in self._torrent_selections(ids):
+            torrent_remove_info: list[str] = self._run(["--torrent", torrent_selection, remove_argument])
+            successful = "success" in str(torrent_remove_info) and successful
+        return successful
+
+    def set_location(self, ids: list[Union[int, str]], location: str, move: bool = False) -> bool:
+        """
+        Sets the download directory of torrents with one --find or --move call for the IDs and one call for each hash.
+
+        Args:
+            ids (list[Union[int, str]]):
+            \t\\- The torrent IDs or hashes.
+            location (str):
+            \t\\- The new download directory.
+            move (bool, optional):
+            \t\\- Transmission moves the data. The data must already be at the location when False. Defaults to False.
+
+        Returns:
+            bool:
+            \t\\- True when Transmission returned a successful response to every call.
+        """
+        # --find points the torrents at data that is already in the location.
+        successful = True
+        for torrent_selection in self._torrent_selections(ids):
+            torrent_location_info: list[str] = self._run(
+                ["--torrent", torrent_selection, "--move" if move else "--find", location]
+            )
+            successful = "success" in str(torrent_location_info) and successful
+        return successful
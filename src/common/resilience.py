@@ -0,0 +1,314 @@
+"""This module is designed to retry transient failures with jittered backoff and stop calling a failing service with a circuit breaker."""
+# Built-in/Generic Imports
+import time
+import random
+import asyncio
+import logging
+import threading
+import http.client
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Iterator, TypeVar, Union
+
+# Local Functions
+from common.common import raise_ext_error
+from common.metrics import METRICS
+
+# Local Exceptions
+from common.common import CircuitOpenError, TransmissionConnectionError
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, resilience"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+# The first retry delay ceiling in seconds. The ceiling doubles after each retry up to RETRY_MAX_DELAY.
+RETRY_BASE_DELAY: float = 0.5
+RETRY_MAX_DELAY: float = 10.0
+
+# The Transmission daemon failures that are retried and counted by the circuit breaker.
+TRANSIENT_ERRORS: tuple[type[Exception], ...] = (OSError, http.client.HTTPException, TransmissionConnectionError)
+
+# The circuit breaker states as the circuit_state metric values.
+CIRCUIT_STATES: dict[str, int] = {"closed": 0, "half-open": 1, "open": 2}
+
+ReturnType = TypeVar("ReturnType")
+
+
+def jittered_delays(base_delay: float = RETRY_BASE_DELAY, max_delay: float = RETRY_MAX_DELAY) -> Iterator[float]:
+    """
+    Yields exponential backoff delays with jitter.
+
+    Each delay is between half and all of the current ceiling, so the clients that failed
+    together do not retry together.
+
+    Args:
+        base_delay (float, optional):
+        \t\\- The first delay ceiling in seconds. Defaults to RETRY_BASE_DELAY.
+        max_delay (float, optional):
+        \t\\- The largest delay ceiling in seconds. Defaults to RETRY_MAX_DELAY.
+
+    Yields:
+        float:
+        \t\\- The next delay in seconds.
+    """
+    ceiling = base_delay
+    while True:
+        yield ceiling / 2 + random.uniform(0, ceiling / 2)
+        ceiling = min(ceiling * 2, max_delay)
+
+
+def retry_call(
+    call: Callable[[], ReturnType],
+    description: str,
+    retries: int,
+    retry_on: tuple[type[Exception], ...] = TRANSIENT_ERRORS,
+) -> ReturnType:
+    """
+    Runs a call and retries the transient failures with jittered backoff.
+
+    An open circuit is not retried.
+
+    Args:
+        call (Callable[[], ReturnType]):
+        \t\\- The call.
+        description (str):
+        \t\\- The call name used in the logs and the call_retries metric (ex: torrent-get).
+        retries (int):
+        \t\\- The most retries after the first attempt.
+        retry_on (tuple[type[Exception], ...], optional):
+        \t\\- The exceptions that are retried. Defaults to TRANSIENT_ERRORS.
+
+    Returns:
+        ReturnType:
+        \t\\- The call result.
+    """
+    logger = logging.getLogger(__name__)
+
+    delays = jittered_delays()
+    attempt = 0
+    while True:
+        try:
+            return call()
+        except CircuitOpenError:
+            raise
+        except retry_on as exc:
+            if attempt >= retries:
+                raise
+            attempt += 1
+            delay = next(delays)
+            METRICS.inc("call_retries", operation=description)
+            logger.warning(
+                "The %s call failed. Retrying in %.1f seconds (retry %s of %s). Exception: %s",
+                description,
+                delay,
+                attempt,
+                retries,
+                exc,
+            )
+            time.sleep(delay)
+
+
+async def retry_call_async(
+    call: Callable[[], Awaitable[ReturnType]],
+    description: str,
+    retries: int,
+    retry_on: tuple[type[Exception], ...] = TRANSIENT_ERRORS,
+) -> ReturnType:
+    """
+    Runs a coroutine call and retries the transient failures with jittered backoff without blocking the event loop.
+
+    An open circuit is not retried.
+
+    Args:
+        call (Callable[[], Awaitable[ReturnType]]):
+        \t\\- Returns a new coroutine for each attempt.
+        description (str):
+        \t\\- The call name used in the logs and the call_retries metric (ex: --info).
+        retries (int):
+        \t\\- The most retries after the first attempt.
+        retry_on (tuple[type[Exception], ...], optional):
+        \t\\- The exceptions that are retried. Defaults to TRANSIENT_ERRORS.
+
+    Returns:
+        ReturnType:
+        \t\\- The call result.
+    """
+    logger = logging.getLogger(__name__)
+
+    delays = jittered_delays()
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except CircuitOpenError:
+            raise
+        except retry_on as exc:
+            if attempt >= retries:
+                raise
+            attempt += 1
+            delay = next(delays)
+            METRICS.inc("call_retries", operation=description)
+            logger.warning(
+                "The %s call failed. Retrying in %.1f seconds (retry %s of %s). Exception: %s",
+                description,
+                delay,
+                attempt,
+                retries,
+                exc,
+            )
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker(object):
+    """
+    Stops calling a service after repeated failures and probes it again after a pause.
+
+    The circuit opens after failure_threshold failures in a row. While it is open, the calls
+    fail right away with CircuitOpenError instead of waiting for timeouts. After
+    reset_timeout seconds, one probe call is let through (half-open). A successful probe
+    closes the circuit and a failed probe opens it again. The state is recorded in the
+    circuit_state metric.
+
+    Args:
+        name (str):
+        \t\\- The service name used in the logs and metrics (ex: transmission).
+        failure_threshold (int, optional):
+        \t\\- The failures in a row that open the circuit. Defaults to 5.
+        reset_timeout (float, optional):
+        \t\\- The seconds before a probe call is let through. Defaults to 60.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 60) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Union[float, None] = None
+        self._probing = False
+
+    def configure(self, failure_threshold: int, reset_timeout: float) -> None:
+        """
+        Applies the circuit breaker settings.
+
+        Args:
+            failure_threshold (int):
+            \t\\- The failures in a row that open the circuit.
+            reset_timeout (float):
+            \t\\- The seconds before a probe call is let through.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+    @property
+    def state(self) -> str:
+        """The circuit state (closed, half-open or open)."""
+        if self._opened_at is None:
+            return "closed"
+        if self._probing or time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def retry_in(self) -> float:
+        """
+        Gets the seconds until the next call is let through.
+
+        Returns:
+            float:
+            \t\\- 0 when the circuit is closed or the probe is due.
+        """
+        opened_at = self._opened_at
+        if opened_at is None:
+            return 0.0
+        return max(opened_at + self.reset_timeout - time.monotonic(), 0.0)
+
+    def check(self) -> None:
+        """
+        Lets the call through or raises while the circuit is open.
+
+        Raises:
+            CircuitOpenError:
+            \t\\- The {name} circuit is open after repeated failures.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if not self._probing and time.monotonic() - self._opened_at >= self.reset_timeout:
+                # The probe call decides if the circuit closes.
+                self._probing = True
+                METRICS.set("circuit_state", CIRCUIT_STATES["half-open"], circuit=self.name)
+                return
+        exc_args = {
+            "main_message": f"The {self.name} circuit is open after repeated failures.",
+            "custom_type": CircuitOpenError,
+            "expected_result": "A closed circuit",
+            "returned_result": f"The next call is let through in {self.retry_in():.0f} seconds",
+        }
+        raise_ext_error(exc_args=exc_args)
+
+    def record_success(self) -> None:
+        """Closes the circuit after a successful call."""
+        logger = logging.getLogger(__name__)
+
+        with self._lock:
+            closed = self._opened_at is not None
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+        if closed:
+            METRICS.set("circuit_state", CIRCUIT_STATES["closed"], circuit=self.name)
+            logger.info("Closed the %s circuit. The calls run again", self.name)
+
+    def record_failure(self) -> None:
+        """Counts a failed call and opens the circuit at the failure threshold or after a failed probe."""
+        logger = logging.getLogger(__name__)
+
+        with self._lock:
+            self._failures += 1
+            opened = self._probing or (self._opened_at is None and self._failures >= self.failure_threshold)
+            if opened:
+                self._opened_at = time.monotonic()
+                self._probing = False
+            failures = self._failures
+        if opened:
+            METRICS.inc("circuit_opens", circuit=self.name)
+            METRICS.set("circuit_state", CIRCUIT_STATES["open"], circuit=self.name)
+            logger.warning(
+                "Opened the %s circuit after %s failure(s) in a row. The calls fail right away for %s seconds",
+                self.name,
+                failures,
+                self.reset_timeout,
+            )
+
+    @contextmanager
+    def guard(self, failure_types: tuple[type[BaseException], ...] = TRANSIENT_ERRORS) -> Iterator[None]:
+        """
+        Runs the block as one call through the circuit.
+
+        The failure types count as failures. The block ending any other way shows the
+        service answered, so it counts as a success.
+
+        Args:
+            failure_types (tuple[type[BaseException], ...], optional):
+            \t\\- The exceptions that count as failures. Defaults to TRANSIENT_ERRORS.
+
+        Raises:
+            CircuitOpenError:
+            \t\\- The {name} circuit is open after repeated failures.
+        """
+        self.check()
+        try:
+            yield
+        except failure_types:
+            self.record_failure()
+            raise
+        except BaseException:
+            self.record_success()
+            raise
+        else:
+            self.record_success()
@@ -0,0 +1,463 @@
+"""This module is designed to communicate with Transmission through the JSON-RPC endpoint."""
+# Built-in/Generic Imports
+import os
+import json
+import base64
+import logging
+import http.client
+from contextlib import nullcontext
+from typing import Union
+from urllib.parse import urlsplit
+
+# Local Functions
+from common.common import raise_ext_error
+from common.metrics import METRICS
+from common.limiter import CallLimiter
+from common.resilience import CircuitBreaker, retry_call
+from common.tracing import TRACER
+
+# Local Dataclasses
+from common.common import Torrent
+
+# Local Exceptions
+from common.common import CircuitOpenError, TransmissionConnectionError, TransmissionExtError
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, rpc"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+# The torrent fields requested in every torrent-get call.
+TORRENT_FIELDS: list[str] = [
+    "id",
+    "hashString",
+    "name",
+    "uploadRatio",
+    "percentDone",
+    "downloadDir",
+    "status",
+    "isFinished",
+    "totalSize",
+    "secondsSeeding",
+    "addedDate",
+    "trackers",
+    "rateUpload",
+]
+
+# Converts the RPC status codes to the state names. The transmission-remote states are converted to the same names.
+RPC_STATES: dict[int, str] = {
+    0: "Stopped",
+    1: "Verifying",
+    2: "Verifying",
+    3: "Queued",
+    4: "Downloading",
+    5: "Queued",
+    6: "Seeding",
+}
+
+
+def rpc_to_torrent(entry: dict) -> Torrent:
+    """
+    Converts a torrent-get entry to a torrent dataclass.
+
+    Args:
+        entry (dict):
+        \t\\- A torrent entry returned from torrent-get.
+
+    Returns:
+        Torrent:
+        \t\\- The torrent details.
+    """
+    status: Union[int, None] = entry.get("status")
+    # A stopped torrent that met its seed limit shows as "Finished" in transmission-remote.
+    if status == 0 and entry.get("isFinished"):
+        state = "Finished"
+    else:
+        state = RPC_STATES.get(status, "Unknown")  # type: ignore
+
+    # Transmission uses -1 for no ratio and -2 for an infinite ratio.
+    ratio = float(entry.get("uploadRatio", 0.0))
+    if ratio == -2:
+        ratio = float("inf")
+    elif ratio < 0:
+        ratio = 0.0
+
+    return Torrent(
+        id=int(entry["id"]),
+        hash=entry.get("hashString", ""),
+        name=entry.get("name", ""),
+        ratio=ratio,
+        percent_done=float(entry.get("percentDone", 0.0)),
+        location=entry.get("downloadDir", ""),
+        state=state,
+        size=int(entry.get("totalSize", 0)),
+        seeding_time=int(entry.get("secondsSeeding", 0)),
+        added_date=float(entry.get("addedDate", 0)),
+        trackers=tuple(
+            urlsplit(tracker.get("announce", "")).hostname or "" for tracker in entry.get("trackers") or []
+        ),
+        upload_rate=float(entry.get("rateUpload", 0)),
+    )
+
+
+class TransmissionRPC(object):
+    """
+    Transmission JSON-RPC client.
+
+    The client keeps one HTTP/1.1 connection open between requests and handles the
+    X-Transmission-Session-Id handshake and basic authentication. Connection failures,
+    timeouts and 5xx responses are retried with jittered backoff.
+
+    Args:
+        host (str):
+        \t\\- The Transmission host or IP.
+        port (int, optional):
+        \t\\- The Transmission RPC port. Defaults to 9091.
+        username (str, optional):
+        \t\\- The RPC username. Defaults to None.
+        password (str, optional):
+        \t\\- The RPC password. Defaults to None.
+        path (str, optional):
+        \t\\- The RPC URL path. Defaults to "/transmission/rpc".
+        use_ssl (bool, optional):
+        \t\\- Connects with HTTPS. Defaults to False.
+        timeout (float, optional):
+        \t\\- The socket timeout in seconds. Defaults to 30.
+        limiter (CallLimiter, optional):
+        \t\\- The limiter that every request waits for. Defaults to None.
+        breaker (CircuitBreaker, optional):
+        \t\\- The circuit breaker of the Transmission daemon. Defaults to None.
+        retries (int, optional):
+        \t\\- The most retries of a failed request. Defaults to 0.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 9091,
+        username: Union[str, None] = None,
+        password: Union[str, None] = None,
+        path: str = "/transmission/rpc",
+        use_ssl: bool = False,
+        timeout: float = 30,
+        limiter: Union[CallLimiter, None] = None,
+        breaker: Union[CircuitBreaker, None] = None,
+        retries: int = 0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.path = path
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.limiter = limiter
+        self.breaker = breaker
+        self.retries = retries
+        self._session_id: Union[str, None] = None
+        self._connection: Union[http.client.HTTPConnection, None] = None
+        self._auth_header: Union[str, None] = None
+        if username is not None:
+            credentials = f"{username}:{password or ''}".encode("utf-8")
+            self._auth_header = "Basic " + base64.b64encode(credentials).decode("ascii")
+
+    @classmethod
+    def from_server(
+        cls,
+        server: str,
+        timeout: float = 30,
+        limiter: Union[CallLimiter, None] = None,
+        breaker: Union[CircuitBreaker, None] = None,
+        retries: int = 0,
+    ) -> "TransmissionRPC":
+        """
+        Creates the client from the transmission-remote server string.
+
+        Args:
+            server (str):
+            \t\\- The YAML server string (ex: "x.x.x.x:9091 --auth username:password").
+            timeout (float, optional):
+            \t\\- The socket timeout in seconds. Defaults to 30.
+            limiter (CallLimiter, optional):
+            \t\\- The limiter that every request waits for. Defaults to None.
+            breaker (CircuitBreaker, optional):
+            \t\\- The circuit breaker of the Transmission daemon. Defaults to None.
+            retries (int, optional):
+            \t\\- The most retries of a failed request. Defaults to 0.
+
+        Returns:
+            TransmissionRPC:
+            \t\\- The RPC client.
+        """
+        host: str = "localhost"
+        port: int = 9091
+        path: str = "/transmission/rpc"
+        use_ssl: bool = False
+        username: Union[str, None] = None
+        password: Union[str, None] = None
+
+        arguments = server.split()
+        for index, argument in enumerate(arguments):
+            if argument in ("--auth", "-n") and index + 1 < len(arguments):
+                username, _, password = arguments[index + 1].partition(":")
+            elif argument in ("--authenv", "-ne"):
+                username, _, password = os.environ.get("TR_AUTH", "").partition(":")
+            elif argument == "--ssl":
+                use_ssl = True
+            elif index == 0 and not argument.startswith("-"):
+                if "://" in argument:
+                    url = urlsplit(argument)
+                    host = url.hostname or host
+                    use_ssl = url.scheme == "https"
+                    port = url.port or (443 if use_ssl else port)
+                    if url.path and url.path != "/":
+                        path = url.path.rstrip("/")
+                elif argument.isdigit():
+                    port = int(argument)
+                else:
+                    possible_host, _, possible_port = argument.rpartition(":")
+                    if possible_port.isdigit():
+                        host = possible_host or host
+                        port = int(possible_port)
+                    else:
+                        host = argument
+
+        return cls(
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            path=path,
+            use_ssl=use_ssl,
+            timeout=timeout,
+            limiter=limiter,
+            breaker=breaker,
+            retries=retries,
+        )
+
+    def _get_connection(self) -> http.client.HTTPConnection:
+        if self._connection is None:
+            if self.use_ssl:
+                self._connection = http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+            else:
+                self._connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return self._connection
+
+    def close(self) -> None:
+        """Closes the keep-alive connection."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def request(self, method: str, arguments: Union[dict, None] = None) -> dict:
+        """
+        Sends one RPC request. Transient failures are retried.
+
+        Args:
+            method (str):
+            \t\\- The RPC method (ex: torrent-get).
+            arguments (dict, optional):
+            \t\\- The RPC arguments. Defaults to None.
+
+        Raises:
+            TransmissionExtError:
+            \t\\- The Transmission RPC endpoint rejected the username or password.
+            TransmissionExtError:
+            \t\\- The Transmission RPC endpoint returned an unexpected HTTP status.
+            TransmissionExtError:
+            \t\\- The Transmission RPC endpoint did not return a successful result.
+            TransmissionConnectionError:
+            \t\\- The Transmission RPC endpoint returned a server error.
+            CircuitOpenError:
+            \t\\- The transmission circuit is open after repeated failures.
+
+        Returns:
+            dict:
+            \t\\- The response arguments.
+        """
+        payload = json.dumps({"method": method, "arguments": arguments or {}}).encode("utf-8")
+        return retry_call(
+            lambda: self._request(method=method, arguments=arguments, payload=payload),
+            description=f"Transmission RPC {method}",
+            retries=self.retries,
+        )
+
+    def _request(self, method: str, arguments: Union[dict, None], payload: bytes) -> dict:
+        """Sends one RPC request attempt through the call limiter and the circuit breaker."""
+        logger = logging.getLogger(__name__)
+        # The calls for every torrent are slower than the calls for a few torrents, so the latency is judged separately.
+        call_limit = (
+            self.limiter.acquire(kind=f"{method}:{'ids' if arguments and 'ids' in arguments else 'all'}")
+            if self.limiter
+            else nullcontext()
+        )
+
+        with call_limit, self.breaker.guard() if self.breaker else nullcontext(), METRICS.timer(
+            "client_call_duration_seconds", error_counter="client_call_errors", client="rpc", method=method
+        ), TRACER.span("rpc", method=method):
+            reconnected: bool = False
+            handshakes: int = 0
+            while True:
+                headers = {"Content-Type": "application/json"}
+                if self._session_id:
+                    headers["X-Transmission-Session-Id"] = self._session_id
+                if self._auth_header:
+                    headers["Authorization"] = self._auth_header
+
+                try:
+                    connection = self._get_connection()
+                    connection.request("POST", self.path, body=payload, headers=headers)
+                    response = connection.getresponse()
+                    body = response.read()
+                except (ConnectionResetError, BrokenPipeError, http.client.ImproperConnectionState):
+                    # The daemon may close an idle keep-alive connection. One reconnect is allowed.
+                    self.close()
+                    if reconnected:
+                        raise
+                    reconnected = True
+                    continue
+                except (OSError, http.client.HTTPException):
+                    # A timed out or refused connection is opened again by the next attempt.
+                    self.close()
+                    raise
+
+                if response.status == 409 and handshakes == 0:
+                    # The session ID is returned on the first request or after the daemon restarts.
+                    self._session_id = response.getheader("X-Transmission-Session-Id")
+                    handshakes += 1
+                    logger.debug("Received a new Transmission RPC session ID")
+                    continue
+                if response.status == 401:
+                    exc_args = {
+                        "main_message": "The Transmission RPC endpoint rejected the username or password.",
+                        "custom_type": TransmissionExtError,
+                        "suggested_resolution": "Please verify the '--auth' credentials in the connection server setting.",
+                    }
+                    raise_ext_error(exc_args=exc_args)
+                if response.status >= 500:
+                    # The daemon may be restarting or overloaded, so the request can be retried.
+                    exc_args = {
+                        "main_message": "The Transmission RPC endpoint returned a server error.",
+                        "custom_type": TransmissionConnectionError,
+                        "expected_result": 200,
+                        "returned_result": response.status,
+                    }
+                    raise_ext_error(exc_args=exc_args)
+                if response.status != 200:
+                    exc_args = {
+                        "main_message": "The Transmission RPC endpoint returned an unexpected HTTP status.",
+                        "custom_type": TransmissionExtError,
+                        "expected_result": 200,
+                        "returned_result": response.status,
+                    }
+                    raise_ext_error(exc_args=exc_args)
+
+                decoded_body: dict = json.loads(body)
+                if decoded_body.get("result") != "success":
+                    exc_args = {
+                        "main_message": "The Transmission RPC endpoint did not return a successful result.",
+                        "custom_type": TransmissionExtError,
+                        "expected_result": "success",
+                        "returned_result": f"{method}: {decoded_body.get('result')}",
+                    }
+                    raise_ext_error(exc_args=exc_args)
+                return decoded_body.get("arguments", {})
+
+    def get_torrents(self, ids: Union[list[Union[int, str]], None] = None) -> list[Torrent]:
+        """
+        Gets the torrent details with one torrent-get call.
+
+        Args:
+            ids (list[Union[int, str]], optional):
+            \t\\- Limits the results to these torrent IDs or hashes. All torrents return when not set. Defaults to None.
+
+        Returns:
+            list[Torrent]:
+            \t\\- The torrent details.
+        """
+        arguments: dict = {"fields": TORRENT_FIELDS}
+        if ids is not None:
+            arguments["ids"] = ids
+        response = self.request(method="torrent-get", arguments=arguments)
+        return [rpc_to_torrent(entry) for entry in response.get("torrents", [])]
+
+    def get_recently_active(self) -> tuple[list[Torrent], list[int]]:
+        """
+        Gets the torrents that changed recently with one torrent-get call.
+
+        Transmission returns the torrents with activity in the last 60 seconds and the IDs
+        of the torrents removed in that time.
+
+        Returns:
+            tuple[list[Torrent], list[int]]:
+            \t\\- The recently active torrent details and the removed torrent IDs.
+        """
+        response = self.request(method="torrent-get", arguments={"fields": TORRENT_FIELDS, "ids": "recently-active"})
+        torrents = [rpc_to_torrent(entry) for entry in response.get("torrents", [])]
+        return torrents, [int(torrent_id) for torrent_id in response.get("removed", [])]
+
+    def remove_torrents(self, ids: list[Union[int, str]], delete_local_data: bool = False) -> bool:
+        """
+        Removes torrents from Transmission with one torrent-remove call.
+
+        Args:
+            ids (list[Union[int, str]]):
+            \t\\- The torrent IDs or hashes.
+            delete_local_data (bool, optional):
+            \t\\- Transmission deletes the downloaded data. Defaults to False.
+
+        Raises:
+            TransmissionConnectionError:
+            \t\\- The Transmission RPC endpoint returned a server error.
+            CircuitOpenError:
+            \t\\- The transmission circuit is open after repeated failures.
+
+        Returns:
+            bool:
+            \t\\- True when Transmission returned a successful response.
+        """
+        logger = logging.getLogger(__name__)
+        try:
+            self.request(method="torrent-remove", arguments={"ids": ids, "delete-local-data": delete_local_data})
+        except (TransmissionConnectionError, CircuitOpenError):
+            # The daemon did not answer, so the removal state is unknown.
+            raise
+        except TransmissionExtError as exc:
+            logger.debug("The torrent-remove request failed. Exception: %s", exc)
+            return False
+        return True
+
+    def set_location(self, ids: list[Union[int, str]], location: str, move: bool = False) -> bool:
+        """
+        Sets the download directory of torrents with one torrent-set-location call.
+
+        Args:
+            ids (list[Union[int, str]]):
+            \t\\- The torrent IDs or hashes.
+            location (str):
+            \t\\- The new download directory.
+            move (bool, optional):
+            \t\\- Transmission moves the data. The data must already be at the location when False. Defaults to False.
+
+        Raises:
+            TransmissionConnectionError:
+            \t\\- The Transmission RPC endpoint returned a server error.
+            CircuitOpenError:
+            \t\\- The transmission circuit is open after repeated failures.
+
+        Returns:
+            bool:
+            \t\\- True when Transmission returned a successful response.
+        """
+        logger = logging.getLogger(__name__)
+        try:
+            self.request(method="torrent-set-location", arguments={"ids": ids, "location": location, "move": move})
+        except (TransmissionConnectionError, CircuitOpenError):
+            raise
+        except TransmissionExtError as exc:
+            logger.debug("The torrent-set-location request failed. Exception: %s", exc)
+            return False
+        return True
@@ -0,0 +1,245 @@
+"""This module is designed to record nested timing spans in the Chrome trace-event format and profile removal checks on demand."""
+# Built-in/Generic Imports
+import os
+import json
+import time
+import asyncio
+import cProfile
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator, Union
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, tracing"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+# The newest events kept for the trace file. Older events are dropped first.
+TRACE_EVENT_LIMIT: int = 200000
+
+
+class Tracer(object):
+    """
+    Thread-safe recorder of nested timing spans.
+
+    Each span is kept as one Chrome trace-event "complete" event on the track of the thread
+    that ran it, so the nested spans show as a flame chart in chrome://tracing or
+    https://ui.perfetto.dev. The asyncio tasks of one thread overlap, so each task gets its
+    own track. Spans cost one attribute check while no trace file is set.
+
+    The trace file is rewritten with the newest TRACE_EVENT_LIMIT events after each check.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._events: deque = deque(maxlen=TRACE_EVENT_LIMIT)
+        # The track names by track ID. The names are written as metadata events.
+        self._track_names: dict[int, str] = {}
+        # Converts the perf_counter values to microseconds since the epoch, so the trace lines up with the logs.
+        self._epoch_offset = time.time() - time.perf_counter()
+        self._pid = os.getpid()
+        self.path: Union[str, None] = None
+
+    def configure(self, path: Union[str, None]) -> None:
+        """
+        Starts, moves or stops the tracing.
+
+        Args:
+            path (Union[str, None]):
+            \t\\- The trace file. None stops the tracing. The recorded events are dropped when the file changes.
+        """
+        with self._lock:
+            if path != self.path:
+                self.path = path
+                self._events.clear()
+                self._track_names.clear()
+
+    def _track(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        if task is not None:
+            track, track_name = id(task), f"{threading.current_thread().name} {task.get_name()}"
+        else:
+            thread = threading.current_thread()
+            track, track_name = thread.ident or 0, thread.name
+        if track not in self._track_names:
+            with self._lock:
+                self._track_names[track] = track_name
+        return track
+
+    def record(self, name: str, start: float, **args: object) -> None:
+        """
+        Records a span that ended now.
+
+        Args:
+            name (str):
+            \t\\- The span name (ex: remove).
+            start (float):
+            \t\\- The time.perf_counter() value when the span started.
+        """
+        if self.path is None:
+            return
+        end = time.perf_counter()
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": round((start + self._epoch_offset) * 1e6, 3),
+            "dur": round((end - start) * 1e6, 3),
+            "pid": self._pid,
+            "tid": self._track(),
+            "args": args,
+        }
+        with self._lock:
+            self._events.append(event)
+
+    @contextmanager
+    def span(self, name: str, **args: object) -> Iterator[dict]:
+        """
+        Records the duration of the block as a span. Spans opened inside the block nest under it.
+
+        The block can add arguments to the yielded dictionary (ex: the number of torrents).
+        The exception type is added when the block raises.
+
+        Args:
+            name (str):
+            \t\\- The span name (ex: cycle).
+
+        Yields:
+            dict:
+            \t\\- The span arguments.
+        """
+        if self.path is None:
+            yield args
+            return
+        start = time.perf_counter()
+        try:
+            yield args
+        except BaseException as exc:
+            args["error"] = type(exc).__name__
+            raise
+        finally:
+            self.record(name, start, **args)
+
+    def write(self) -> None:
+        """Writes the kept events to the trace file. The file is replaced in one step, so readers never see a partial file."""
+        logger = logging.getLogger(__name__)
+
+        with self._lock:
+            path = self.path
+            if path is None:
+                return
+            events = list(self._events)
+            used_tracks = {event["tid"] for event in events}
+            self._track_names = {track: name for track, name in self._track_names.items() if track in used_tracks}
+            track_names = dict(self._track_names)
+
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": self._pid, "args": {"name": "transmission_ext"}},
+            *(
+                {"name": "thread_name", "ph": "M", "pid": self._pid, "tid": track, "args": {"name": track_name}}
+                for track, track_name in track_names.items()
+            ),
+        ]
+        temporary_path = f"{path}.tmp"
+        try:
+            with self._write_lock:
+                with open(temporary_path, "w", encoding="utf-8") as trace_file:
+                    json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, trace_file, default=str)
+                os.replace(temporary_path, path)
+        except OSError as exc:
+            logger.warning("The trace file (%s) could not be written. Exception: %s", path, exc)
+
+
+class Profiler(object):
+    """
+    Profiles the next removal checks with cProfile and writes one pstats file per check.
+
+    A new profile_cycles setting value or request() profiles that many of the following checks.
+    cProfile only follows the thread that runs the check, so the deletion pool and the RPC
+    calls the async pipeline moves to worker threads are not included. One check is profiled
+    at a time. The checks of other servers that run meanwhile are not profiled.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._remaining = 0
+        self._setting = 0
+        self._running = False
+        self._sequence = 0
+
+    def configure(self, cycles: int) -> None:
+        """
+        Profiles the next checks when the profile_cycles setting changed.
+
+        Args:
+            cycles (int):
+            \t\\- The profile_cycles setting.
+        """
+        with self._lock:
+            if cycles != self._setting:
+                self._setting = cycles
+                self._remaining = max(cycles, 0)
+
+    def request(self, cycles: Union[int, None] = None) -> None:
+        """
+        Profiles the next checks. This is safe to call from a signal handler.
+
+        Args:
+            cycles (int, optional):
+            \t\\- The number of checks. Defaults to the profile_cycles setting or 1 when the setting is 0.
+        """
+        self._remaining = max(cycles if cycles is not None else self._setting, 1)
+
+    @contextmanager
+    def profile(self, directory: str, name: str) -> Iterator[None]:
+        """
+        Profiles the block when a profiled check is pending and writes the pstats file.
+
+        Args:
+            directory (str):
+            \t\\- The directory that gets the pstats file.
+            name (str):
+            \t\\- The file name prefix (ex: the server name).
+        """
+        logger = logging.getLogger(__name__)
+
+        with self._lock:
+            active = self._remaining > 0 and not self._running
+            if active:
+                self._remaining -= 1
+                self._running = True
+                self._sequence += 1
+                sequence = self._sequence
+        if not active:
+            yield
+            return
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            with self._lock:
+                self._running = False
+            stats_path = os.path.join(directory, f"profile-{name}-{time.strftime('%Y%m%d-%H%M%S')}-{sequence}.pstats")
+            try:
+                profiler.dump_stats(stats_path)
+                logger.info("Wrote the check profile to %s. %s profiled check(s) remaining", stats_path, self._remaining)
+            except OSError as exc:
+                logger.warning("The check profile (%s) could not be written. Exception: %s", stats_path, exc)
+
+
+# The process-wide tracer and profiler used by the removal checks.
+TRACER = Tracer()
+PROFILER = Profiler()
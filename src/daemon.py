@@ -0,0 +1,350 @@
+"""
+This module is designed to run Transmission Remove as a long-lived daemon.
+
+The program directory holds the settings.yaml file and the logs directory. The daemon
+initializes once and runs the removal checks on a schedule. Each Transmission server
+gets its own worker thread and schedule, so a slow or dead server does not delay the
+others. SIGHUP reloads the settings and the logging configuration. SIGUSR1 profiles the
+next profile_cycles checks with cProfile. SIGTERM and SIGINT stop the daemon after the
+running checks finish their in-flight deletions. A second SIGTERM or SIGINT stops it
+right away.
+
+Usage:
+    transmission-ext [--directory PATH] [--once | --check]
+"""
+# Built-in/Generic Imports
+import os
+import sys
+import signal
+import logging
+import argparse
+import threading
+from time import monotonic
+from types import FrameType
+from typing import TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    from launch import ServerState
+    from common.common import StartupSettings
+    from common.notify import Notifier
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, daemon"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+# The first retry delay in seconds after a failed check. The delay doubles up to the longest sleep.
+RETRY_DELAY: int = 5
+# The seconds between settings.yaml change checks while the server workers run.
+SETTINGS_POLL: int = 5
+
+
+class ServerWorker(threading.Thread):
+    """
+    Runs the removal checks of one Transmission server on its own schedule.
+
+    A failed check is logged and retried after a growing delay. The settings are
+    replaced by the daemon after a settings change and used by the next check.
+
+    Args:
+        startup_settings (StartupSettings):
+        \t\\- The server settings.
+        server_state (ServerState):
+        \t\\- The torrent table, state database, ratio forecast and call limiter of the server.
+        notifier (Notifier):
+        \t\\- The background notifier shared by the servers.
+    """
+
+    def __init__(self, startup_settings: "StartupSettings", server_state: "ServerState", notifier: "Notifier") -> None:
+        # The workers do not keep the process running after a second stop signal.
+        super().__init__(name=f"server-{startup_settings.server_name or 'default'}", daemon=True)
+        self.startup_settings = startup_settings
+        self.server_state = server_state
+        self.notifier = notifier
+        self._stopping = threading.Event()
+        self._wake = threading.Event()
+
+    def wake(self) -> None:
+        """Ends the sleep, so the next check starts right away."""
+        self._wake.set()
+
+    def stop(self) -> None:
+        """Stops the worker after the running check."""
+        self._stopping.set()
+        self._wake.set()
+
+    def run(self) -> None:
+        from launch import report_check_error, run_check
+        from common.metrics import METRICS
+
+        logger = logging.getLogger(__name__)
+        retry_delay = RETRY_DELAY
+        while not self._stopping.is_set():
+            startup_settings = self.startup_settings
+            server_label = f" ({startup_settings.server_name})" if startup_settings.server_name else ""
+            self._wake.clear()
+            try:
+                next_sleep = run_check(
+                    startup_variables=startup_settings,
+                    torrent_sync=self.server_state.torrent_sync,
+                    torrent_store=self.server_state.torrent_store,
+                    notifier=self.notifier,
+                    ratio_forecast=self.server_state.ratio_forecast,
+                    directory_index=self.server_state.directory_index,
+                    call_limiter=self.server_state.call_limiter,
+                    circuit_breaker=self.server_state.circuit_breaker,
+                )
+                retry_delay = RETRY_DELAY
+            except Exception as exc:
+                # The server may come back. The other servers keep their schedules.
+                report_check_error(startup_variables=startup_settings, exc=exc, notifier=self.notifier)
+                next_sleep = retry_delay
+                if self.server_state.circuit_breaker:
+                    # Checking before the circuit lets a call through would fail right away again.
+                    next_sleep = max(next_sleep, int(self.server_state.circuit_breaker.retry_in()) + 1)
+                retry_delay = min(retry_delay * 2, max(startup_settings.max_remove_sleep, RETRY_DELAY))
+                logger.warning("The removal check%s failed. Retrying in %s seconds. Exception: %s", server_label, next_sleep, exc)
+            if self._stopping.is_set():
+                break
+
+            logger.info("%s seconds until next torrent remove check%s", next_sleep, server_label)
+            # The schedule runs from the end of the check, like the sleep in the main loop.
+            deadline = monotonic() + next_sleep
+            server_labels = {"server": startup_settings.server_name} if startup_settings.server_name else {}
+            with METRICS.labels(**server_labels), METRICS.timer("phase_duration_seconds", phase="sleep"):
+                while not self._stopping.is_set() and not self._wake.is_set():
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        break
+                    self._wake.wait(timeout=remaining)
+
+
+class Daemon(object):
+    """
+    Runs the removal checks on a schedule until stopped.
+
+    The settings cache and notifier are created once and kept for the life of the
+    process. Each server keeps its torrent table, state database and ratio forecast and
+    runs its checks in a server worker. The settings are checked for changes while the
+    workers run, and the workers are started or stopped when servers are added or removed.
+
+    Args:
+        program_path (str):
+        \t\\- The program directory with the settings.yaml file.
+    """
+
+    def __init__(self, program_path: str) -> None:
+        # The heavy modules load on the first daemon start, so --help and --version return right away.
+        from launch import prepare_log_directory
+        from common.config import SettingsCache
+        from common.notify import Notifier
+
+        self.program_path = program_path
+        prepare_log_directory(main_script_path=program_path)
+        self.settings_cache = SettingsCache(path=os.path.join(program_path, "settings.yaml"))
+        self.notifier = Notifier()
+        # The state kept between checks by server name. The single connection server is named "".
+        self.server_states: dict[str, "ServerState"] = {}
+        self.workers: dict[str, ServerWorker] = {}
+        self._stopping = threading.Event()
+        self._reload = False
+        self._wake = threading.Event()
+
+    def install_signal_handlers(self) -> None:
+        """Handles SIGTERM, SIGINT, SIGHUP and SIGUSR1. This runs in the main thread."""
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self._handle_reload)
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, self._handle_profile)
+
+    def _handle_stop(self, signum: int, frame: Union[FrameType, None]) -> None:
+        if self._stopping.is_set():
+            # The second signal stops right away. The running check still waits for its deletion pool.
+            raise SystemExit(128 + signum)
+        logging.getLogger(__name__).info(
+            f"Received {signal.Signals(signum).name}. Stopping after the running check finishes its deletions"
+        )
+        self.stop()
+
+    def _handle_reload(self, signum: int, frame: Union[FrameType, None]) -> None:
+        logging.getLogger(__name__).info("Received SIGHUP. Reloading the settings before the next check")
+        self._reload = True
+        self._wake.set()
+
+    def _handle_profile(self, signum: int, frame: Union[FrameType, None]) -> None:
+        from common.tracing import PROFILER
+
+        logging.getLogger(__name__).info("Received SIGUSR1. Profiling the next check(s)")
+        PROFILER.request()
+
+    def stop(self) -> None:
+        """Stops the daemon after the running checks."""
+        self._stopping.set()
+        self._wake.set()
+        for worker in self.workers.values():
+            worker.stop()
+
+    def _load_settings(self) -> "StartupSettings":
+        from launch import load_settings
+
+        if self._reload:
+            self._reload = False
+            self.settings_cache.invalidate()
+        return load_settings(settings_cache=self.settings_cache)
+
+    def run_once(self) -> int:
+        """
+        Runs one removal check for each server.
+
+        Returns:
+            int:
+            \t\\- The seconds to sleep until the next check of the soonest server.
+        """
+        from launch import run_server_checks
+
+        return run_server_checks(
+            startup_variables=self._load_settings(), server_states=self.server_states, notifier=self.notifier
+        )
+
+    def _update_workers(self, startup_settings: "StartupSettings") -> None:
+        """Starts a worker for each new server, stops the workers of removed servers and passes on the settings."""
+        from launch import ServerState, get_server_settings
+        from remove.sync import TorrentSync
+        from remove.store import TorrentStore
+        from remove.forecast import RatioForecast
+        from remove.orphans import DirectoryIndex
+        from common.limiter import CallLimiter
+        from common.resilience import CircuitBreaker
+
+        logger = logging.getLogger(__name__)
+        server_settings = {settings.server_name: settings for settings in get_server_settings(startup_settings)}
+        for server_name in [server_name for server_name in self.workers if server_name not in server_settings]:
+            logger.info("The server (%s) was removed from the settings. Stopping its worker", server_name or "default")
+            worker = self.workers.pop(server_name)
+            worker.stop()
+            worker.join()
+            self.server_states.pop(server_name).close()
+        for server_name, settings in server_settings.items():
+            worker = self.workers.get(server_name)
+            if worker:
+                worker.startup_settings = settings
+                continue
+            if server_name not in self.server_states:
+                self.server_states[server_name] = ServerState(
+                    torrent_sync=TorrentSync(),
+                    torrent_store=TorrentStore(),
+                    ratio_forecast=RatioForecast(),
+                    directory_index=DirectoryIndex(),
+                    call_limiter=CallLimiter(),
+                    circuit_breaker=CircuitBreaker(name="transmission"),
+                )
+            worker = ServerWorker(
+                startup_settings=settings, server_state=self.server_states[server_name], notifier=self.notifier
+            )
+            self.workers[server_name] = worker
+            worker.start()
+
+    def run_forever(self) -> None:
+        """Runs the server workers until stopped and passes on the settings changes. A signal ends the waits early."""
+        logger = logging.getLogger(__name__)
+        retry_delay = RETRY_DELAY
+        next_poll = 0.0
+        while not self._stopping.is_set():
+            reload = self._reload
+            try:
+                self._update_workers(startup_settings=self._load_settings())
+                retry_delay = RETRY_DELAY
+                next_poll = SETTINGS_POLL
+                if reload:
+                    # The reloaded settings are used right away.
+                    for worker in self.workers.values():
+                        worker.wake()
+            except Exception as exc:
+                # The running workers keep the last valid settings. The settings file may be fixed.
+                startup_settings = self.settings_cache.startup_settings
+                max_sleep = startup_settings.max_remove_sleep if startup_settings else 300
+                next_poll = retry_delay
+                retry_delay = min(retry_delay * 2, max(max_sleep, RETRY_DELAY))
+                logger.warning("The settings could not be loaded. Retrying in %s seconds. Exception: %s", next_poll, exc)
+
+            deadline = monotonic() + next_poll
+            while not self._stopping.is_set() and not self._reload:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    break
+                self._wake.wait(timeout=remaining)
+                self._wake.clear()
+
+        for worker in self.workers.values():
+            worker.stop()
+        for worker in self.workers.values():
+            worker.join()
+
+    def close(self) -> None:
+        """Delivers the queued alerts and closes the state databases and metrics endpoint."""
+        from common.metrics import serve_metrics
+
+        self.notifier.close(timeout=30)
+        for server_state in self.server_states.values():
+            server_state.close()
+        serve_metrics(port=0)
+
+
+def run(argv: Union[list[str], None] = None) -> int:
+    """
+    Console script entry point.
+
+    Args:
+        argv (list[str], optional):
+        \t\\- The command line arguments. Defaults to sys.argv.
+
+    Returns:
+        int:
+        \t\\- The exit code.
+    """
+    arg_parser = argparse.ArgumentParser(
+        prog="transmission-ext",
+        description="Removes torrents from Transmission and the download directory based on the settings.yaml rules.",
+    )
+    arg_parser.add_argument(
+        "--directory", default=os.getcwd(), help="program directory with settings.yaml and logs (default: current directory)"
+    )
+    mode_group = arg_parser.add_mutually_exclusive_group()
+    mode_group.add_argument("--once", action="store_true", help="run one removal check and exit")
+    mode_group.add_argument("--check", action="store_true", help="validate settings.yaml and exit")
+    arg_parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    args = arg_parser.parse_args(argv)
+
+    program_path = os.path.abspath(args.directory)
+    # The settings and the relative log and database paths are resolved from the program directory.
+    os.chdir(program_path)
+
+    if args.check:
+        from ictoolkit import read_yaml_config
+        from launch import get_startup_settings
+
+        get_startup_settings(yaml_config=read_yaml_config(os.path.join(program_path, "settings.yaml"), "FullLoader"))
+        print("The settings.yaml file is valid.")
+        return 0
+
+    daemon = Daemon(program_path=program_path)
+    try:
+        if args.once:
+            daemon.run_once()
+            return 0
+        daemon.install_signal_handlers()
+        daemon.run_forever()
+        return 0
+    finally:
+        daemon.close()
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -9,28 +9,48 @@ Setup Options:
 """
 # Built-in/Generic Imports
 from dataclasses import asdict
+import asyncio
 import os
+import re
+import sys
 import pathlib
 import logging
 from typing import Union
-from time import sleep
+from time import perf_counter, sleep
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 
 # Local Functions
+from common.common import get_ext_error, get_function_name, raise_ext_error
 from remove.remove import start_remove
+from remove.pipeline import start_remove_async
+from remove.pressure import PRESSURE_PRIORITIES
+
+# Local Classes
+from remove.sync import TorrentSync
+from remove.forecast import RatioForecast
+from remove.orphans import DirectoryIndex
+from remove.store import TorrentStore
+from migrate.migrate import start_migrate
+from common.config import SettingsCache, SETTINGS_SECTIONS, changed_config_keys
+from common.notify import Notifier
+from common.metrics import METRICS, serve_metrics
+from common.tracing import PROFILER, TRACER
+from common.limiter import CallLimiter
+from common.resilience import CircuitBreaker
+from common.logqueue import start_queue_logging, stop_queue_logging
+from common.policy import RemovalPolicy
 
 # Local Dataclasses
-from common.common import StartupSettings, EmailSettings
+from common.common import StartupSettings, EmailSettings, MigrationSettings
 
 # Local Exceptions
-from common.common import GeneralTransmissionExtError, TransmissionExtError
+from common.common import CircuitOpenError, GeneralTransmissionExtError, TransmissionExtError
 
 # Libraries
-from ictoolkit import setup_logger_yaml, get_function_name, read_yaml_config, send_email
+# ictoolkit is imported where it is used and fexception on the first error, so the program starts without loading them.
 from fchecker.type import type_check
 
-# Exceptions
-from fexception import FCustomException
-
 
 __author__ = "IncognitoCoding"
 __copyright__ = "Copyright 2021, launch"
@@ -41,12 +61,16 @@ __maintainer__ = "IncognitoCoding"
 __status__ = "Development"
 
 
-def get_startup_settings() -> StartupSettings:
+def get_startup_settings(yaml_config: Union[dict, None] = None) -> StartupSettings:
     """
     This function populates all hard-coded and yaml-configuration variables into a dataclass that is pulled into the main function.
     YAML entry validation checks are performed within this function. No manual configurations are setup within the program. All user
     settings are completed in the "settings.yaml" configuration file.
 
+    Args:
+        yaml_config (dict, optional):
+        \t\\- The already parsed YAML file. The settings.yaml file is read when not set. Defaults to None.
+
     Raises:
         FTypeError (fexception):
         \t\\- The object value '{remove_sleep}' is not an instance of the required class(es) or subclass(es).
@@ -55,8 +79,68 @@ def get_startup_settings() -> StartupSettings:
         FTypeError (fexception):
         \t\\- The object value '{alert_program_errors}' is not an instance of the required class(es) or subclass(es).
         FTypeError (fexception):
+        \t\\- The object value '{email_digest}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{email_rate_limit}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{async_pipeline}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{inspect_concurrency}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{delta_sync}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{full_sync_interval}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{state_database}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{metrics_port}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{trace_file}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{profile_cycles}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{queue_logging}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
         \t\\- The object value '{server}' is not an instance of the required class(es) or subclass(es).
         FTypeError (fexception):
+        \t\\- The object value '{use_rpc}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{call_rate}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{max_call_concurrency}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{call_latency_tolerance}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{call_retries}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{circuit_failure_threshold}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{circuit_reset_seconds}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{batch_removal}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{delete_local_data}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{verify_timeout}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{deletion_workers}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{deletion_file_workers}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{migration_enabled}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{target_location}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{migration_policy_rules}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{copy_workers}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{device_concurrency}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{device_limits}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
+        \t\\- The object value '{set_location_batch}' is not an instance of the required class(es) or subclass(es).
+        FTypeError (fexception):
         \t\\- The object value '{email_settings}' is not an instance of the required class(es) or subclass(es).
         FTypeError (fexception):
         \t\\- The object value '{smtp}' is not an instance of the required class(es) or subclass(es).
@@ -84,6 +168,28 @@ def get_startup_settings() -> StartupSettings:
         \t\\- The 'removal' key is missing from the YAML file.
         TransmissionExtError:
         \t\\- The 'email' key is missing from the YAML file.
+        TransmissionExtError:
+        \t\\- The removal policy rule is not a mapping of rule keys.
+        TransmissionExtError:
+        \t\\- The removal policy rule '{key}' needs a list of rules.
+        TransmissionExtError:
+        \t\\- The removal policy rule '{key}' needs a number or a min/max mapping.
+        TransmissionExtError:
+        \t\\- The removal policy rule '{key}' needs a name or a list of names.
+        TransmissionExtError:
+        \t\\- The connection server entry is not valid.
+        TransmissionExtError:
+        \t\\- The connection server names are not unique.
+        TransmissionExtError:
+        \t\\- The disk pressure free space marks are not valid.
+        TransmissionExtError:
+        \t\\- The disk pressure priority is not valid.
+        TransmissionExtError:
+        \t\\- The orphan exclude paths are not valid.
+        TransmissionExtError:
+        \t\\- The migration device limits are not valid.
+        TransmissionExtError:
+        \t\\- The adaptive sleep bounds are not valid.
 
     Returns:
         StartupSettings:
@@ -103,11 +209,16 @@ def get_startup_settings() -> StartupSettings:
     # No file output or formatted console logging is completed in these variable population sections. Basic print statements will prompt an error.
     # Each configuration section is unique. To make the read easier, each sections will be comment blocked using ############.
     # Gets the config from the YAML file.
-    # Gets the main program root directory.
-    main_script_path = pathlib.Path.cwd()
-    # Sets the reports directory save path.
-    settings_path_name = os.path.abspath(f"{main_script_path}/settings.yaml")
-    returned_yaml_read_config = read_yaml_config(settings_path_name, "FullLoader")
+    if yaml_config is None:
+        # Gets the main program root directory.
+        main_script_path = pathlib.Path.cwd()
+        # Sets the reports directory save path.
+        settings_path_name = os.path.abspath(f"{main_script_path}/settings.yaml")
+        from ictoolkit import read_yaml_config
+
+        returned_yaml_read_config = read_yaml_config(settings_path_name, "FullLoader")
+    else:
+        returned_yaml_read_config = yaml_config
 
     # Validates required root keys exist in the YAML configuration.
     missing_key_msg: Union[str, None] = None
@@ -126,13 +237,28 @@ def get_startup_settings() -> StartupSettings:
             "custom_type": TransmissionExtError,
             "suggested_resolution": "Please verify you have set all required keys and try again.",
         }
-        raise TransmissionExtError(FCustomException(message_args=exc_args))
+        raise_ext_error(exc_args=exc_args)
     ##############################################################################
     # Gets the remove sleep settings.
     #
     # Time is in seconds.
     remove_sleep: int = returned_yaml_read_config.get("general", {}).get("remove_sleep")  # type: ignore
     type_check(value=remove_sleep, required_type=int)
+    # The adaptive sleep is disabled with 30 to 3600-second bounds when the options are not set.
+    adaptive_sleep: bool = returned_yaml_read_config.get("general", {}).get("adaptive_sleep", False)  # type: ignore
+    type_check(value=adaptive_sleep, required_type=bool)
+    min_remove_sleep: int = returned_yaml_read_config.get("general", {}).get("min_remove_sleep", 30)  # type: ignore
+    type_check(value=min_remove_sleep, required_type=int)
+    max_remove_sleep: int = returned_yaml_read_config.get("general", {}).get("max_remove_sleep", 3600)  # type: ignore
+    type_check(value=max_remove_sleep, required_type=int)
+    if not 0 <= min_remove_sleep <= max_remove_sleep:
+        exc_args = {
+            "main_message": "The adaptive sleep bounds are not valid.",
+            "custom_type": TransmissionExtError,
+            "expected_result": "0 <= min_remove_sleep <= max_remove_sleep",
+            "returned_result": f"min_remove_sleep: {min_remove_sleep}, max_remove_sleep: {max_remove_sleep}",
+        }
+        raise_ext_error(exc_args=exc_args)
     ##############################################################################
     # Gets the option to enable or not enable email alerts.
     email_alerts: bool = returned_yaml_read_config.get("general", {}).get("email_alerts")  # type: ignore
@@ -143,17 +269,239 @@ def get_startup_settings() -> StartupSettings:
     alert_program_errors: bool = returned_yaml_read_config.get("general", {}).get("alert_program_errors")  # type: ignore
     type_check(value=alert_program_errors, required_type=bool)
     ##############################################################################
+    # Gets the email alert delivery options. Each alert is sent without a rate limit when the options are not set.
+    #
+    email_digest: bool = returned_yaml_read_config.get("general", {}).get("email_digest", False)  # type: ignore
+    type_check(value=email_digest, required_type=bool)
+    email_rate_limit: int = returned_yaml_read_config.get("general", {}).get("email_rate_limit", 0)  # type: ignore
+    type_check(value=email_rate_limit, required_type=int)
+    ##############################################################################
+    # Gets the asyncio pipeline options. The pipeline is disabled when the options are not set.
+    #
+    async_pipeline: bool = returned_yaml_read_config.get("general", {}).get("async_pipeline", False)  # type: ignore
+    type_check(value=async_pipeline, required_type=bool)
+    inspect_concurrency: int = returned_yaml_read_config.get("general", {}).get("inspect_concurrency", 8)  # type: ignore
+    type_check(value=inspect_concurrency, required_type=int)
+    ##############################################################################
+    # Gets the delta sync options. Delta sync is disabled with a 900-second full sync when the options are not set.
+    #
+    delta_sync: bool = returned_yaml_read_config.get("general", {}).get("delta_sync", False)  # type: ignore
+    type_check(value=delta_sync, required_type=bool)
+    full_sync_interval: int = returned_yaml_read_config.get("general", {}).get("full_sync_interval", 900)  # type: ignore
+    type_check(value=full_sync_interval, required_type=int)
+    ##############################################################################
+    # Gets the state database file. The torrent state is not saved when the option is not set.
+    #
+    state_database: str = returned_yaml_read_config.get("general", {}).get("state_database", "")  # type: ignore
+    type_check(value=state_database, required_type=str)
+    ##############################################################################
+    # Gets the metrics endpoint port. The endpoint is disabled when the option is not set.
+    #
+    metrics_port: int = returned_yaml_read_config.get("general", {}).get("metrics_port", 0)  # type: ignore
+    type_check(value=metrics_port, required_type=int)
+    ##############################################################################
+    # Gets the tracing and profiling options. Both are disabled when the options are not set.
+    #
+    trace_file: str = returned_yaml_read_config.get("general", {}).get("trace_file", "")  # type: ignore
+    type_check(value=trace_file, required_type=str)
+    profile_cycles: int = returned_yaml_read_config.get("general", {}).get("profile_cycles", 0)  # type: ignore
+    type_check(value=profile_cycles, required_type=int)
+    ##############################################################################
+    # Gets the log writer option. The records are written on a background thread when the option is not set.
+    #
+    queue_logging: bool = returned_yaml_read_config.get("general", {}).get("queue_logging", True)  # type: ignore
+    type_check(value=queue_logging, required_type=bool)
+    ##############################################################################
     ##############################################################################
     # Gets the transmission connection values.
-    server: str = returned_yaml_read_config.get("connection", {}).get("server")  # type: ignore
+    # The servers list replaces the single server. Each entry is validated with the other settings below.
+    servers_config: Union[list, None] = returned_yaml_read_config.get("connection", {}).get("servers")  # type: ignore
+    if servers_config is not None:
+        type_check(value=servers_config, required_type=list)
+    server: str = returned_yaml_read_config.get("connection", {}).get("server", "" if servers_config else None)  # type: ignore
     type_check(value=server, required_type=str)
+    # The RPC endpoint is used when the option is not set.
+    use_rpc: bool = returned_yaml_read_config.get("connection", {}).get("use_rpc", True)  # type: ignore
+    type_check(value=use_rpc, required_type=bool)
+    # The calls are not rate limited when the options are not set. Up to 8 calls run at once, and the limit
+    # is lowered when a call takes more than twice the usual time or fails.
+    call_rate: float = returned_yaml_read_config.get("connection", {}).get("call_rate", 0)  # type: ignore
+    type_check(value=call_rate, required_type=(int, float))
+    max_call_concurrency: int = returned_yaml_read_config.get("connection", {}).get("max_call_concurrency", 8)  # type: ignore
+    type_check(value=max_call_concurrency, required_type=int)
+    call_latency_tolerance: float = returned_yaml_read_config.get("connection", {}).get("call_latency_tolerance", 2.0)  # type: ignore
+    type_check(value=call_latency_tolerance, required_type=(int, float))
+    # A failed call is retried twice when the option is not set. After 5 failed calls in a row, the calls
+    # fail right away for 60 seconds before one call checks the daemon again.
+    call_retries: int = returned_yaml_read_config.get("connection", {}).get("call_retries", 2)  # type: ignore
+    type_check(value=call_retries, required_type=int)
+    circuit_failure_threshold: int = returned_yaml_read_config.get("connection", {}).get("circuit_failure_threshold", 5)  # type: ignore
+    type_check(value=circuit_failure_threshold, required_type=int)
+    circuit_reset_seconds: int = returned_yaml_read_config.get("connection", {}).get("circuit_reset_seconds", 60)  # type: ignore
+    type_check(value=circuit_reset_seconds, required_type=int)
     ##############################################################################
     ##############################################################################
     # Gets the transmission removal values.
-    removal_ratio: float = returned_yaml_read_config.get("removal", {}).get("removal_ratio")  # type: ignore
-    type_check(value=removal_ratio, required_type=float)
+    # The policy rules are compiled once. Torrents that meet the removal ratio or finished seeding are removed when no policy is set.
+    # The removal ratio is only required when no policy is set.
+    removal_policy_rules: Union[dict, None] = returned_yaml_read_config.get("removal", {}).get("policy")  # type: ignore
+    removal_ratio: Union[float, None] = returned_yaml_read_config.get("removal", {}).get("removal_ratio")  # type: ignore
+    removal_policy: RemovalPolicy
+    if removal_policy_rules is None:
+        type_check(value=removal_ratio, required_type=float)
+        removal_policy = RemovalPolicy.from_ratio(removal_ratio=removal_ratio)
+    else:
+        if removal_ratio is not None:
+            type_check(value=removal_ratio, required_type=float)
+        type_check(value=removal_policy_rules, required_type=dict)
+        removal_policy = RemovalPolicy(rules=removal_policy_rules)
+    if adaptive_sleep and not removal_policy.ratio_targets:
+        logger.warning("The removal policy has no ratio rule, so the adaptive sleep always uses the max_remove_sleep")
     root_download_path: str = returned_yaml_read_config.get("removal", {}).get("root_download_path")  # type: ignore
     type_check(value=root_download_path, required_type=str)
+    # Batch removal and delete local data are disabled when the options are not set.
+    batch_removal: bool = returned_yaml_read_config.get("removal", {}).get("batch_removal", False)  # type: ignore
+    type_check(value=batch_removal, required_type=bool)
+    delete_local_data: bool = returned_yaml_read_config.get("removal", {}).get("delete_local_data", False)  # type: ignore
+    type_check(value=delete_local_data, required_type=bool)
+    # Removal verification waits up to 10 seconds when the option is not set.
+    verify_timeout: int = returned_yaml_read_config.get("removal", {}).get("verify_timeout", 10)  # type: ignore
+    type_check(value=verify_timeout, required_type=int)
+    # Deletes up to 4 torrent folders and 8 files at once when the options are not set.
+    deletion_workers: int = returned_yaml_read_config.get("removal", {}).get("deletion_workers", 4)  # type: ignore
+    type_check(value=deletion_workers, required_type=int)
+    deletion_file_workers: int = returned_yaml_read_config.get("removal", {}).get("deletion_file_workers", 8)  # type: ignore
+    type_check(value=deletion_file_workers, required_type=int)
+    # Disk pressure removals are disabled when the options are not set. When enabled, removals start below 10% free
+    # space and stop at 15%, highest ratio first, skipping torrents that seeded for less than 24 hours.
+    disk_pressure: bool = returned_yaml_read_config.get("removal", {}).get("disk_pressure", False)  # type: ignore
+    type_check(value=disk_pressure, required_type=bool)
+    free_space_low: int = returned_yaml_read_config.get("removal", {}).get("free_space_low", 10)  # type: ignore
+    type_check(value=free_space_low, required_type=int)
+    free_space_high: int = returned_yaml_read_config.get("removal", {}).get("free_space_high", 15)  # type: ignore
+    type_check(value=free_space_high, required_type=int)
+    pressure_priority: str = returned_yaml_read_config.get("removal", {}).get("pressure_priority", "ratio")  # type: ignore
+    type_check(value=pressure_priority, required_type=str)
+    pressure_min_seed_hours: int = returned_yaml_read_config.get("removal", {}).get("pressure_min_seed_hours", 24)  # type: ignore
+    type_check(value=pressure_min_seed_hours, required_type=int)
+    if not 0 <= free_space_low < free_space_high <= 100:
+        exc_args = {
+            "main_message": "The disk pressure free space marks are not valid.",
+            "custom_type": TransmissionExtError,
+            "expected_result": "0 <= free_space_low < free_space_high <= 100",
+            "returned_result": f"free_space_low: {free_space_low}, free_space_high: {free_space_high}",
+        }
+        raise_ext_error(exc_args=exc_args)
+    if pressure_priority not in PRESSURE_PRIORITIES:
+        exc_args = {
+            "main_message": "The disk pressure priority is not valid.",
+            "custom_type": TransmissionExtError,
+            "expected_result": ", ".join(PRESSURE_PRIORITIES),
+            "returned_result": pressure_priority,
+        }
+        raise_ext_error(exc_args=exc_args)
+    # The orphan check is disabled when the options are not set. When enabled, data modified in the last 24 hours is not an orphan.
+    find_orphans: bool = returned_yaml_read_config.get("removal", {}).get("find_orphans", False)  # type: ignore
+    type_check(value=find_orphans, required_type=bool)
+    reclaim_orphans: bool = returned_yaml_read_config.get("removal", {}).get("reclaim_orphans", False)  # type: ignore
+    type_check(value=reclaim_orphans, required_type=bool)
+    orphan_min_age_hours: int = returned_yaml_read_config.get("removal", {}).get("orphan_min_age_hours", 24)  # type: ignore
+    type_check(value=orphan_min_age_hours, required_type=int)
+    orphan_exclude: list[str] = returned_yaml_read_config.get("removal", {}).get("orphan_exclude") or []  # type: ignore
+    type_check(value=orphan_exclude, required_type=list)
+    if not all(isinstance(path, str) for path in orphan_exclude):
+        exc_args = {
+            "main_message": "The orphan exclude paths are not valid.",
+            "custom_type": TransmissionExtError,
+            "expected_result": "A list of paths under the root download path",
+            "returned_result": orphan_exclude,
+        }
+        raise_ext_error(exc_args=exc_args)
+    ##############################################################################
+    ##############################################################################
+    # Gets the storage migration values.
+    # The migration is disabled when the section or option is not set.
+    migration_enabled: bool = returned_yaml_read_config.get("migration", {}).get("enabled", False)  # type: ignore
+    type_check(value=migration_enabled, required_type=bool)
+    migration_settings: Union[MigrationSettings, None] = None
+    if migration_enabled:
+        target_location: str = returned_yaml_read_config.get("migration", {}).get("target_location")  # type: ignore
+        type_check(value=target_location, required_type=str)
+        # The policy uses the removal policy rules to pick the torrents to move.
+        migration_policy_rules: dict = returned_yaml_read_config.get("migration", {}).get("policy")  # type: ignore
+        type_check(value=migration_policy_rules, required_type=dict)
+        # Copies up to 4 torrents at once, with one copy per storage device, when the options are not set.
+        copy_workers: int = returned_yaml_read_config.get("migration", {}).get("copy_workers", 4)  # type: ignore
+        type_check(value=copy_workers, required_type=int)
+        device_concurrency: int = returned_yaml_read_config.get("migration", {}).get("device_concurrency", 1)  # type: ignore
+        type_check(value=device_concurrency, required_type=int)
+        device_limits: dict = returned_yaml_read_config.get("migration", {}).get("device_limits") or {}  # type: ignore
+        type_check(value=device_limits, required_type=dict)
+        if not all(isinstance(location, str) and isinstance(limit, int) for location, limit in device_limits.items()):
+            exc_args = {
+                "main_message": "The migration device limits are not valid.",
+                "custom_type": TransmissionExtError,
+                "expected_result": "<download directory>: <most copies at once>",
+                "returned_result": device_limits,
+            }
+            raise_ext_error(exc_args=exc_args)
+        # Changes the location of up to 50 copied torrents with one call when the option is not set.
+        set_location_batch: int = returned_yaml_read_config.get("migration", {}).get("set_location_batch", 50)  # type: ignore
+        type_check(value=set_location_batch, required_type=int)
+        migration_settings = MigrationSettings(
+            target_location=target_location,
+            migration_policy=RemovalPolicy(rules=migration_policy_rules),
+            copy_workers=copy_workers,
+            device_concurrency=device_concurrency,
+            device_limits=device_limits,
+            set_location_batch=max(set_location_batch, 1),
+        )
+    ##############################################################################
+    ##############################################################################
+    # Gets the settings of each server in the servers list.
+    # An entry sets the server and overrides the removal keys. The other sections are shared by all servers.
+    servers: list[StartupSettings] = []
+    for server_entry in servers_config or []:
+        if (
+            not isinstance(server_entry, dict)
+            or not isinstance(server_entry.get("name"), str)
+            or not re.fullmatch(r"[A-Za-z0-9_.-]+", server_entry["name"])
+            or not isinstance(server_entry.get("server"), str)
+            or not isinstance(server_entry.get("removal", {}), dict)
+        ):
+            exc_args = {
+                "main_message": "The connection server entry is not valid.",
+                "custom_type": TransmissionExtError,
+                "expected_result": "name: <letters, digits, _ . ->, server: <server string>, use_rpc: <optional bool>, call_rate: <optional number>, max_call_concurrency: <optional int>, call_latency_tolerance: <optional number>, call_retries: <optional int>, circuit_failure_threshold: <optional int>, circuit_reset_seconds: <optional int>, removal: <optional removal keys>",
+                "returned_result": server_entry,
+            }
+            raise_ext_error(exc_args=exc_args)
+        server_config = dict(returned_yaml_read_config)
+        # The entry connection keys override the shared connection keys (ex: use_rpc or call_rate).
+        server_config["connection"] = {
+            **{key: value for key, value in returned_yaml_read_config["connection"].items() if key != "servers"},
+            **{key: value for key, value in server_entry.items() if key not in ("name", "removal")},
+        }
+        server_config["removal"] = {**returned_yaml_read_config["removal"], **server_entry.get("removal", {})}
+        # The policy is only inherited when the entry does not set its own removal ratio.
+        if "removal_ratio" in server_entry.get("removal", {}) and "policy" not in server_entry.get("removal", {}):
+            server_config["removal"].pop("policy", None)
+        server_settings = get_startup_settings(yaml_config=server_config)
+        server_settings.server_name = server_entry["name"]
+        # Each server keeps its torrent state in its own database file.
+        if state_database:
+            database_root, database_extension = os.path.splitext(state_database)
+            server_settings.state_database = f"{database_root}.{server_entry['name']}{database_extension}"
+        servers.append(server_settings)
+    server_names = [server_settings.server_name for server_settings in servers]
+    if len(set(server_names)) != len(server_names):
+        exc_args = {
+            "main_message": "The connection server names are not unique.",
+            "custom_type": TransmissionExtError,
+            "expected_result": "A unique name for each server",
+            "returned_result": ", ".join(server_names),
+        }
+        raise_ext_error(exc_args=exc_args)
     ##############################################################################
     # Sets email values.
     smtp: str = returned_yaml_read_config.get("email", {}).get("smtp")  # type: ignore
@@ -175,11 +523,49 @@ def get_startup_settings() -> StartupSettings:
 
     startup_variables = StartupSettings(
         remove_sleep=remove_sleep,
+        adaptive_sleep=adaptive_sleep,
+        min_remove_sleep=min_remove_sleep,
+        max_remove_sleep=max_remove_sleep,
         email_alerts=email_alerts,
         alert_program_errors=alert_program_errors,
+        email_digest=email_digest,
+        email_rate_limit=email_rate_limit,
+        async_pipeline=async_pipeline,
+        inspect_concurrency=inspect_concurrency,
+        delta_sync=delta_sync,
+        full_sync_interval=full_sync_interval,
+        state_database=state_database,
+        metrics_port=metrics_port,
+        trace_file=trace_file,
+        profile_cycles=profile_cycles,
+        queue_logging=queue_logging,
         server=server,
+        use_rpc=use_rpc,
+        call_rate=float(call_rate),
+        max_call_concurrency=max_call_concurrency,
+        call_latency_tolerance=float(call_latency_tolerance),
+        call_retries=call_retries,
+        circuit_failure_threshold=circuit_failure_threshold,
+        circuit_reset_seconds=circuit_reset_seconds,
+        server_name="",
+        servers=tuple(servers),
         removal_ratio=removal_ratio,
+        removal_policy=removal_policy,
         root_download_path=root_download_path,
+        batch_removal=batch_removal,
+        delete_local_data=delete_local_data,
+        verify_timeout=verify_timeout,
+        deletion_workers=deletion_workers,
+        deletion_file_workers=deletion_file_workers,
+        disk_pressure=disk_pressure,
+        free_space_low=free_space_low,
+        free_space_high=free_space_high,
+        pressure_priority=pressure_priority,
+        pressure_min_seed_hours=pressure_min_seed_hours,
+        find_orphans=find_orphans,
+        reclaim_orphans=reclaim_orphans,
+        orphan_min_age_hours=orphan_min_age_hours,
+        orphan_exclude=orphan_exclude,
         email_settings=EmailSettings(
             smtp=smtp,
             authentication_required=authentication_required,
@@ -189,21 +575,83 @@ def get_startup_settings() -> StartupSettings:
             from_email=from_email,
             to_email=to_email,
         ),
+        migration_settings=migration_settings,
     )
 
-    logger.debug(f"Returning value(s):\n  - {startup_variables}")
+    logger.debug("Returning value(s):\n  - %s", startup_variables)
 
     # Returns the startup settings.
     return startup_variables
 
 
-def main():
-    # ############################################################################################
-    # ######################Gets the programs main root directory/YAML File Path##################
-    # ############################################################################################
-    # Gets the main program root directory.
-    main_script_path = pathlib.Path.cwd()
+class ServerState(object):
+    """
+    The torrent table, state database, ratio forecast, download root index, call limiter and circuit breaker kept between checks for one Transmission server.
+
+    Args:
+        torrent_sync (TorrentSync, optional):
+        \t\\- The torrent table. Defaults to None.
+        torrent_store (TorrentStore, optional):
+        \t\\- The torrent state database. Defaults to None.
+        ratio_forecast (RatioForecast, optional):
+        \t\\- The ratio forecast. Defaults to None.
+        directory_index (DirectoryIndex, optional):
+        \t\\- The download root index. Defaults to None.
+        call_limiter (CallLimiter, optional):
+        \t\\- The Transmission call limiter. Defaults to None.
+        circuit_breaker (CircuitBreaker, optional):
+        \t\\- The Transmission circuit breaker. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        torrent_sync: Union[TorrentSync, None] = None,
+        torrent_store: Union[TorrentStore, None] = None,
+        ratio_forecast: Union[RatioForecast, None] = None,
+        directory_index: Union[DirectoryIndex, None] = None,
+        call_limiter: Union[CallLimiter, None] = None,
+        circuit_breaker: Union[CircuitBreaker, None] = None,
+    ) -> None:
+        self.torrent_sync = torrent_sync
+        self.torrent_store = torrent_store
+        self.ratio_forecast = ratio_forecast
+        self.directory_index = directory_index
+        self.call_limiter = call_limiter
+        self.circuit_breaker = circuit_breaker
+
+    def close(self) -> None:
+        """Closes the state database."""
+        if self.torrent_store:
+            self.torrent_store.close()
+
+
+def get_server_settings(startup_variables: StartupSettings) -> list[StartupSettings]:
+    """
+    Gets the settings of each Transmission server.
+
+    Args:
+        startup_variables (StartupSettings):
+        \t\\- The startup settings.
 
+    Returns:
+        list[StartupSettings]:
+        \t\\- The settings of each server in the connection servers list or the startup settings when one server is set.
+    """
+    return list(startup_variables.servers) or [startup_variables]
+
+
+def prepare_log_directory(main_script_path: Union[str, pathlib.Path]) -> str:
+    """
+    Creates the logs directory in the program directory.
+
+    Args:
+        main_script_path (Union[str, pathlib.Path]):
+        \t\\- The program directory.
+
+    Returns:
+        str:
+        \t\\- The logs directory path.
+    """
     # Checks that the main root program directory has the correct save folders created.
     # Sets the log directory save path.
     save_log_path = os.path.abspath(f"{main_script_path}/logs")
@@ -222,20 +670,50 @@ def main():
             if filename.endswith(".log") or list(filename)[-1].isdigit():
                 log_file_path = os.path.join(save_log_path, filename)
                 os.remove(log_file_path)
+    return save_log_path
 
-    # Sets the YAML file configuration location.
-    yaml_file_path = os.path.abspath(f"{main_script_path}/settings.yaml")
 
+def load_settings(settings_cache: SettingsCache) -> StartupSettings:
+    """
+    Loads the settings after the settings.yaml file changed or returns the cached settings.
+
+    The logging is only reconfigured when a logging key changed.
+
+    Args:
+        settings_cache (SettingsCache):
+        \t\\- The settings cache of the settings.yaml file.
+
+    Raises:
+        TransmissionExtError:
+        \t\\- The settings.yaml file was not found.
+
+    Returns:
+        StartupSettings:
+        \t\\- The startup settings.
+    """
+    # Holds the changed settings keys. None reloads everything.
+    changed_keys: Union[list[str], None] = None
     try:
-        # Calls function to setup the logging configuration with the YAML file.
-        setup_logger_yaml(yaml_file_path)
+        settings_changed: bool = settings_cache.has_changed()
+        if settings_changed:
+            from ictoolkit import read_yaml_config, setup_logger_yaml
+
+            returned_yaml_read_config: dict = read_yaml_config(settings_cache.path, "FullLoader")
+            if settings_cache.config is not None:
+                changed_keys = changed_config_keys(old_config=settings_cache.config, new_config=returned_yaml_read_config)
+            # Rebuilding the handlers reopens the log files, so the logging is only reconfigured after a logging edit.
+            if changed_keys is None or any(key.split(".")[0] not in SETTINGS_SECTIONS for key in changed_keys):
+                # The queued records are written before the handlers they go to are closed.
+                stop_queue_logging()
+                # Calls function to setup the logging configuration with the YAML file.
+                setup_logger_yaml(settings_cache.path)
     except FileNotFoundError:
         exc_args = {
             "main_message": "The settings.yaml file was not found.",
             "custom_type": TransmissionExtError,
             "suggested_resolution": "Please verify you renamed the sample_settings.yaml file to settings.yaml and applied updates to the settings.",
         }
-        raise TransmissionExtError(FCustomException(message_args=exc_args))
+        raise_ext_error(exc_args=exc_args)
 
     logger = logging.getLogger(__name__)
     # Custom flowchart tracking. This is ideal for large projects that move a lot.
@@ -243,54 +721,388 @@ def main():
     logger_flowchart = logging.getLogger("flowchart")
     logger_flowchart.info(f"Flowchart --> Function: {get_function_name()}")
 
+    if not settings_changed:
+        return settings_cache.startup_settings
+
+    # Calls function to pull in the startup variables.
+    startup_variables = get_startup_settings(yaml_config=returned_yaml_read_config)
+    settings_cache.accept(config=returned_yaml_read_config, startup_settings=startup_variables)
+    # Moves the configured handlers behind the background log writer or restores them.
+    if startup_variables.queue_logging:
+        start_queue_logging()
+    else:
+        stop_queue_logging()
+    if changed_keys:
+        logger.info("The settings file changed. Reloaded the changed key(s): %s", ", ".join(changed_keys))
+    return startup_variables
+
+
+def run_check(
+    startup_variables: StartupSettings,
+    torrent_sync: Union[TorrentSync, None] = None,
+    torrent_store: Union[TorrentStore, None] = None,
+    notifier: Union[Notifier, None] = None,
+    ratio_forecast: Union[RatioForecast, None] = None,
+    directory_index: Union[DirectoryIndex, None] = None,
+    call_limiter: Union[CallLimiter, None] = None,
+    circuit_breaker: Union[CircuitBreaker, None] = None,
+) -> int:
+    """
+    Runs one removal check without sleeping.
+
+    The metrics recorded by the check are labeled with the server name when it is set.
+
+    Args:
+        startup_variables (StartupSettings):
+        \t\\- The startup settings.
+        torrent_sync (TorrentSync, optional):
+        \t\\- The torrent table kept between checks. Defaults to None.
+        torrent_store (TorrentStore, optional):
+        \t\\- The torrent state database kept open between checks. Defaults to None.
+        notifier (Notifier, optional):
+        \t\\- The background notifier. Defaults to None.
+        ratio_forecast (RatioForecast, optional):
+        \t\\- The ratio forecast kept between checks. Defaults to None.
+        directory_index (DirectoryIndex, optional):
+        \t\\- The download root index kept between checks. Defaults to None.
+        call_limiter (CallLimiter, optional):
+        \t\\- The Transmission call limiter kept between checks. Defaults to None.
+        circuit_breaker (CircuitBreaker, optional):
+        \t\\- The Transmission circuit breaker kept between checks. Defaults to None.
+
+    Returns:
+        int:
+        \t\\- The seconds to sleep until the next check.
+    """
+    logger = logging.getLogger(__name__)
     logger.debug("#" * 80)
     logger.debug(" " * 31 + "Transmission Remove" + " " * 30)
     logger.debug("#" * 80)
 
-    # Calls function to pull in the startup variables.
-    startup_variables = get_startup_settings()
+    server_labels: dict[str, str] = {"server": startup_variables.server_name} if startup_variables.server_name else {}
+    with METRICS.labels(**server_labels) if server_labels else nullcontext():
+        return _run_check(
+            startup_variables=startup_variables,
+            torrent_sync=torrent_sync,
+            torrent_store=torrent_store,
+            notifier=notifier,
+            ratio_forecast=ratio_forecast,
+            directory_index=directory_index,
+            call_limiter=call_limiter,
+            circuit_breaker=circuit_breaker,
+            server_labels=server_labels,
+        )
 
+
+def _run_check(
+    startup_variables: StartupSettings,
+    torrent_sync: Union[TorrentSync, None],
+    torrent_store: Union[TorrentStore, None],
+    notifier: Union[Notifier, None],
+    ratio_forecast: Union[RatioForecast, None],
+    directory_index: Union[DirectoryIndex, None],
+    call_limiter: Union[CallLimiter, None],
+    circuit_breaker: Union[CircuitBreaker, None],
+    server_labels: dict[str, str],
+) -> int:
+    logger = logging.getLogger(__name__)
+
+    # The torrent table is only passed when delta sync is enabled.
+    active_torrent_sync: Union[TorrentSync, None] = None
+    if startup_variables.delta_sync and torrent_sync:
+        torrent_sync.full_sync_interval = startup_variables.full_sync_interval
+        active_torrent_sync = torrent_sync
+
+    # Starts, moves or stops the local metrics endpoint after a settings change.
+    serve_metrics(port=startup_variables.metrics_port)
+    # Starts, moves or stops the tracing and profiles the next checks after a settings change.
+    TRACER.configure(
+        path=os.path.abspath(f"{pathlib.Path.cwd()}/{startup_variables.trace_file}") if startup_variables.trace_file else None
+    )
+    PROFILER.configure(cycles=startup_variables.profile_cycles)
+    # The call limiter keeps its adaptive limit between checks and applies the changed settings.
+    if call_limiter:
+        call_limiter.configure(
+            rate=startup_variables.call_rate,
+            max_concurrency=startup_variables.max_call_concurrency,
+            latency_tolerance=startup_variables.call_latency_tolerance,
+        )
+    # The circuit breaker keeps its state between checks, so a dead daemon is not called again until the reset.
+    if circuit_breaker:
+        circuit_breaker.configure(
+            failure_threshold=startup_variables.circuit_failure_threshold,
+            reset_timeout=startup_variables.circuit_reset_seconds,
+        )
+
+    # The notifier sends the email alerts from a background worker.
+    if notifier:
+        notifier.configure(
+            email_settings=startup_variables.email_settings,
+            enabled=startup_variables.email_alerts,
+            digest=startup_variables.email_digest,
+            rate_limit=startup_variables.email_rate_limit,
+        )
+
+    # The ratio forecast is only passed when the adaptive sleep is enabled.
+    active_ratio_forecast: Union[RatioForecast, None] = ratio_forecast if startup_variables.adaptive_sleep else None
+    # The download root index is only passed when the orphan check is enabled.
+    active_directory_index: Union[DirectoryIndex, None] = directory_index if startup_variables.find_orphans else None
+
+    # The state database is opened once and kept open between loops.
+    active_torrent_store: Union[TorrentStore, None] = None
+    if startup_variables.state_database and torrent_store:
+        torrent_store.open(path=os.path.abspath(f"{pathlib.Path.cwd()}/{startup_variables.state_database}"))
+        active_torrent_store = torrent_store
+        if active_torrent_sync:
+            active_torrent_sync.attach_store(store=torrent_store)
+
+    cycle_start = perf_counter()
     try:
-        # Starts the remove.
-        start_remove(startup_settings=startup_variables)
-
-        logger.info(f"{startup_variables.remove_sleep} seconds until next torrent remove check")
-        # Sleeps for the amount of seconds set in the YAML file.
-        sleep(startup_variables.remove_sleep)
-    except Exception as exc:
-        # ################################################
-        # ############Cataches For Email Alerts###########
-        # ################################################
-        exc_args: Union[dict, None] = None
-        # Raises handled fexception's or creates a general exception depending on what is trigged.
-        if "Exception Trace Details:" not in str(exc):
-            exc_args = {
-                "main_message": f"A general exception trigged while running a remove job. See below for more details.",
-                "original_exception": exc,
-                "custom_type": GeneralTransmissionExtError,
-            }
-            exc = GeneralTransmissionExtError(FCustomException(message_args=exc_args))
-
-        # Catches exceptions to email notifications.
-        # Checks if program errors get emailed.
-        if startup_variables.alert_program_errors:
-            # Converts the dataclass to a dictionary.
-            email_settings_asdict: dict = asdict(startup_variables.email_settings)
-
-            send_email(
-                email_settings=email_settings_asdict,
-                subject="Transmission Remove - Exiting Program Error Occurred",
-                body=str(exc),
+        # The pstats files are written next to the log files.
+        with PROFILER.profile(
+            directory=os.path.abspath(f"{pathlib.Path.cwd()}/logs"), name=startup_variables.server_name or "check"
+        ), TRACER.span("cycle", **server_labels):
+            # Starts the remove.
+            if startup_variables.async_pipeline:
+                asyncio.run(
+                    start_remove_async(
+                        startup_settings=startup_variables,
+                        torrent_sync=active_torrent_sync,
+                        torrent_store=active_torrent_store,
+                        notifier=notifier,
+                        ratio_forecast=active_ratio_forecast,
+                        directory_index=active_directory_index,
+                        call_limiter=call_limiter,
+                        circuit_breaker=circuit_breaker,
+                    )
+                )
+            else:
+                start_remove(
+                    startup_settings=startup_variables,
+                    torrent_sync=active_torrent_sync,
+                    torrent_store=active_torrent_store,
+                    notifier=notifier,
+                    ratio_forecast=active_ratio_forecast,
+                    directory_index=active_directory_index,
+                    call_limiter=call_limiter,
+                    circuit_breaker=circuit_breaker,
+                )
+            # Moves the seeding torrents that match the migration policy after the removals.
+            if startup_variables.migration_settings:
+                start_migrate(
+                    startup_settings=startup_variables,
+                    torrent_sync=active_torrent_sync,
+                    torrent_store=active_torrent_store,
+                    notifier=notifier,
+                    call_limiter=call_limiter,
+                    circuit_breaker=circuit_breaker,
+                )
+    finally:
+        # The trace is also written after a failed check, so the failing call shows in the trace.
+        TRACER.write()
+    if notifier:
+        # Sends the digest without waiting for the delivery.
+        notifier.flush(timeout=0)
+    cycle_duration = perf_counter() - cycle_start
+    METRICS.observe("cycle_duration_seconds", cycle_duration)
+    logger.info(METRICS.cycle_summary(duration=cycle_duration, **server_labels))
+
+    if active_ratio_forecast:
+        # Sleeps until the next torrent is predicted to reach the removal ratio.
+        return active_ratio_forecast.next_sleep(
+            min_sleep=startup_variables.min_remove_sleep, max_sleep=startup_variables.max_remove_sleep
+        )
+    return startup_variables.remove_sleep
+
+
+def report_check_error(
+    startup_variables: StartupSettings, exc: Exception, notifier: Union[Notifier, None] = None
+) -> Union[GeneralTransmissionExtError, None]:
+    """
+    Logs a failed removal check and sends the program error email.
+
+    Args:
+        startup_variables (StartupSettings):
+        \t\\- The startup settings.
+        exc (Exception):
+        \t\\- The exception raised by the check.
+        notifier (Notifier, optional):
+        \t\\- The background notifier. The queued alerts are delivered first. Defaults to None.
+
+    Returns:
+        Union[GeneralTransmissionExtError, None]:
+        \t\\- The general exception that wraps an unhandled exception or None when the exception was already handled.
+    """
+    logger = logging.getLogger(__name__)
+    # ################################################
+    # ############Cataches For Email Alerts###########
+    # ################################################
+    # The open circuit error repeats each check until the daemon is back. The failure that opened the circuit was reported.
+    circuit_open: bool = isinstance(exc, CircuitOpenError)
+    exc_args: Union[dict, None] = None
+    # Raises handled fexception's or creates a general exception depending on what is trigged.
+    if "Exception Trace Details:" not in str(exc):
+        exc_args = {
+            "main_message": f"A general exception trigged while running a remove job. See below for more details.",
+            "original_exception": exc,
+            "custom_type": GeneralTransmissionExtError,
+        }
+        exc = get_ext_error(exc_args=exc_args)
+
+    if notifier:
+        # Delivers the queued alerts before the program exits.
+        notifier.flush(timeout=30)
+
+    # Catches exceptions to email notifications.
+    # Checks if program errors get emailed.
+    if startup_variables.alert_program_errors and not circuit_open:
+        from ictoolkit import send_email
+
+        # Converts the dataclass to a dictionary.
+        email_settings_asdict: dict = asdict(startup_variables.email_settings)
+
+        subject = "Transmission Remove - Exiting Program Error Occurred"
+        if startup_variables.server_name:
+            subject = f"{subject} ({startup_variables.server_name})"
+        try:
+            send_email(email_settings=email_settings_asdict, subject=subject, body=str(exc))
+        except Exception as email_exc:
+            # A failed alert does not stop the next checks.
+            logger.error("The program error email could not be sent. Exception: %s", email_exc)
+
+    # Returns the exception based on the thrown a handled fexception or unhandled exception.
+    if exc_args:
+        logger.error(GeneralTransmissionExtError(exc))
+        return GeneralTransmissionExtError(exc)
+    logger.error(exc)
+    return None
+
+
+def run_server_checks(
+    startup_variables: StartupSettings,
+    server_states: dict[str, ServerState],
+    notifier: Union[Notifier, None] = None,
+) -> int:
+    """
+    Runs one removal check for each server at the same time.
+
+    Each server check runs in its own thread with its own client, so a slow or dead
+    server does not delay the others. A failed server check is reported without
+    stopping the other checks.
+
+    Args:
+        startup_variables (StartupSettings):
+        \t\\- The startup settings.
+        server_states (dict[str, ServerState]):
+        \t\\- The state kept between checks by server name. Missing servers are added with a new state.
+        notifier (Notifier, optional):
+        \t\\- The background notifier shared by the servers. Defaults to None.
+
+    Raises:
+        GeneralTransmissionExtError:
+        \t\\- A general exception trigged while running a remove job.
+
+    Returns:
+        int:
+        \t\\- The seconds to sleep until the next check of the soonest server.
+    """
+    server_settings = get_server_settings(startup_variables=startup_variables)
+    for settings in server_settings:
+        if settings.server_name not in server_states:
+            server_states[settings.server_name] = ServerState(
+                torrent_sync=TorrentSync(),
+                torrent_store=TorrentStore(),
+                ratio_forecast=RatioForecast(),
+                directory_index=DirectoryIndex(),
+                call_limiter=CallLimiter(),
+                circuit_breaker=CircuitBreaker(name="transmission"),
             )
 
-        # Raises the exception based on the thrown a handled fexception or unhandled exception.
-        if exc_args:
-            logger.error(GeneralTransmissionExtError(exc))
-            raise GeneralTransmissionExtError(exc)
-        else:
-            logger.error(exc)
+    def run_server_check(settings: StartupSettings) -> int:
+        server_state = server_states[settings.server_name]
+        try:
+            return run_check(
+                startup_variables=settings,
+                torrent_sync=server_state.torrent_sync,
+                torrent_store=server_state.torrent_store,
+                notifier=notifier,
+                ratio_forecast=server_state.ratio_forecast,
+                directory_index=server_state.directory_index,
+                call_limiter=server_state.call_limiter,
+                circuit_breaker=server_state.circuit_breaker,
+            )
+        except Exception as exc:
+            general_exc = report_check_error(startup_variables=settings, exc=exc, notifier=notifier)
+            if general_exc:
+                raise general_exc
             raise
 
+    if len(server_settings) == 1:
+        return run_server_check(server_settings[0])
+
+    logger = logging.getLogger(__name__)
+    next_sleeps: list[int] = []
+    with ThreadPoolExecutor(max_workers=len(server_settings), thread_name_prefix="server") as executor:
+        futures = [(settings, executor.submit(run_server_check, settings)) for settings in server_settings]
+    for settings, future in futures:
+        try:
+            next_sleeps.append(future.result())
+        except Exception:
+            # The error was logged and emailed by the server check.
+            logger.warning("The removal check of the server (%s) failed", settings.server_name)
+            next_sleeps.append(settings.remove_sleep)
+    return min(next_sleeps)
+
+
+def main(
+    torrent_sync: Union[TorrentSync, None] = None,
+    torrent_store: Union[TorrentStore, None] = None,
+    settings_cache: Union[SettingsCache, None] = None,
+    notifier: Union[Notifier, None] = None,
+    ratio_forecast: Union[RatioForecast, None] = None,
+    server_states: Union[dict[str, ServerState], None] = None,
+):
+    """
+    Runs one removal check and sleeps until the next check. The daemon module runs the checks as a service.
+
+    The torrent table, state database and ratio forecast are used by the single connection
+    server. The servers in the connection servers list keep their state in server_states.
+    """
+    # ############################################################################################
+    # ######################Gets the programs main root directory/YAML File Path##################
+    # ############################################################################################
+    # Gets the main program root directory.
+    main_script_path = pathlib.Path.cwd()
+    prepare_log_directory(main_script_path=main_script_path)
+
+    # Sets the YAML file configuration location.
+    yaml_file_path = os.path.abspath(f"{main_script_path}/settings.yaml")
+
+    # The settings cache is kept between loops, so unchanged settings are not reloaded.
+    if not settings_cache or settings_cache.path != yaml_file_path:
+        settings_cache = SettingsCache(path=yaml_file_path)
+    startup_variables = load_settings(settings_cache=settings_cache)
+    logger = logging.getLogger(__name__)
+
+    if server_states is None:
+        server_states = {}
+    if "" not in server_states:
+        server_states[""] = ServerState(
+            torrent_sync=torrent_sync,
+            torrent_store=torrent_store,
+            ratio_forecast=ratio_forecast,
+            directory_index=DirectoryIndex(),
+            call_limiter=CallLimiter(),
+            circuit_breaker=CircuitBreaker(name="transmission"),
+        )
+    remove_sleep = run_server_checks(
+        startup_variables=startup_variables, server_states=server_states, notifier=notifier
+    )
+    logger.info("%s seconds until next torrent remove check", remove_sleep)
+    # Sleeps for the amount of seconds set in the YAML file.
+    with METRICS.timer("phase_duration_seconds", phase="sleep"):
+        sleep(remove_sleep)
+
 
 # Checks that this is the main program that initiates the classes to start the functions.
 if __name__ == "__main__":
@@ -306,19 +1118,7 @@ if __name__ == "__main__":
     print("Status: " + __status__)
     print("# " + "=" * 85)
 
-    try:
-        # Loops to keep the main program active.
-        # The YAML configuration file will contain a sleep setting within the main function.
-        while True:
-            main()
-            # 5-second delay sleep to prevent system resource issues if the function fails and the loop runs without any pause.
-            sleep(5)
-    # Catches ctrl + c
-    except KeyboardInterrupt:
-        print("\nKeyboard interruption. Exiting...")
-        exit()
-    # Catches ctrl + z
-    # Input box failure (ex: ctrl + z) will throw this exception.
-    except EOFError:
-        print("Keyboard interruption. Exiting...")
-        exit()
+    # The daemon initializes once and runs the checks on a schedule with signal handling.
+    from daemon import run
+
+    sys.exit(run())
@@ -0,0 +1,417 @@
+"""This module is designed to move the data of seeding torrents to another storage location and point Transmission at the new location."""
+# Built-in/Generic Imports
+import os
+import time
+import logging
+from collections import defaultdict
+from concurrent.futures import Future, as_completed
+from typing import Union
+
+# Local Functions
+from common.common import get_function_name
+from migrate.transfer import DeviceLimiter, TransferPool, get_device, get_partial_path
+from remove.delete import DeletionPool
+from remove.remove import get_torrent_path, get_torrents, notify
+from remove.store import TorrentStore
+from remove.sync import TorrentSync
+
+# Local Clients
+from common.metrics import METRICS
+from common.tracing import TRACER
+from common.limiter import CallLimiter
+from common.resilience import TRANSIENT_ERRORS, CircuitBreaker
+from common.notify import Notifier
+from common.rpc import TransmissionRPC
+from common.remote import TransmissionRemote
+
+# Local Dataclasses
+from common.common import CopyResult, DeletionResult, StartupSettings, Torrent
+
+# Local Exceptions
+from common.common import CircuitOpenError
+
+# Libraries
+from fchecker.type import type_check
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, migrate"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+def get_migration_path(startup_settings: StartupSettings, torrent: Torrent, location: str) -> str:
+    """
+    Gets the torrent path on the local system in another download location.
+
+    Args:
+        startup_settings (StartupSettings):
+        \t\\- The startup settings.
+        torrent (Torrent):
+        \t\\- The torrent details.
+        location (str):
+        \t\\- The Transmission download directory.
+
+    Returns:
+        str:
+        \t\\- The torrent path.
+    """
+    return os.path.abspath(f"{startup_settings.root_download_path}/{location}/{torrent.name}")
+
+
+def is_location(location: str, other_location: str) -> bool:
+    """
+    Checks if two Transmission download directories are the same folder.
+
+    Args:
+        location (str):
+        \t\\- The download directory.
+        other_location (str):
+        \t\\- The other download directory.
+
+    Returns:
+        bool:
+        \t\\- True when the directories are the same folder.
+    """
+    return os.path.normpath(location) == os.path.normpath(other_location)
+
+
+def get_migratable_torrents(startup_settings: StartupSettings, torrents: list[Torrent]) -> list[Torrent]:
+    """
+    Gets the torrents that match the migration policy.
+
+    Only finished downloads outside the target location are moved.
+
+    Args:
+        startup_settings (StartupSettings):
+        \t\\- The startup settings.
+        torrents (list[Torrent]):
+        \t\\- The torrents.
+
+    Returns:
+        list[Torrent]:
+        \t\\- The torrents to move.
+    """
+    migration_settings = startup_settings.migration_settings
+    target_root = os.path.normpath(migration_settings.target_location)
+    candidate_torrents = [
+        torrent
+        for torrent in torrents
+        if torrent.percent_done >= 1.0
+        and not is_location(torrent.location, target_root)
+        # A location under the target location is already on the target storage.
+        and not os.path.normpath(torrent.location).startswith(f"{target_root.rstrip('/')}/")
+    ]
+    return migration_settings.migration_policy.select(torrents=candidate_torrents)
+
+
+def get_device_limits(startup_settings: StartupSettings) -> dict[int, int]:
+    """
+    Gets the device concurrency limits by device ID.
+
+    Args:
+        startup_settings (StartupSettings):
+        \t\\- The startup settings.
+
+    Returns:
+        dict[int, int]:
+        \t\\- The most copies at once by device ID.
+    """
+    logger = logging.getLogger(__name__)
+
+    device_limits: dict[int, int] = {}
+    for location, limit in startup_settings.migration_settings.device_limits.items():
+        path = os.path.abspath(f"{startup_settings.root_download_path}/{location}")
+        try:
+            device_limits[get_device(path)] = limit
+        except OSError as exc:
+            logger.warning("The device limit of the location (%s) is not used. Exception: %s", location, exc)
+    return device_limits
+
+
+def set_migrated_locations(
+    startup_settings: StartupSettings,
+    client: Union[TransmissionRPC, TransmissionRemote],
+    torrents: list[Torrent],
+    target_location: str,
+    notifier: Union[Notifier, None] = None,
+) -> list[Torrent]:
+    """
+    Points Transmission at the copied data with one location change call and verifies the new location with one follow-up query.
+
+    The torrents are addressed by hash because IDs change after a Transmission restart, so
+    transmission-remote makes one call for each torrent.
+
+    A Transmission call that still fails after its retries only fails these torrents. The
+    copies stay in place and the location change is retried on the next check.
+
+    Args:
+        startup_settings (StartupSettings):
+        \t\\- The startup settings.
+        client (Union[TransmissionRPC, TransmissionRemote]):
+        \t\\- The connected Transmission client.
+        torrents (list[Torrent]):
+        \t\\- The torrents with the copied data.
+        target_location (str):
+        \t\\- The Transmission download directory of the copies.
+        notifier (Notifier, optional):
+        \t\\- The background notifier. The emails are sent right away when not set. Defaults to None.
+
+    Returns:
+        list[Torrent]:
+        \t\\- The torrent details from Transmission for the torrents that confirmed the new location.
+    """
+    logger = logging.getLogger(__name__)
+
+    start = time.perf_counter()
+    # Hashes are used when available because IDs change after a Transmission restart.
+    torrent_ids: list[Union[int, str]] = [torrent.hash or torrent.id for torrent in torrents]
+    try:
+        # The data is already at the target location, so Transmission only looks for it there.
+        if not client.set_location(ids=torrent_ids, location=target_location, move=False):
+            for torrent in torrents:
+                logger.error("The torrent (%s) location did not change in Transmission successfully", torrent.name)
+                notify(
+                    startup_settings=startup_settings,
+                    notifier=notifier,
+                    subject="Error: Transmission Torrent Migration Failed",
+                    body=f"Transmission did not return a successful response during the torrent ({torrent.name}) location change.",
+                )
+            return []
+        confirmed_torrents = [
+            torrent for torrent in client.get_torrents(ids=torrent_ids) if is_location(torrent.location, target_location)
+        ]
+    except (CircuitOpenError, *TRANSIENT_ERRORS) as exc:
+        for torrent in torrents:
+            logger.error(
+                "The torrent (%s) location change could not be completed and is retried on the next check. Exception: %s",
+                torrent.name,
+                exc,
+            )
+        METRICS.inc("torrent_errors", len(torrents), stage="migrate")
+        return []
+
+    confirmed_hashes = {torrent.hash for torrent in confirmed_torrents}
+    for torrent in torrents:
+        if torrent.hash in confirmed_hashes:
+            logger.info("The torrent (%s) moved to %s", torrent.name, target_location)
+        else:
+            logger.warning("Transmission did not confirm the torrent (%s) location. Retrying on the next check", torrent.name)
+    METRICS.inc("torrents_migrated", len(confirmed_torrents))
+    TRACER.record("set_location", start, torrents=len(torrents), confirmed=len(confirmed_torrents))
+    return confirmed_torrents
+
+
+def start_migrate(
+    startup_settings: StartupSettings,
+    torrent_sync: Union[TorrentSync, None] = None,
+    torrent_store: Union[TorrentStore, None] = None,
+    notifier: Union[Notifier, None] = None,
+    call_limiter: Union[CallLimiter, None] = None,
+    circuit_breaker: Union[CircuitBreaker, None] = None,
+) -> None:
+    """
+    Starts the migration of the torrents that match the migration policy to the target location.
+
+    The data of each torrent is copied by the transfer pool within the device limits. As
+    the copies complete, Transmission is pointed at them in batched location change
+    calls. The source data is deleted after Transmission confirms the new location, so
+    the torrents keep seeding the whole time.
+
+    An interrupted migration continues on the next check. The partial copy is continued,
+    and a complete copy only needs the location change. The state database records the
+    source location, so the source data is deleted after an interrupted location change.
+
+    Args:
+        startup_settings (StartupSettings):
+        \t\\- The startup settings.
+        torrent_sync (TorrentSync, optional):
+        \t\\- The torrent table kept between checks. Every torrent is fetched when not set. Defaults to None.
+        torrent_store (TorrentStore, optional):
+        \t\\- The store that records the in-flight migrations. Defaults to None.
+        notifier (Notifier, optional):
+        \t\\- The background notifier. The emails are sent right away when not set. Defaults to None.
+        call_limiter (CallLimiter, optional):
+        \t\\- The limiter kept between checks that the client calls wait for. Defaults to None.
+        circuit_breaker (CircuitBreaker, optional):
+        \t\\- The circuit breaker of the Transmission daemon kept between checks. Defaults to None.
+
+    Raises:
+        FTypeError (fexception):
+        \t\\- The object value '{startup_settings}' is not an instance of the required class(es) or subclass(es).
+        TransmissionExtError:
+        \t\\- Transmission Remove was not able to detect an installed version of transmission-remote.
+        CircuitOpenError:
+        \t\\- The transmission circuit is open after repeated failures.
+    """
+    logger = logging.getLogger(__name__)
+    logger.debug("=" * 20 + "%s" + "=" * 20, get_function_name())
+    # Custom flowchart tracking. This is ideal for large projects that move a lot.
+    # For any third-party modules, set the flow before making the function call.
+    logger_flowchart = logging.getLogger("flowchart")
+    logger_flowchart.debug("Flowchart --> Function: %s", get_function_name())
+
+    type_check(value=startup_settings, required_type=StartupSettings)
+    migration_settings = startup_settings.migration_settings
+    if not migration_settings:
+        return
+
+    start = time.perf_counter()
+    client, torrents = get_torrents(
+        startup_settings=startup_settings,
+        torrent_sync=torrent_sync,
+        call_limiter=call_limiter,
+        circuit_breaker=circuit_breaker,
+    )
+    try:
+        torrents = list(torrents)
+        torrents_by_hash: dict[str, Torrent] = {torrent.hash: torrent for torrent in torrents}
+
+        # Holds the torrents to copy with their target location.
+        migrations: list[tuple[Torrent, str]] = []
+        # Holds the torrents that moved before the source data was deleted. The torrent location is the source location.
+        moved_torrents: list[Torrent] = []
+        # Holds the abandoned migrations and their partial copies.
+        abandoned_torrents: list[Torrent] = []
+        abandoned_paths: list[str] = []
+        pending_hashes: set[str] = set()
+        if torrent_store:
+            for recorded_torrent, target_location in torrent_store.pending_migrations():
+                pending_hashes.add(recorded_torrent.hash)
+                torrent = torrents_by_hash.get(recorded_torrent.hash)
+                if torrent is None:
+                    # The torrent was removed. The partial copy is not needed anymore.
+                    logger.info("The migrating torrent (%s) is not in Transmission. Dropping its partial copy", recorded_torrent.name)
+                    partial_path = get_partial_path(
+                        get_migration_path(startup_settings=startup_settings, torrent=recorded_torrent, location=target_location)
+                    )
+                    if os.path.lexists(partial_path):
+                        abandoned_paths.append(partial_path)
+                    abandoned_torrents.append(recorded_torrent)
+                elif is_location(torrent.location, target_location):
+                    moved_torrents.append(recorded_torrent)
+                else:
+                    migrations.append((torrent, target_location))
+        new_torrents: list[Torrent] = [
+            torrent
+            for torrent in get_migratable_torrents(startup_settings=startup_settings, torrents=torrents)
+            if torrent.hash not in pending_hashes
+        ]
+        if torrent_store:
+            torrent_store.begin_migrations(torrents=new_torrents, target_location=migration_settings.target_location)
+            torrent_store.finish_migrations(torrents=abandoned_torrents)
+        migrations += [(torrent, migration_settings.target_location) for torrent in new_torrents]
+        if not migrations and not moved_torrents and not abandoned_paths:
+            return
+        logger.info("Migrating %s torrent(s)", len(migrations))
+
+        transfer_pool = TransferPool(
+            workers=migration_settings.copy_workers,
+            device_limiter=DeviceLimiter(
+                default_limit=migration_settings.device_concurrency, limits=get_device_limits(startup_settings=startup_settings)
+            ),
+        )
+        deletion_pool = DeletionPool(
+            tree_workers=startup_settings.deletion_workers, file_workers=startup_settings.deletion_file_workers
+        )
+        try:
+            copies: dict["Future[CopyResult]", tuple[Torrent, str]] = {
+                transfer_pool.submit(
+                    source=get_torrent_path(startup_settings=startup_settings, torrent=torrent),
+                    target=get_migration_path(startup_settings=startup_settings, torrent=torrent, location=target_location),
+                ): (torrent, target_location)
+                for torrent, target_location in migrations
+            }
+            # Holds the copied torrents by target location until a location change batch is full.
+            copied_torrents: dict[str, list[Torrent]] = defaultdict(list)
+            for copy_future in as_completed(copies):
+                torrent, target_location = copies[copy_future]
+                copy_result = copy_future.result()
+                if copy_result.errors:
+                    METRICS.inc("torrent_errors", stage="migrate")
+                    logger.error(
+                        "The torrent (%s) data could not be copied and the copy continues on the next check. Errors: %s",
+                        torrent.name,
+                        copy_result.errors,
+                    )
+                    notify(
+                        startup_settings=startup_settings,
+                        notifier=notifier,
+                        subject="Error: Transmission Torrent Migration Failed",
+                        body=f"The torrent ({torrent.name}) data could not be copied to {target_location}.\n\n"
+                        + "\n".join(copy_result.errors),
+                    )
+                    continue
+                METRICS.inc("bytes_migrated", copy_result.bytes_copied)
+                copied_torrents[target_location].append(torrent)
+                if len(copied_torrents[target_location]) >= migration_settings.set_location_batch:
+                    moved_torrents += _move_torrents(
+                        startup_settings=startup_settings,
+                        client=client,
+                        torrents=copied_torrents.pop(target_location),
+                        target_location=target_location,
+                        torrent_sync=torrent_sync,
+                        notifier=notifier,
+                    )
+            for target_location, batch_torrents in copied_torrents.items():
+                moved_torrents += _move_torrents(
+                    startup_settings=startup_settings,
+                    client=client,
+                    torrents=batch_torrents,
+                    target_location=target_location,
+                    torrent_sync=torrent_sync,
+                    notifier=notifier,
+                )
+
+            # Deletes the source data of the torrents that Transmission confirmed at the new location.
+            deletions: list[tuple[Torrent, "Future[DeletionResult]"]] = [
+                (torrent, deletion_pool.submit(get_torrent_path(startup_settings=startup_settings, torrent=torrent)))
+                for torrent in moved_torrents
+            ]
+            for partial_path in abandoned_paths:
+                deletion_pool.submit(partial_path)
+            finished_torrents: list[Torrent] = []
+            for torrent, deletion_future in deletions:
+                deletion_result = deletion_future.result()
+                if deletion_result.errors:
+                    logger.error(
+                        "The torrent (%s) source data was not fully deleted after the migration. Errors: %s",
+                        torrent.name,
+                        deletion_result.errors,
+                    )
+                    continue
+                finished_torrents.append(torrent)
+            if torrent_store:
+                torrent_store.finish_migrations(torrents=finished_torrents)
+        finally:
+            transfer_pool.shutdown(wait=True)
+            deletion_pool.shutdown(wait=True)
+    finally:
+        client.close()
+    METRICS.observe("phase_duration_seconds", time.perf_counter() - start, phase="migrate")
+
+
+def _move_torrents(
+    startup_settings: StartupSettings,
+    client: Union[TransmissionRPC, TransmissionRemote],
+    torrents: list[Torrent],
+    target_location: str,
+    torrent_sync: Union[TorrentSync, None],
+    notifier: Union[Notifier, None],
+) -> list[Torrent]:
+    """Changes the location of one batch and updates the torrent table. Returns the moved torrents at their source location."""
+    confirmed_torrents = set_migrated_locations(
+        startup_settings=startup_settings,
+        client=client,
+        torrents=torrents,
+        target_location=target_location,
+        notifier=notifier,
+    )
+    if torrent_sync:
+        # The location change is not a torrent activity, so the delta sync would keep the old location.
+        torrent_sync.update(torrents=confirmed_torrents)
+    confirmed_hashes = {torrent.hash for torrent in confirmed_torrents}
+    return [torrent for torrent in torrents if torrent.hash in confirmed_hashes]
@@ -0,0 +1,344 @@
+"""This module is designed to copy torrent data to another storage device in parallel with resumable copy-then-rename workers."""
+# Built-in/Generic Imports
+import os
+import stat
+import shutil
+import logging
+import threading
+from contextlib import ExitStack, contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator, Union
+
+# Local Functions
+from common.tracing import TRACER
+
+# Local Dataclasses
+from common.common import CopyResult
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, transfer"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+# The bytes read and written at once. A resumed file copies its last whole chunk again.
+COPY_CHUNK_SIZE: int = 8 * 1024**2
+# The copy is written next to the target under a hidden name and renamed into place when complete.
+PARTIAL_SUFFIX: str = ".partial"
+
+
+def get_partial_path(target: str) -> str:
+    """
+    Gets the path the copy is written to before it is renamed to the target.
+
+    Args:
+        target (str):
+        \t\\- The target path.
+
+    Returns:
+        str:
+        \t\\- The partial copy path in the target folder.
+    """
+    target_directory, target_name = os.path.split(target)
+    return os.path.join(target_directory, f".{target_name}{PARTIAL_SUFFIX}")
+
+
+def _copy_file(source_path: str, target_path: str, source_stat: os.stat_result) -> int:
+    """
+    Copies one file. A partial copy from an earlier run is continued.
+
+    The source modification time is set after the last byte is synced, so a target file
+    with the source size and modification time is complete and skipped.
+
+    Args:
+        source_path (str):
+        \t\\- The source file path.
+        target_path (str):
+        \t\\- The target file path.
+        source_stat (os.stat_result):
+        \t\\- The source file stat.
+
+    Returns:
+        int:
+        \t\\- The bytes written.
+    """
+    try:
+        target_stat: Union[os.stat_result, None] = os.stat(target_path)
+    except FileNotFoundError:
+        target_stat = None
+    if (
+        target_stat is not None
+        and target_stat.st_size == source_stat.st_size
+        and target_stat.st_mtime_ns == source_stat.st_mtime_ns
+    ):
+        return 0
+
+    offset = 0
+    if target_stat is not None and target_stat.st_size <= source_stat.st_size:
+        # The last chunk is copied again, so a tail lost in a crash is rewritten.
+        offset = max(target_stat.st_size // COPY_CHUNK_SIZE - 1, 0) * COPY_CHUNK_SIZE
+    with open(source_path, "rb") as source_file, open(target_path, "r+b" if target_stat else "wb") as target_file:
+        source_file.seek(offset)
+        target_file.seek(offset)
+        target_file.truncate()
+        shutil.copyfileobj(source_file, target_file, COPY_CHUNK_SIZE)
+        target_file.flush()
+        # The source is deleted after the migration, so the copy must be on disk first.
+        os.fsync(target_file.fileno())
+    shutil.copymode(source_path, target_path)
+    os.utime(target_path, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+    return source_stat.st_size - offset
+
+
+def _list_tree(path: str) -> tuple[list[str], list[tuple[str, os.stat_result]]]:
+    """
+    Lists a file or folder tree without following symlinks.
+
+    Args:
+        path (str):
+        \t\\- The file or folder.
+
+    Returns:
+        tuple[list[str], list[tuple[str, os.stat_result]]]:
+        \t\\- The folder paths relative to the path with parents first, and the relative file paths with their stat.
+    """
+    path_stat = os.lstat(path)
+    if not stat.S_ISDIR(path_stat.st_mode):
+        return [], [("", path_stat)]
+
+    directories: list[str] = []
+    files: list[tuple[str, os.stat_result]] = []
+    pending_directories: list[str] = [""]
+    while pending_directories:
+        directory = pending_directories.pop()
+        directories.append(directory)
+        with os.scandir(os.path.join(path, directory)) as entries:
+            for entry in entries:
+                relative_path = os.path.join(directory, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    pending_directories.append(relative_path)
+                else:
+                    files.append((relative_path, entry.stat(follow_symlinks=False)))
+    return directories, files
+
+
+def _matches_tree(source: str, target: str) -> bool:
+    """
+    Checks that the target holds the same files with the same sizes as the source.
+
+    Args:
+        source (str):
+        \t\\- The source file or folder.
+        target (str):
+        \t\\- The target file or folder.
+
+    Returns:
+        bool:
+        \t\\- True when the file names and sizes match.
+    """
+    try:
+        _, source_files = _list_tree(source)
+        _, target_files = _list_tree(target)
+    except OSError:
+        return False
+    return {path: file_stat.st_size for path, file_stat in source_files} == {
+        path: file_stat.st_size for path, file_stat in target_files
+    }
+
+
+def copy_tree(source: str, target: str) -> CopyResult:
+    """
+    Copies a file or folder tree and renames the complete copy to the target.
+
+    The copy is written to the partial path next to the target, so an interrupted copy
+    never shows at the target. A later copy continues the partial copy. A target that
+    already holds the same files is a complete copy from an earlier run. Symlinks are
+    copied as symlinks and never followed.
+
+    Args:
+        source (str):
+        \t\\- The file or folder to copy.
+        target (str):
+        \t\\- The target path.
+
+    Returns:
+        CopyResult:
+        \t\\- The copy result. Errors are returned in the result instead of raised.
+    """
+    result = CopyResult(path=target, bytes_copied=0, files_copied=0, errors=[])
+
+    if os.path.lexists(target):
+        if not _matches_tree(source=source, target=target):
+            result.errors.append(f"{target}: The target exists and does not match the source")
+        return result
+
+    partial_path = get_partial_path(target)
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        directories, files = _list_tree(source)
+        for directory in directories:
+            os.makedirs(os.path.join(partial_path, directory), exist_ok=True)
+    except OSError as exc:
+        result.errors.append(f"{source}: {exc}")
+        return result
+
+    for relative_path, file_stat in files:
+        source_path = os.path.join(source, relative_path) if relative_path else source
+        target_path = os.path.join(partial_path, relative_path) if relative_path else partial_path
+        try:
+            if stat.S_ISLNK(file_stat.st_mode):
+                if not os.path.lexists(target_path):
+                    os.symlink(os.readlink(source_path), target_path)
+                continue
+            written = _copy_file(source_path=source_path, target_path=target_path, source_stat=file_stat)
+        except OSError as exc:
+            result.errors.append(f"{source_path}: {exc}")
+            continue
+        if written:
+            result.bytes_copied += written
+            result.files_copied += 1
+
+    if result.errors:
+        # The partial copy is continued by the next copy.
+        return result
+    try:
+        os.rename(partial_path, target)
+        # Syncs the target folder, so the rename is on disk before the source is deleted.
+        directory_descriptor = os.open(os.path.dirname(target), os.O_RDONLY)
+        try:
+            os.fsync(directory_descriptor)
+        finally:
+            os.close(directory_descriptor)
+    except OSError as exc:
+        result.errors.append(f"{target}: {exc}")
+    return result
+
+
+def get_device(path: str) -> int:
+    """
+    Gets the storage device of a path. A missing path uses the device of its nearest existing parent.
+
+    Args:
+        path (str):
+        \t\\- The path.
+
+    Returns:
+        int:
+        \t\\- The device ID.
+    """
+    path = os.path.abspath(path)
+    while True:
+        try:
+            return os.stat(path).st_dev
+        except FileNotFoundError:
+            parent = os.path.dirname(path)
+            if parent == path:
+                raise
+            path = parent
+
+
+class DeviceLimiter(object):
+    """
+    Limits the copies that read from or write to each storage device at once.
+
+    A copy holds a slot on the source device and the target device. The slots are taken
+    in device order, so two copies between the same devices cannot wait on each other.
+
+    Args:
+        default_limit (int):
+        \t\\- The most copies on one device at once.
+        limits (dict[int, int], optional):
+        \t\\- The limits by device ID that replace the default limit. Defaults to None.
+    """
+
+    def __init__(self, default_limit: int, limits: Union[dict[int, int], None] = None) -> None:
+        self.default_limit = max(default_limit, 1)
+        self.limits = limits or {}
+        self._lock = threading.Lock()
+        self._semaphores: dict[int, threading.Semaphore] = {}
+
+    def _semaphore(self, device: int) -> threading.Semaphore:
+        with self._lock:
+            semaphore = self._semaphores.get(device)
+            if semaphore is None:
+                semaphore = threading.Semaphore(max(self.limits.get(device, self.default_limit), 1))
+                self._semaphores[device] = semaphore
+            return semaphore
+
+    @contextmanager
+    def acquire(self, paths: list[str]) -> Iterator[None]:
+        """
+        Waits for a slot on the device of each path and holds the slots for the block.
+
+        Args:
+            paths (list[str]):
+            \t\\- The paths the block reads from or writes to.
+        """
+        with ExitStack() as stack:
+            for device in sorted({get_device(path) for path in paths}):
+                semaphore = self._semaphore(device)
+                semaphore.acquire()
+                stack.callback(semaphore.release)
+            yield
+
+
+class TransferPool(object):
+    """
+    Bounded worker pool that copies several torrents in parallel within the device limits.
+
+    Submitting a copy returns right away with a future for the copy result.
+
+    Args:
+        workers (int):
+        \t\\- The most torrents copied at once.
+        device_limiter (DeviceLimiter):
+        \t\\- The limiter of the copies on each device.
+    """
+
+    def __init__(self, workers: int, device_limiter: DeviceLimiter) -> None:
+        self.device_limiter = device_limiter
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="transfer")
+
+    def submit(self, source: str, target: str) -> "Future[CopyResult]":
+        """
+        Queues a file or folder copy.
+
+        Args:
+            source (str):
+            \t\\- The file or folder to copy.
+            target (str):
+            \t\\- The target path.
+
+        Returns:
+            Future[CopyResult]:
+            \t\\- The future copy result.
+        """
+        logger = logging.getLogger(__name__)
+        logger.debug("Queued the torrent path (%s) for a copy to (%s)", source, target)
+        return self._executor.submit(self._copy_tree, source, target)
+
+    def _copy_tree(self, source: str, target: str) -> CopyResult:
+        """Copies one queued path on a worker within the device limits."""
+        try:
+            device_slots = self.device_limiter.acquire(paths=[source, target])
+            with device_slots, TRACER.span("copy", path=source) as span_args:
+                copy_result = copy_tree(source=source, target=target)
+                span_args["files_copied"] = copy_result.files_copied
+                span_args["bytes_copied"] = copy_result.bytes_copied
+        except OSError as exc:
+            return CopyResult(path=target, bytes_copied=0, files_copied=0, errors=[f"{source}: {exc}"])
+        return copy_result
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops the workers.
+
+        Args:
+            wait (bool, optional):
+            \t\\- Waits for the queued copies to finish. Defaults to True.
+        """
+        self._executor.shutdown(wait=wait)
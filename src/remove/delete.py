@@ -0,0 +1,180 @@
+"""This module is designed to delete torrent folders in parallel without blocking the removal loop."""
+# Built-in/Generic Imports
+import os
+import stat
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Union
+
+# Local Functions
+from common.tracing import TRACER
+
+# Local Dataclasses
+from common.common import DeletionResult
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, delete"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+# Trees with fewer files are unlinked on the tree worker without the file pool overhead.
+PARALLEL_UNLINK_THRESHOLD: int = 32
+
+
+def _unlink(file_path: str, size: int) -> tuple[int, Union[str, None]]:
+    """
+    Unlinks one file.
+
+    Args:
+        file_path (str):
+        \t\\- The file path.
+        size (int):
+        \t\\- The file size in bytes.
+
+    Returns:
+        tuple[int, Union[str, None]]:
+        \t\\- The freed bytes and the error message or None.
+    """
+    try:
+        os.unlink(file_path)
+    except FileNotFoundError:
+        return 0, None
+    except OSError as exc:
+        return 0, f"{file_path}: {exc}"
+    return size, None
+
+
+def delete_tree(path: str, file_executor: Union[ThreadPoolExecutor, None] = None) -> DeletionResult:
+    """
+    Deletes a file or folder tree.
+
+    The tree is walked with os.scandir. Files are unlinked concurrently on the file executor
+    for large trees, and the folders are removed bottom-up afterward. Symlinks are removed
+    and never followed.
+
+    Args:
+        path (str):
+        \t\\- The file or folder to delete.
+        file_executor (ThreadPoolExecutor, optional):
+        \t\\- The executor that unlinks files concurrently. Defaults to None.
+
+    Returns:
+        DeletionResult:
+        \t\\- The deletion result. Errors are returned in the result instead of raised.
+    """
+    result = DeletionResult(path=path, bytes_freed=0, files_removed=0, errors=[])
+
+    try:
+        path_stat = os.lstat(path)
+    except FileNotFoundError:
+        return result
+    except OSError as exc:
+        result.errors.append(f"{path}: {exc}")
+        return result
+
+    if not stat.S_ISDIR(path_stat.st_mode):
+        freed, error = _unlink(file_path=path, size=path_stat.st_size)
+        result.bytes_freed += freed
+        result.files_removed += 0 if error else 1
+        if error:
+            result.errors.append(error)
+        return result
+
+    # Parents are listed before their children, so the reversed list removes children first.
+    directories: list[str] = []
+    files: list[tuple[str, int]] = []
+    pending_directories: list[str] = [path]
+    while pending_directories:
+        directory = pending_directories.pop()
+        directories.append(directory)
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending_directories.append(entry.path)
+                        else:
+                            files.append((entry.path, entry.stat(follow_symlinks=False).st_size))
+                    except OSError as exc:
+                        result.errors.append(f"{entry.path}: {exc}")
+        except OSError as exc:
+            result.errors.append(f"{directory}: {exc}")
+
+    if file_executor and len(files) >= PARALLEL_UNLINK_THRESHOLD:
+        outcomes = file_executor.map(lambda file: _unlink(*file), files)
+    else:
+        outcomes = map(lambda file: _unlink(*file), files)
+    for freed, error in outcomes:
+        if error:
+            result.errors.append(error)
+        else:
+            result.bytes_freed += freed
+            result.files_removed += 1
+
+    for directory in reversed(directories):
+        try:
+            os.rmdir(directory)
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            result.errors.append(f"{directory}: {exc}")
+
+    return result
+
+
+class DeletionPool(object):
+    """
+    Bounded worker pool that deletes several torrent folders in parallel.
+
+    Submitting a path returns right away with a future for the deletion result.
+
+    Args:
+        tree_workers (int):
+        \t\\- The most torrent folders deleted at once.
+        file_workers (int):
+        \t\\- The most files unlinked at once across all torrent folders.
+    """
+
+    def __init__(self, tree_workers: int, file_workers: int) -> None:
+        self._tree_executor = ThreadPoolExecutor(max_workers=max(tree_workers, 1), thread_name_prefix="delete-tree")
+        self._file_executor = ThreadPoolExecutor(max_workers=max(file_workers, 1), thread_name_prefix="delete-file")
+
+    def submit(self, path: str) -> "Future[DeletionResult]":
+        """
+        Queues a file or folder for deletion.
+
+        Args:
+            path (str):
+            \t\\- The file or folder to delete.
+
+        Returns:
+            Future[DeletionResult]:
+            \t\\- The future deletion result.
+        """
+        logger = logging.getLogger(__name__)
+        logger.debug("Queued the torrent path (%s) for deletion", path)
+        return self._tree_executor.submit(self._delete_tree, path)
+
+    def _delete_tree(self, path: str) -> DeletionResult:
+        """Deletes one queued path on a tree worker."""
+        with TRACER.span("delete", path=path) as span_args:
+            deletion_result = delete_tree(path, self._file_executor)
+            span_args["files_removed"] = deletion_result.files_removed
+            span_args["bytes_freed"] = deletion_result.bytes_freed
+        return deletion_result
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stops the workers.
+
+        Args:
+            wait (bool, optional):
+            \t\\- Waits for the queued deletions to finish. Defaults to True.
+        """
+        self._tree_executor.shutdown(wait=wait)
+        self._file_executor.shutdown(wait=wait)
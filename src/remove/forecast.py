@@ -0,0 +1,119 @@
+"""This module is designed to predict when the next torrent reaches the removal ratio, so the check interval can adapt."""
+# Built-in/Generic Imports
+import math
+import time
+import logging
+from typing import Iterable, Union
+
+# Local Dataclasses
+from common.common import Torrent
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, forecast"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+class RatioForecast(object):
+    """
+    Predicts the earliest time a torrent reaches the removal ratio.
+
+    Each torrent's ratio growth per second is the larger of the current upload speed
+    divided by the torrent size and a smoothed rate from the ratios seen by earlier
+    checks. The larger value keeps a burst of uploads from being missed. The forecast
+    is kept between checks.
+
+    Args:
+        smoothing (float, optional):
+        \t\\- The weight of the newest observed ratio rate (0 to 1). Defaults to 0.5.
+    """
+
+    def __init__(self, smoothing: float = 0.5) -> None:
+        self.smoothing = smoothing
+        # The last ratio, check time and smoothed ratio rate by hash.
+        self._history: dict[str, tuple[float, float, float]] = {}
+        # The seconds from the last update to the earliest predicted crossing. None when nothing is moving.
+        self.next_crossing: Union[float, None] = None
+        self._updated: float = 0.0
+
+    def update(self, torrents: Iterable[Torrent], removal_ratios: tuple[float, ...]) -> Union[float, None]:
+        """
+        Records the torrent ratios of one check and predicts the earliest crossing.
+
+        Each torrent is predicted to cross the lowest removal ratio above its ratio.
+
+        Args:
+            torrents (Iterable[Torrent]):
+            \t\\- The torrents that were kept by the check.
+            removal_ratios (tuple[float, ...]):
+            \t\\- The ratios the torrents start to match the removal policy at in ascending order.
+
+        Returns:
+            Union[float, None]:
+            \t\\- The seconds until the earliest predicted crossing or None when no torrent is moving toward the ratio.
+        """
+        logger = logging.getLogger(__name__)
+        now = time.monotonic()
+        smoothing = self.smoothing
+        previous_history = self._history
+        history: dict[str, tuple[float, float, float]] = {}
+        earliest: Union[float, None] = None
+        earliest_torrent: Union[Torrent, None] = None
+        earliest_ratio: float = 0.0
+
+        for torrent in torrents:
+            ratio = torrent.ratio
+            # A policy without a ratio rule has no crossing to predict.
+            removal_ratio = next((target for target in removal_ratios if target > ratio), None)
+            if ratio < 0 or removal_ratio is None:
+                continue
+            rate = 0.0
+            previous = previous_history.get(torrent.hash)
+            if previous is not None and now > previous[1]:
+                observed_rate = max(ratio - previous[0], 0.0) / (now - previous[1])
+                rate = smoothing * observed_rate + (1 - smoothing) * previous[2]
+            history[torrent.hash] = (ratio, now, rate)
+
+            if torrent.size > 0 and torrent.upload_rate > 0:
+                rate = max(rate, torrent.upload_rate / torrent.size)
+            if rate > 0:
+                seconds = (removal_ratio - ratio) / rate
+                if earliest is None or seconds < earliest:
+                    earliest = seconds
+                    earliest_torrent = torrent
+                    earliest_ratio = removal_ratio
+
+        self._history = history
+        self.next_crossing = earliest
+        self._updated = now
+        if earliest_torrent is not None:
+            logger.debug(
+                "The torrent (%s) is predicted to reach the %s ratio in %.0f seconds",
+                earliest_torrent.name,
+                earliest_ratio,
+                earliest,
+            )
+        return earliest
+
+    def next_sleep(self, min_sleep: int, max_sleep: int) -> int:
+        """
+        Gets the seconds to sleep until the earliest predicted crossing.
+
+        Args:
+            min_sleep (int):
+            \t\\- The shortest sleep in seconds.
+            max_sleep (int):
+            \t\\- The longest sleep in seconds. Used when no torrent is moving toward the ratio.
+
+        Returns:
+            int:
+            \t\\- The sleep in seconds.
+        """
+        if self.next_crossing is None:
+            return max_sleep
+        remaining = self.next_crossing - (time.monotonic() - self._updated)
+        return int(min(max(math.ceil(remaining), min_sleep), max_sleep))
@@ -0,0 +1,219 @@
+"""This module is designed to index the download root and find the data that no torrent references."""
+# Built-in/Generic Imports
+import os
+import time
+import logging
+from typing import Iterable, Union
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, orphans"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+# The suffix Transmission adds to incomplete files when partial file renaming is enabled.
+PARTIAL_SUFFIX: str = ".part"
+
+# One directory entry: (is directory, size in bytes, inode number, modified time in seconds since the epoch).
+IndexEntry = tuple[bool, int, int, float]
+
+
+class _Directory(object):
+    """The entries of one indexed directory and the directory modified time they were read at."""
+
+    __slots__ = ("mtime_ns", "entries")
+
+    def __init__(self, mtime_ns: int, entries: dict[str, IndexEntry]) -> None:
+        self.mtime_ns = mtime_ns
+        self.entries = entries
+
+
+class DirectoryIndex(object):
+    """
+    Index of every file and folder under the download root.
+
+    The first refresh walks the root once with os.scandir and records each entry's type,
+    size, inode number and modified time. Later refreshes only read the directories whose
+    modified time changed, so an unchanged library costs one stat call per directory.
+    Adding, removing or renaming an entry changes its directory's modified time. A file
+    that is rewritten in place keeps its old size until its directory changes.
+
+    The index is kept between checks. Symlinks are recorded and never followed.
+    """
+
+    def __init__(self) -> None:
+        self.root: Union[str, None] = None
+        self._directories: dict[str, _Directory] = {}
+        # The orphaned paths found by the previous check, so each orphan is only reported once.
+        self.reported: set[str] = set()
+
+    def refresh(self, root: str) -> tuple[int, int]:
+        """
+        Updates the index from the changed directories.
+
+        Args:
+            root (str):
+            \t\\- The download root. The index is cleared when the root changes.
+
+        Returns:
+            tuple[int, int]:
+            \t\\- The number of directories read and the number of unchanged directories reused.
+        """
+        logger = logging.getLogger(__name__)
+
+        root = os.path.abspath(root)
+        if root != self.root:
+            self.root = root
+            self._directories = {}
+            self.reported = set()
+
+        previous_directories = self._directories
+        directories: dict[str, _Directory] = {}
+        scanned = 0
+        reused = 0
+        # Holds the directories to index with the modified time from the parent scan or None when it needs a stat call.
+        stack: list[tuple[str, Union[int, None]]] = [(root, None)]
+        while stack:
+            path, mtime_ns = stack.pop()
+            try:
+                if mtime_ns is None:
+                    mtime_ns = os.stat(path).st_mtime_ns
+                previous = previous_directories.get(path)
+                if previous is not None and previous.mtime_ns == mtime_ns:
+                    directory = previous
+                    reused += 1
+                    # The subdirectory modified times may have changed without changing this directory.
+                    for name, (is_dir, _, _, _) in directory.entries.items():
+                        if is_dir:
+                            stack.append((os.path.join(path, name), None))
+                else:
+                    entries: dict[str, IndexEntry] = {}
+                    with os.scandir(path) as scan:
+                        for entry in scan:
+                            stats = entry.stat(follow_symlinks=False)
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                            entries[entry.name] = (is_dir, 0 if is_dir else stats.st_size, entry.inode(), stats.st_mtime)
+                            if is_dir:
+                                stack.append((entry.path, stats.st_mtime_ns))
+                    directory = _Directory(mtime_ns=mtime_ns, entries=entries)
+                    scanned += 1
+            except OSError as exc:
+                # The directory was removed during the walk or cannot be read. It is tried again on the next refresh.
+                logger.debug("The directory (%s) could not be indexed. Exception: %s", path, exc)
+                continue
+            directories[path] = directory
+        self._directories = directories
+        logger.debug(
+            "Indexed the download root (%s). Read %s changed and reused %s unchanged directories", root, scanned, reused
+        )
+        return scanned, reused
+
+    def exists(self, path: str) -> bool:
+        """
+        Checks if a path existed when the index was refreshed.
+
+        Paths outside the indexed directories are checked on disk.
+
+        Args:
+            path (str):
+            \t\\- The path.
+
+        Returns:
+            bool:
+            \t\\- True when the path exists.
+        """
+        parent, name = os.path.split(os.path.abspath(path))
+        directory = self._directories.get(parent)
+        if directory is None:
+            return os.path.lexists(path)
+        return name in directory.entries
+
+    def size(self, path: str) -> int:
+        """
+        Gets the size of a file or the total size of the files in a folder tree from the index.
+
+        Args:
+            path (str):
+            \t\\- The indexed path.
+
+        Returns:
+            int:
+            \t\\- The size in bytes. 0 when the path is not indexed.
+        """
+        parent, name = os.path.split(os.path.abspath(path))
+        directory = self._directories.get(parent)
+        entry = directory.entries.get(name) if directory else None
+        if entry is None:
+            return 0
+        if not entry[0]:
+            return entry[1]
+        total = 0
+        stack = [os.path.join(parent, name)]
+        while stack:
+            tree_path = stack.pop()
+            tree_directory = self._directories.get(tree_path)
+            if tree_directory is None:
+                continue
+            for child_name, (is_dir, size, _, _) in tree_directory.entries.items():
+                if is_dir:
+                    stack.append(os.path.join(tree_path, child_name))
+                total += size
+        return total
+
+    def find_orphans(
+        self, referenced_paths: Iterable[str], min_age: float = 0, exclude_paths: Iterable[str] = (), now: Union[float, None] = None
+    ) -> list[tuple[str, int]]:
+        """
+        Finds the entries in the torrent download folders that no torrent references.
+
+        Only the folders that hold at least one torrent are checked. Folders on the way to
+        a download folder, the excluded paths and the partial files of referenced torrents
+        are never reported.
+
+        Args:
+            referenced_paths (Iterable[str]):
+            \t\\- The local paths of every torrent in Transmission.
+            min_age (float, optional):
+            \t\\- The fewest seconds since an entry was modified before it is reported. Defaults to 0.
+            exclude_paths (Iterable[str], optional):
+            \t\\- The paths that are never reported, with everything under them. Defaults to ().
+            now (float, optional):
+            \t\\- The current time in seconds since the epoch. Defaults to the current time.
+
+        Returns:
+            list[tuple[str, int]]:
+            \t\\- The orphaned paths with their sizes in bytes, sorted by path.
+        """
+        if now is None:
+            now = time.time()
+        referenced: set[str] = set(referenced_paths)
+        download_folders: set[str] = {os.path.dirname(path) for path in referenced}
+        root = self.root or ""
+        # The folders between the root and each download folder hold the download folders, not torrent data.
+        protected: set[str] = set(os.path.abspath(path) for path in exclude_paths)
+        for folder in download_folders:
+            while folder not in protected and len(folder) > len(root):
+                protected.add(folder)
+                folder = os.path.dirname(folder)
+        excluded = tuple(os.path.join(os.path.abspath(path), "") for path in exclude_paths)
+
+        orphans: list[tuple[str, int]] = []
+        for folder in download_folders:
+            directory = self._directories.get(folder)
+            if directory is None or (excluded and os.path.join(folder, "").startswith(excluded)):
+                continue
+            for name, (_, _, _, mtime) in directory.entries.items():
+                path = os.path.join(folder, name)
+                if path in referenced or path in protected:
+                    continue
+                if name.endswith(PARTIAL_SUFFIX) and path[: -len(PARTIAL_SUFFIX)] in referenced:
+                    continue
+                if now - mtime < min_age:
+                    continue
+                orphans.append((path, self.size(path)))
+        orphans.sort()
+        return orphans
@@ -0,0 +1,439 @@
+"""This module is designed to run the torrent removal as a concurrent asyncio pipeline."""
+# Built-in/Generic Imports
+import asyncio
+import logging
+from typing import Union
+from concurrent.futures import Future
+
+# Local Functions
+from common.common import get_function_name
+from remove.delete import DeletionPool
+from remove.forecast import RatioForecast
+from remove.orphans import DirectoryIndex
+from remove.pressure import get_pressure_torrents
+from remove.store import TorrentStore
+from remove.sync import TorrentSync
+from remove.remove import (
+    get_removable_torrents,
+    get_torrent_path,
+    remove_orphans,
+    remove_from_directory,
+    remove_from_transmission,
+    resume_removals,
+    verify_directory_removal,
+)
+
+# Local Clients
+from common.metrics import METRICS
+from common.tracing import TRACER
+from common.limiter import CallLimiter
+from common.resilience import TRANSIENT_ERRORS, CircuitBreaker
+from common.notify import Notifier
+from common.rpc import TransmissionRPC
+from common.remote import TransmissionRemote
+
+# Local Dataclasses
+from common.common import DeletionResult, StartupSettings, Torrent
+
+# Local Exceptions
+from common.common import CircuitOpenError
+
+# Libraries
+from fchecker.type import type_check
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, pipeline"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+# The number of torrent IDs inspected by one transmission-remote --info call.
+INSPECT_CHUNK_SIZE: int = 50
+
+
+async def _inspect_stage(
+    client: Union[TransmissionRPC, TransmissionRemote],
+    torrents: Union[list[Torrent], None],
+    decision_queue: asyncio.Queue,
+    concurrency: int,
+) -> bool:
+    """
+    Inspects the torrents and feeds the decision stage.
+
+    The RPC client already returned every torrent in one call. The transmission-remote
+    client inspects chunks of torrent IDs in concurrent subprocesses. The chunks start
+    while the --list output is still arriving. A chunk that still fails after its retries
+    is skipped, so the other torrents are checked.
+
+    Args:
+        client (Union[TransmissionRPC, TransmissionRemote]):
+        \t\\- The connected Transmission client.
+        torrents (Union[list[Torrent], None]):
+        \t\\- The torrents returned by the RPC client or None when transmission-remote is used.
+        decision_queue (asyncio.Queue):
+        \t\\- The decision stage queue. None marks the end of the inspection.
+        concurrency (int):
+        \t\\- The most transmission-remote calls running at once.
+
+    Returns:
+        bool:
+        \t\\- True when every torrent was inspected.
+    """
+    logger = logging.getLogger(__name__)
+
+    # Holds the number of torrents in the skipped chunks.
+    skipped_torrents = 0
+    if torrents is not None:
+        for torrent in torrents:
+            await decision_queue.put(torrent)
+    elif isinstance(client, TransmissionRemote):
+        worker_count = max(concurrency, 1)
+        # The chunk queue is bounded, so the --list output is not read far ahead of the inspections.
+        inspect_queue: asyncio.Queue = asyncio.Queue(maxsize=worker_count * 2)
+
+        async def list_torrent_ids() -> None:
+            try:
+                chunk: list[int] = []
+                async for torrent_id in client.iter_torrent_ids_async():
+                    chunk.append(torrent_id)
+                    if len(chunk) == INSPECT_CHUNK_SIZE:
+                        await inspect_queue.put(chunk)
+                        chunk = []
+                if chunk:
+                    await inspect_queue.put(chunk)
+            finally:
+                # None stops each inspect worker.
+                for _ in range(worker_count):
+                    await inspect_queue.put(None)
+
+        async def inspect_worker() -> None:
+            nonlocal skipped_torrents
+            while True:
+                chunk = await inspect_queue.get()
+                if chunk is None:
+                    return
+                try:
+                    with TRACER.span("inspect", torrents=len(chunk)):
+                        inspected_torrents = await client.get_torrents_async(ids=chunk)
+                except (CircuitOpenError, *TRANSIENT_ERRORS) as exc:
+                    skipped_torrents += len(chunk)
+                    METRICS.inc("torrent_errors", len(chunk), stage="inspect")
+                    logger.error(
+                        "The torrents (%s) could not be inspected and are checked on the next check. Exception: %s",
+                        ", ".join(str(torrent_id) for torrent_id in chunk),
+                        exc,
+                    )
+                    continue
+                for torrent in inspected_torrents:
+                    await decision_queue.put(torrent)
+
+        await asyncio.gather(list_torrent_ids(), *(inspect_worker() for _ in range(worker_count)))
+
+    await decision_queue.put(None)
+    return not skipped_torrents
+
+
+async def _decision_stage(
+    startup_settings: StartupSettings,
+    decision_queue: asyncio.Queue,
+    removal_queue: asyncio.Queue,
+    skip_hashes: Union[set[str], None] = None,
+    ratio_forecast: Union[RatioForecast, None] = None,
+    referenced_paths: Union[set[str], None] = None,
+) -> None:
+    """
+    Checks the inspected torrents and feeds the removal stage.
+
+    The torrents waiting in the queue are checked together, so the RPC torrent list is
+    checked in one pass over the torrent columns. The disk pressure removals are picked
+    after the last torrent, because they need every remaining torrent.
+
+    Args:
+        startup_settings (StartupSettings):
+        \t\\- The startup settings.
+        decision_queue (asyncio.Queue):
+        \t\\- The decision stage queue. None marks the end of the inspection.
+        removal_queue (asyncio.Queue):
+        \t\\- The removal stage queue. None marks the end of the decisions.
+        skip_hashes (set[str], optional):
+        \t\\- The hashes of the resumed removals that are not checked again. Defaults to None.
+        ratio_forecast (RatioForecast, optional):
+        \t\\- The forecast updated with the torrents that were kept. Defaults to None.
+        referenced_paths (set[str], optional):
+        \t\\- Collects the local path of every inspected torrent for the orphan check. Defaults to None.
+    """
+    # Holds the torrents the policy kept and the bytes the policy removals free for the disk pressure check and forecast.
+    kept_torrents: list[Torrent] = []
+    planned_bytes = 0
+    finished = False
+    while not finished:
+        torrents: list[Torrent] = []
+        torrent: Union[Torrent, None] = await decision_queue.get()
+        while torrent is not None:
+            if referenced_paths is not None:
+                referenced_paths.add(get_torrent_path(startup_settings=startup_settings, torrent=torrent))
+            if not skip_hashes or torrent.hash not in skip_hashes:
+                torrents.append(torrent)
+            if decision_queue.empty():
+                break
+            torrent = decision_queue.get_nowait()
+        finished = torrent is None
+        with TRACER.span("decide", torrents=len(torrents)):
+            removable_torrents = get_removable_torrents(startup_settings=startup_settings, torrents=torrents)
+        for removable_torrent in removable_torrents:
+            await removal_queue.put(removable_torrent)
+        if startup_settings.disk_pressure or ratio_forecast:
+            removable_hashes = {removable_torrent.hash for removable_torrent in removable_torrents}
+            kept_torrents += [torrent for torrent in torrents if torrent.hash not in removable_hashes]
+            planned_bytes += sum(removable_torrent.size for removable_torrent in removable_torrents)
+    if startup_settings.disk_pressure:
+        pressure_torrents = get_pressure_torrents(
+            startup_settings=startup_settings, torrents=kept_torrents, planned_bytes=planned_bytes
+        )
+        for pressure_torrent in pressure_torrents:
+            await removal_queue.put(pressure_torrent)
+        pressure_hashes = {pressure_torrent.hash for pressure_torrent in pressure_torrents}
+        kept_torrents = [torrent for torrent in kept_torrents if torrent.hash not in pressure_hashes]
+    if ratio_forecast:
+        ratio_forecast.update(torrents=kept_torrents, removal_ratios=startup_settings.removal_policy.ratio_targets)
+    await removal_queue.put(None)
+
+
+async def _removal_stage(
+    startup_settings: StartupSettings,
+    client: Union[TransmissionRPC, TransmissionRemote],
+    removal_queue: asyncio.Queue,
+    torrent_sync: Union[TorrentSync, None] = None,
+    torrent_store: Union[TorrentStore, None] = None,
+    notifier: Union[Notifier, None] = None,
+    directory_index: Union[DirectoryIndex, None] = None,
+) -> None:
+    """
+    Removes the torrents from Transmission and the directory.
+
+    Batch removal takes every torrent waiting in the queue as one batch. The blocking
+    removal calls run in a worker thread so the inspection keeps running.
+
+    Args:
+        startup_settings (StartupSettings):
+        \t\\- The startup settings.
+        client (Union[TransmissionRPC, TransmissionRemote]):
+        \t\\- The connected Transmission client.
+        removal_queue (asyncio.Queue):
+        \t\\- The removal stage queue. None marks the end of the decisions.
+        torrent_sync (TorrentSync, optional):
+        \t\\- The torrent table that drops the removed torrents. Defaults to None.
+        torrent_store (TorrentStore, optional):
+        \t\\- The store that records the in-flight removals. Interrupted removals resume first. Defaults to None.
+        notifier (Notifier, optional):
+        \t\\- The background notifier. The emails are sent right away when not set. Defaults to None.
+        directory_index (DirectoryIndex, optional):
+        \t\\- The download root index that answers the folder existence checks. Defaults to None.
+    """
+    # The deletion pool deletes the torrent folders while the pipeline keeps running.
+    deletion_pool = DeletionPool(
+        tree_workers=startup_settings.deletion_workers, file_workers=startup_settings.deletion_file_workers
+    )
+    # Holds the queued folder deletions until the end of the check.
+    deletions: list[tuple[Torrent, Union["Future[DeletionResult]", None]]] = []
+    finished: bool = False
+    try:
+        if torrent_store:
+            resumed_deletions = await asyncio.to_thread(
+                resume_removals,
+                startup_settings=startup_settings,
+                client=client,
+                torrent_store=torrent_store,
+                deletion_pool=deletion_pool,
+                notifier=notifier,
+            )
+            if torrent_sync:
+                torrent_sync.discard(torrents=[torrent for torrent, _ in resumed_deletions])
+            deletions += resumed_deletions
+        while not finished:
+            torrent: Union[Torrent, None] = await removal_queue.get()
+            if torrent is None:
+                break
+            torrents: list[Torrent] = [torrent]
+            if startup_settings.batch_removal:
+                while not removal_queue.empty():
+                    next_torrent = removal_queue.get_nowait()
+                    if next_torrent is None:
+                        finished = True
+                        break
+                    torrents.append(next_torrent)
+
+            removed_torrents = await asyncio.to_thread(
+                remove_from_transmission,
+                startup_settings=startup_settings,
+                client=client,
+                torrents=torrents,
+                torrent_store=torrent_store,
+                notifier=notifier,
+                by_id=True,
+            )
+            if torrent_sync:
+                torrent_sync.discard(torrents=removed_torrents)
+            deletions += await asyncio.to_thread(
+                remove_from_directory,
+                startup_settings=startup_settings,
+                torrents=removed_torrents,
+                deletion_pool=deletion_pool,
+                notifier=notifier,
+                directory_index=directory_index,
+            )
+
+        if deletions:
+            await asyncio.to_thread(
+                verify_directory_removal,
+                startup_settings=startup_settings,
+                deletions=deletions,
+                torrent_store=torrent_store,
+                notifier=notifier,
+            )
+    finally:
+        deletion_pool.shutdown(wait=True)
+
+
+async def start_remove_async(
+    startup_settings: StartupSettings,
+    torrent_sync: Union[TorrentSync, None] = None,
+    torrent_store: Union[TorrentStore, None] = None,
+    notifier: Union[Notifier, None] = None,
+    ratio_forecast: Union[RatioForecast, None] = None,
+    directory_index: Union[DirectoryIndex, None] = None,
+    call_limiter: Union[CallLimiter, None] = None,
+    circuit_breaker: Union[CircuitBreaker, None] = None,
+) -> None:
+    """
+    Starts the removal of torrents that meet the ratio as a concurrent pipeline.
+
+    The inspection, decision and removal stages run at the same time and are fed by queues.
+
+    Args:
+        startup_settings (StartupSettings):
+        \t\\- The startup settings.
+        torrent_sync (TorrentSync, optional):
+        \t\\- The torrent table kept between checks. Used with the RPC endpoint only. Defaults to None.
+        torrent_store (TorrentStore, optional):
+        \t\\- The store that records the in-flight removals. Interrupted removals resume first. Defaults to None.
+        notifier (Notifier, optional):
+        \t\\- The background notifier. The emails are sent right away when not set. Defaults to None.
+        ratio_forecast (RatioForecast, optional):
+        \t\\- The forecast updated with the torrents that were kept. Defaults to None.
+        directory_index (DirectoryIndex, optional):
+        \t\\- The download root index kept between checks. The orphaned data is reported when set. Defaults to None.
+        call_limiter (CallLimiter, optional):
+        \t\\- The limiter kept between checks that the client calls wait for. Defaults to None.
+        circuit_breaker (CircuitBreaker, optional):
+        \t\\- The circuit breaker of the Transmission daemon kept between checks. Defaults to None.
+
+    Raises:
+        FTypeError (fexception):
+        \t\\- The object value '{startup_settings}' is not an instance of the required class(es) or subclass(es).
+        TransmissionExtError:
+        \t\\- Transmission Remove was not able to detect an installed version of transmission-remote.
+        TransmissionExtError:
+        \t\\- The Transmission RPC endpoint rejected the username or password.
+        TransmissionConnectionError:
+        \t\\- The Transmission RPC endpoint returned a server error.
+        TransmissionConnectionError:
+        \t\\- transmission-remote did not complete the call.
+        CircuitOpenError:
+        \t\\- The transmission circuit is open after repeated failures.
+    """
+    logger = logging.getLogger(__name__)
+    logger.debug("=" * 20 + "%s" + "=" * 20, get_function_name())
+    # Custom flowchart tracking. This is ideal for large projects that move a lot.
+    # For any third-party modules, set the flow before making the function call.
+    logger_flowchart = logging.getLogger("flowchart")
+    logger_flowchart.debug("Flowchart --> Function: %s", get_function_name())
+
+    type_check(value=startup_settings, required_type=StartupSettings)
+
+    client: Union[TransmissionRPC, TransmissionRemote, None] = None
+    torrents: Union[list[Torrent], None] = None
+    if startup_settings.use_rpc:
+        client = TransmissionRPC.from_server(
+            server=startup_settings.server,
+            limiter=call_limiter,
+            breaker=circuit_breaker,
+            retries=startup_settings.call_retries,
+        )
+        try:
+            with METRICS.timer("phase_duration_seconds", phase="fetch"), TRACER.span("list"):
+                if torrent_sync:
+                    # The orphan check needs every torrent. A delta table can miss a torrent added between refreshes.
+                    torrents = await asyncio.to_thread(torrent_sync.refresh, client=client, full_sync=bool(directory_index))
+                else:
+                    # One torrent-get call returns every torrent.
+                    torrents = await asyncio.to_thread(client.get_torrents)
+        except OSError as exc:
+            client.close()
+            logger.warning(
+                "The Transmission RPC endpoint could not be reached. Falling back to transmission-remote. Exception: %s", exc
+            )
+    if torrents is None:
+        client = TransmissionRemote(
+            server=startup_settings.server,
+            limiter=call_limiter,
+            breaker=circuit_breaker,
+            retries=startup_settings.call_retries,
+        )
+    if directory_index:
+        with METRICS.timer("phase_duration_seconds", phase="index"), TRACER.span("index"):
+            await asyncio.to_thread(directory_index.refresh, root=startup_settings.root_download_path)
+    # Holds the local path of every torrent for the orphan check.
+    referenced_paths: Union[set[str], None] = set() if directory_index else None
+
+    # The decision queue is bounded, so the inspection cannot run far ahead of the decisions.
+    decision_queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
+    removal_queue: asyncio.Queue = asyncio.Queue()
+    # The resumed removals are finished by the removal stage instead of the decision stage.
+    resumed_hashes: set[str] = (
+        {torrent.hash for torrent, _ in torrent_store.pending_removals()} if torrent_store else set()
+    )
+    try:
+        inspected_all, _, _ = await asyncio.gather(
+            _inspect_stage(
+                client=client,
+                torrents=torrents,
+                decision_queue=decision_queue,
+                concurrency=startup_settings.inspect_concurrency,
+            ),
+            _decision_stage(
+                startup_settings=startup_settings,
+                decision_queue=decision_queue,
+                removal_queue=removal_queue,
+                skip_hashes=resumed_hashes,
+                ratio_forecast=ratio_forecast,
+                referenced_paths=referenced_paths,
+            ),
+            _removal_stage(
+                startup_settings=startup_settings,
+                client=client,
+                removal_queue=removal_queue,
+                torrent_sync=torrent_sync,
+                torrent_store=torrent_store,
+                notifier=notifier,
+                directory_index=directory_index,
+            ),
+        )
+        if directory_index and not inspected_all:
+            # The folders of the torrents that were not inspected would be reported as orphans.
+            logger.warning("Skipped the orphan check because some torrents could not be inspected")
+        elif directory_index:
+            await asyncio.to_thread(
+                remove_orphans,
+                startup_settings=startup_settings,
+                directory_index=directory_index,
+                referenced_paths=referenced_paths,
+                notifier=notifier,
+                torrent_store=torrent_store,
+            )
+    finally:
+        client.close()
@@ -0,0 +1,135 @@
+"""This module is designed to pick extra torrents to remove when the download volume runs low on free space."""
+# Built-in/Generic Imports
+import os
+import heapq
+import logging
+from typing import Callable
+
+# Local Functions
+from common.metrics import METRICS
+
+# Local Dataclasses
+from common.common import StartupSettings, Torrent
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, pressure"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+# The heap keys for each removal order. The smallest key is removed first.
+PRESSURE_PRIORITIES: dict[str, Callable[[Torrent], float]] = {
+    # Highest ratio first.
+    "ratio": lambda torrent: -torrent.ratio,
+    # Oldest added date first. Torrents without an added date go last.
+    "oldest": lambda torrent: torrent.added_date or float("inf"),
+    # Largest first.
+    "largest": lambda torrent: -torrent.size,
+}
+
+
+def get_disk_usage(path: str) -> tuple[int, int]:
+    """
+    Gets the free and total bytes of the volume that holds the path.
+
+    Args:
+        path (str):
+        \t\\- The path on the volume.
+
+    Raises:
+        OSError:
+        \t\\- The path does not exist.
+
+    Returns:
+        tuple[int, int]:
+        \t\\- The bytes available to unprivileged users and the volume size in bytes.
+    """
+    stats = os.statvfs(path)
+    return stats.f_bavail * stats.f_frsize, stats.f_blocks * stats.f_frsize
+
+
+def get_pressure_torrents(
+    startup_settings: StartupSettings, torrents: list[Torrent], planned_bytes: int = 0
+) -> list[Torrent]:
+    """
+    Picks the torrents to remove when the free space is below the low-water mark.
+
+    Nothing is picked while the free space is above free_space_low percent. Below it,
+    completed torrents that seeded for at least pressure_min_seed_hours are taken from a
+    heap in the pressure_priority order until the removals bring the free space back to
+    free_space_high percent.
+
+    Args:
+        startup_settings (StartupSettings):
+        \t\\- The startup settings.
+        torrents (list[Torrent]):
+        \t\\- The torrents that are not already being removed.
+        planned_bytes (int, optional):
+        \t\\- The bytes freed by the removals already planned in this check. Defaults to 0.
+
+    Returns:
+        list[Torrent]:
+        \t\\- The torrents to remove in priority order.
+    """
+    logger = logging.getLogger(__name__)
+
+    try:
+        free_bytes, total_bytes = get_disk_usage(startup_settings.root_download_path)
+    except OSError as exc:
+        logger.warning(
+            "The free space of the download path (%s) could not be checked. Exception: %s",
+            startup_settings.root_download_path,
+            exc,
+        )
+        return []
+    if not total_bytes or free_bytes >= total_bytes * startup_settings.free_space_low / 100:
+        return []
+
+    target_bytes = total_bytes * startup_settings.free_space_high / 100 - free_bytes - planned_bytes
+    logger.warning(
+        "The download volume has %.1f%% free space, below the %s%% low-water mark. Removing torrents by %s until %s%% is free",
+        free_bytes / total_bytes * 100,
+        startup_settings.free_space_low,
+        startup_settings.pressure_priority,
+        startup_settings.free_space_high,
+    )
+    if target_bytes <= 0:
+        return []
+
+    # The minimum-seed guard keeps incomplete and recently completed torrents.
+    min_seed_seconds = startup_settings.pressure_min_seed_hours * 3600
+    priority = PRESSURE_PRIORITIES[startup_settings.pressure_priority]
+    # The index breaks key ties, so torrents are never compared.
+    heap = [
+        (priority(torrent), index, torrent)
+        for index, torrent in enumerate(torrents)
+        if torrent.percent_done >= 1 and torrent.seeding_time >= min_seed_seconds and torrent.size > 0
+    ]
+    heapq.heapify(heap)
+
+    pressure_torrents: list[Torrent] = []
+    selected_bytes = 0
+    while heap and selected_bytes < target_bytes:
+        _, _, torrent = heapq.heappop(heap)
+        pressure_torrents.append(torrent)
+        selected_bytes += torrent.size
+        logger.info(
+            "The torrent (%s) was picked to free %s bytes for disk pressure. Removing torrent from transmission and the directory",
+            torrent.name,
+            torrent.size,
+        )
+
+    if selected_bytes < target_bytes:
+        logger.warning(
+            "Only %s of the %.0f bytes needed to reach the high-water mark can be freed. "
+            "The other torrents are incomplete or seeded for less than %s hour(s)",
+            selected_bytes,
+            target_bytes,
+            startup_settings.pressure_min_seed_hours,
+        )
+    METRICS.inc("torrents_pressure_picked", len(pressure_torrents))
+    return pressure_torrents
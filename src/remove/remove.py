@@ -2,25 +2,42 @@
 # Built-in/Generic Imports
 from dataclasses import asdict
 import os
+import time
 import logging
-from typing import Union
-from time import sleep
-import shutil
+from typing import Iterable, Union
+from concurrent.futures import Future
+from itertools import islice
 import re
 
+# Local Functions
+from common.common import get_function_name
+from migrate.transfer import get_partial_path
+from remove.delete import DeletionPool
+from remove.forecast import RatioForecast
+from remove.orphans import DirectoryIndex
+from remove.pressure import get_pressure_torrents
+from remove.store import STAGE_DIRECTORY, STAGE_TRANSMISSION, TorrentStore
+from remove.sync import TorrentSync
+from remove.verify import wait_for_path_removal, wait_for_torrent_removal
+
+# Local Clients
+from common.metrics import METRICS
+from common.tracing import TRACER
+from common.limiter import CallLimiter
+from common.resilience import TRANSIENT_ERRORS, CircuitBreaker
+from common.notify import Notifier
+from common.rpc import TransmissionRPC
+from common.remote import TransmissionRemote
+
 # Local Dataclasses
-from common.common import StartupSettings
+from common.common import DeletionResult, StartupSettings, Torrent
 
 # Local Exceptions
-from common.common import TransmissionExtError
+from common.common import CircuitOpenError
 
 # Libraries
-from ictoolkit import get_function_name, send_email, start_subprocess, str_to_list
 from fchecker.type import type_check
 
-# Exceptions
-from fexception import FCustomException
-
 
 __author__ = "IncognitoCoding"
 __copyright__ = "Copyright 2021, remove"
@@ -31,13 +48,611 @@ __maintainer__ = "IncognitoCoding"
 __status__ = "Development"
 
 
-def start_remove(startup_settings: StartupSettings):
+# The number of streamed torrents checked against the removal policy at once.
+DECISION_BATCH_SIZE: int = 1000
+
+
+def get_torrents(
+    startup_settings: StartupSettings,
+    torrent_sync: Union[TorrentSync, None] = None,
+    call_limiter: Union[CallLimiter, None] = None,
+    circuit_breaker: Union[CircuitBreaker, None] = None,
+    full_sync: bool = False,
+) -> tuple[Union[TransmissionRPC, TransmissionRemote], Iterable[Torrent]]:
+    """
+    Connects to Transmission and gets the details of every torrent.
+
+    The RPC endpoint is used by default. transmission-remote is used when RPC is disabled
+    or the RPC endpoint cannot be reached. Without the torrent table, the transmission-remote
+    torrents are streamed while the --info output arrives.
+
+    Args:
+        startup_settings (StartupSettings):
+        \t\\- The startup settings.
+        torrent_sync (TorrentSync, optional):
+        \t\\- The torrent table that refreshes only the changed torrents. Defaults to None.
+        call_limiter (CallLimiter, optional):
+        \t\\- The limiter that the client calls wait for. Defaults to None.
+        circuit_breaker (CircuitBreaker, optional):
+        \t\\- The circuit breaker of the Transmission daemon. Defaults to None.
+        full_sync (bool, optional):
+        \t\\- The torrent table loads every torrent instead of the recently active torrents. Defaults to False.
+
+    Raises:
+        TransmissionExtError:
+        \t\\- Transmission Remove was not able to detect an installed version of transmission-remote.
+        CircuitOpenError:
+        \t\\- The transmission circuit is open after repeated failures.
+
+    Returns:
+        tuple[Union[TransmissionRPC, TransmissionRemote], Iterable[Torrent]]:
+        \t\\- The connected client and the torrent details. The streamed details can only be read once.
+    """
+    logger = logging.getLogger(__name__)
+    logger.debug("=" * 20 + "%s" + "=" * 20, get_function_name())
+    # Custom flowchart tracking. This is ideal for large projects that move a lot.
+    # For any third-party modules, set the flow before making the function call.
+    logger_flowchart = logging.getLogger("flowchart")
+    logger_flowchart.debug("Flowchart --> Function: %s", get_function_name())
+
+    if startup_settings.use_rpc:
+        rpc_client = TransmissionRPC.from_server(
+            server=startup_settings.server,
+            limiter=call_limiter,
+            breaker=circuit_breaker,
+            retries=startup_settings.call_retries,
+        )
+        try:
+            if torrent_sync:
+                return rpc_client, torrent_sync.refresh(client=rpc_client, full_sync=full_sync)
+            # One torrent-get call returns every torrent.
+            return rpc_client, rpc_client.get_torrents()
+        except OSError as exc:
+            rpc_client.close()
+            logger.warning(
+                "The Transmission RPC endpoint could not be reached. Falling back to transmission-remote. Exception: %s", exc
+            )
+
+    remote_client = TransmissionRemote(
+        server=startup_settings.server,
+        limiter=call_limiter,
+        breaker=circuit_breaker,
+        retries=startup_settings.call_retries,
+    )
+    if torrent_sync:
+        return remote_client, torrent_sync.refresh(client=remote_client, full_sync=full_sync)
+    return remote_client, remote_client.iter_torrents()
+
+
+def notify(
+    startup_settings: StartupSettings, subject: str, body: str, notifier: Union[Notifier, None] = None
+) -> None:
+    """
+    Queues a notification on the notifier or sends the email right away when no notifier is set.
+
+    The subject is labeled with the server name when the servers list is used, so the
+    servers can share one notifier.
+
+    Args:
+        startup_settings (StartupSettings):
+        \t\\- The startup settings.
+        subject (str):
+        \t\\- The email subject.
+        body (str):
+        \t\\- The email body.
+        notifier (Notifier, optional):
+        \t\\- The background notifier. Defaults to None.
+    """
+    if startup_settings.server_name:
+        subject = f"{subject} ({startup_settings.server_name})"
+    with TRACER.span("notify", subject=subject):
+        if notifier:
+            notifier.notify(subject=subject, body=body)
+        else:
+            from ictoolkit import send_email
+
+            # Converts the dataclass to a dictionary.
+            email_settings_asdict: dict = asdict(startup_settings.email_settings)
+            with METRICS.timer("email_duration_seconds", error_counter="email_errors"):
+                send_email(email_settings=email_settings_asdict, subject=subject, body=body)
+
+
+def get_torrent_path(startup_settings: StartupSettings, torrent: Torrent) -> str:
+    """
+    Gets the torrent folder path on the local system.
+
+    Args:
+        startup_settings (StartupSettings):
+        \t\\- The startup settings.
+        torrent (Torrent):
+        \t\\- The torrent details.
+
+    Returns:
+        str:
+        \t\\- The torrent path.
+    """
+    return os.path.abspath(f"{startup_settings.root_download_path}/{torrent.location}/{torrent.name}")
+
+
+def remove_from_transmission(
+    startup_settings: StartupSettings,
+    client: Union[TransmissionRPC, TransmissionRemote],
+    torrents: list[Torrent],
+    torrent_store: Union[TorrentStore, None] = None,
+    notifier: Union[Notifier, None] = None,
+    by_id: bool = False,
+) -> list[Torrent]:
+    """
+    Removes torrents from Transmission with one removal call and verifies all of them with one follow-up query.
+
+    A Transmission call that still fails after its retries only fails these torrents. They
+    stay recorded in the torrent store and resume on the next check, so the rest of the
+    check continues.
+
+    Args:
+        startup_settings (StartupSettings):
+        \t\\- The startup settings.
+        client (Union[TransmissionRPC, TransmissionRemote]):
+        \t\\- The connected Transmission client.
+        torrents (list[Torrent]):
+        \t\\- The torrents to remove.
+        torrent_store (TorrentStore, optional):
+        \t\\- The store that records the in-flight removals. Defaults to None.
+        notifier (Notifier, optional):
+        \t\\- The background notifier. The emails are sent right away when not set. Defaults to None.
+        by_id (bool, optional):
+        \t\\- The torrent IDs are from the listing of this check. transmission-remote then removes the torrents
+        \t\\- with one call and verifies them with one call per poll instead of one call per hash. Defaults to False.
+
+    Returns:
+        list[Torrent]:
+        \t\\- The torrents that removed from Transmission successfully.
+    """
+    logger = logging.getLogger(__name__)
+    logger.debug("=" * 20 + "%s" + "=" * 20, get_function_name())
+    # Custom flowchart tracking. This is ideal for large projects that move a lot.
+    # For any third-party modules, set the flow before making the function call.
+    logger_flowchart = logging.getLogger("flowchart")
+    logger_flowchart.debug("Flowchart --> Function: %s", get_function_name())
+
+    start = time.perf_counter()
+    # Hashes are used when available because IDs change after a Transmission restart. transmission-remote
+    # takes one call per hash, so it uses the IDs of the listing just taken when they are current.
+    by_id = by_id and isinstance(client, TransmissionRemote)
+    torrent_ids: list[Union[int, str]] = [torrent.id if by_id else torrent.hash or torrent.id for torrent in torrents]
+
+    if torrent_store:
+        # Records the removals before the call, so an interrupted removal resumes on the next start.
+        torrent_store.begin_removals(torrents=torrents)
+
+    try:
+        # ########################################################
+        # ###########Removes the torrent from transmission########
+        # ########################################################
+        if client.remove_torrents(ids=torrent_ids, delete_local_data=startup_settings.delete_local_data):
+            for torrent in torrents:
+                logger.debug("Transmission returned a successful response during the torrent (%s) removal", torrent.name)
+        else:
+            for torrent in torrents:
+                logger.error("The torrent (%s) did not removed from Transmission successfully", torrent.name)
+                notify(
+                    startup_settings=startup_settings,
+                    notifier=notifier,
+                    subject="Error: Transmission Torrent Removal Failed",
+                    body=f"Transmission did not returned a successful response during the torrent ({torrent.name}) removal.",
+                )
+
+        # Calls function to poll Transmission until the torrents are gone or the verify timeout expires.
+        remaining_ids: set[Union[int, str]] = wait_for_torrent_removal(
+            client=client, torrents=torrents, timeout=startup_settings.verify_timeout, by_id=by_id
+        )
+    except (CircuitOpenError, *TRANSIENT_ERRORS) as exc:
+        # The removal state is unknown until Transmission answers again.
+        for torrent in torrents:
+            logger.error(
+                "The torrent (%s) removal could not be completed and is retried on the next check. Exception: %s",
+                torrent.name,
+                exc,
+            )
+        METRICS.inc("torrent_errors", len(torrents), stage="remove")
+        METRICS.observe("phase_duration_seconds", time.perf_counter() - start, phase="remove")
+        TRACER.record("remove", start, torrents=len(torrents), removed=0, error=type(exc).__name__)
+        return []
+    removed_torrents: list[Torrent] = []
+    for torrent in torrents:
+        if (torrent.hash or torrent.id) in remaining_ids:
+            logger.error("The torrent (%s) did not removed from Transmission successfully", torrent.name)
+            notify(
+                startup_settings=startup_settings,
+                notifier=notifier,
+                subject="Error: Transmission Torrent Removal Failed",
+                body=f"The torrent ({torrent.name}) did not removed from Transmission successfully. Manually intervention is required.",
+            )
+        else:
+            logger.info("The torrent (%s) removed from Transmission successfully", torrent.name)
+            removed_torrents.append(torrent)
+
+    if torrent_store:
+        torrent_store.set_removal_stage(torrents=removed_torrents, stage=STAGE_DIRECTORY)
+        # Torrents still in Transmission are checked again on the next cycle.
+        torrent_store.finish_removals(
+            torrents=[torrent for torrent in torrents if (torrent.hash or torrent.id) in remaining_ids]
+        )
+
+    METRICS.inc("torrents_removed", len(removed_torrents))
+    METRICS.observe("phase_duration_seconds", time.perf_counter() - start, phase="remove")
+    TRACER.record("remove", start, torrents=len(torrents), removed=len(removed_torrents))
+    return removed_torrents
+
+
+def remove_from_directory(
+    startup_settings: StartupSettings,
+    torrents: list[Torrent],
+    deletion_pool: DeletionPool,
+    notifier: Union[Notifier, None] = None,
+    directory_index: Union[DirectoryIndex, None] = None,
+) -> list[tuple[Torrent, Union["Future[DeletionResult]", None]]]:
+    """
+    Queues the torrent folders for deletion on the deletion pool. This returns without waiting for the deletions.
+
+    Transmission deletes the folders when delete_local_data is enabled, so nothing is queued.
+    The directory index answers the folder existence checks without touching the disk.
+
+    Args:
+        startup_settings (StartupSettings):
+        \t\\- The startup settings.
+        torrents (list[Torrent]):
+        \t\\- The torrents removed from Transmission.
+        deletion_pool (DeletionPool):
+        \t\\- The pool that deletes the torrent folders.
+        notifier (Notifier, optional):
+        \t\\- The background notifier. The emails are sent right away when not set. Defaults to None.
+        directory_index (DirectoryIndex, optional):
+        \t\\- The download root index refreshed by this check. The disk is checked when not set. Defaults to None.
+
+    Returns:
+        list[tuple[Torrent, Union[Future[DeletionResult], None]]]:
+        \t\\- The torrents with the pending deletion or None when no deletion was queued.
+    """
+    logger = logging.getLogger(__name__)
+    logger.debug("=" * 20 + "%s" + "=" * 20, get_function_name())
+    # Custom flowchart tracking. This is ideal for large projects that move a lot.
+    # For any third-party modules, set the flow before making the function call.
+    logger_flowchart = logging.getLogger("flowchart")
+    logger_flowchart.debug("Flowchart --> Function: %s", get_function_name())
+
+    deletions: list[tuple[Torrent, Union["Future[DeletionResult]", None]]] = []
+    # ########################################################
+    # ######Removes the torrent files from the directory######
+    # ########################################################
+    for torrent in torrents:
+        if startup_settings.delete_local_data:
+            deletions.append((torrent, None))
+            continue
+
+        torrent_path = get_torrent_path(startup_settings=startup_settings, torrent=torrent)
+        logger.debug("Removing torrent from complete path: %s", torrent_path)
+        # Checks if the torrent folder exists.
+        if not (directory_index.exists(torrent_path) if directory_index else os.path.exists(torrent_path)):
+            logger.warn("The torrent path (%s) does not exist. No removal required", torrent_path)
+            notify(
+                startup_settings=startup_settings,
+                notifier=notifier,
+                subject="Torrent Missing",
+                body=f"The torrent path ({torrent_path}) did not exist. No removal required",
+            )
+            deletions.append((torrent, None))
+        else:
+            logger.debug("The torrent path (%s) exist. Removing the torrent folder", torrent_path)
+
+            # Queues the torrent folder removal.
+            deletions.append((torrent, deletion_pool.submit(path=torrent_path)))
+
+    return deletions
+
+
+def verify_directory_removal(
+    startup_settings: StartupSettings,
+    deletions: list[tuple[Torrent, Union["Future[DeletionResult]", None]]],
+    torrent_store: Union[TorrentStore, None] = None,
+    notifier: Union[Notifier, None] = None,
+) -> list[DeletionResult]:
+    """
+    Waits for the queued folder deletions and verifies the torrent folders were removed.
+
+    Args:
+        startup_settings (StartupSettings):
+        \t\\- The startup settings.
+        deletions (list[tuple[Torrent, Union[Future[DeletionResult], None]]]):
+        \t\\- The torrents with the pending deletion returned by remove_from_directory.
+        torrent_store (TorrentStore, optional):
+        \t\\- The store that records the in-flight removals. Defaults to None.
+        notifier (Notifier, optional):
+        \t\\- The background notifier. The emails are sent right away when not set. Defaults to None.
+
+    Returns:
+        list[DeletionResult]:
+        \t\\- The completed deletion results.
     """
-    Starts the removal of torrents that meet the ratio.
+    logger = logging.getLogger(__name__)
+    logger.debug("=" * 20 + "%s" + "=" * 20, get_function_name())
+    # Custom flowchart tracking. This is ideal for large projects that move a lot.
+    # For any third-party modules, set the flow before making the function call.
+    logger_flowchart = logging.getLogger("flowchart")
+    logger_flowchart.debug("Flowchart --> Function: %s", get_function_name())
+
+    start = time.perf_counter()
+    deletion_results: list[DeletionResult] = []
+    for torrent, deletion in deletions:
+        if deletion:
+            deletion_result: DeletionResult = deletion.result()
+            deletion_results.append(deletion_result)
+            METRICS.inc("bytes_freed", deletion_result.bytes_freed)
+            logger.debug(
+                "The torrent path (%s) deletion completed. Removed %s file(s) and freed %s bytes",
+                deletion_result.path,
+                deletion_result.files_removed,
+                deletion_result.bytes_freed,
+            )
+            for error in deletion_result.errors:
+                logger.error("The torrent (%s) folder deletion returned an error: %s", torrent.name, error)
+
+    # ########################################################
+    # #####Verifies the torrent removed from the directory####
+    # ########################################################
+    logger.debug("Verifing the torrent folder was removed")
+    # Calls function to wait until the folders are gone or the verify timeout expires.
+    remaining_paths: set[str] = wait_for_path_removal(
+        paths=[get_torrent_path(startup_settings=startup_settings, torrent=torrent) for torrent, _ in deletions],
+        timeout=startup_settings.verify_timeout,
+    )
+    for torrent, _ in deletions:
+        torrent_path = get_torrent_path(startup_settings=startup_settings, torrent=torrent)
+        # Checks if the torrent folder exists.
+        if torrent_path not in remaining_paths:
+            logger.info("The torrent path (%s) removed successfully", torrent_path)
+        else:
+            logger.error("The torrent path (%s) still exist. Removing the torrent folder failed", torrent_path)
+            notify(
+                startup_settings=startup_settings,
+                notifier=notifier,
+                subject="Error: Torrent Folder Removal Failed",
+                body=f"The torrent ({torrent.name}) folder did not removed from the directory ({torrent_path}) successfully. Manually intervention is required.",
+            )
+
+    if torrent_store:
+        # Failed folders were emailed for manual intervention, so they are not retried.
+        torrent_store.finish_removals(torrents=[torrent for torrent, _ in deletions])
+
+    METRICS.observe("phase_duration_seconds", time.perf_counter() - start, phase="delete")
+    TRACER.record("verify", start, deletions=len(deletions))
+    return deletion_results
+
+
+def remove_orphans(
+    startup_settings: StartupSettings,
+    directory_index: DirectoryIndex,
+    referenced_paths: Iterable[str],
+    notifier: Union[Notifier, None] = None,
+    torrent_store: Union[TorrentStore, None] = None,
+) -> list[tuple[str, int]]:
+    """
+    Reports and optionally deletes the data in the torrent download folders that no torrent references.
+
+    Each orphan is emailed once. The orphans are deleted on every check when reclaim_orphans is enabled.
+    The copies of the pending storage migrations are not orphans. Their torrents still point at
+    the source data until the location change.
 
     Args:
         startup_settings (StartupSettings):
         \t\\- The startup settings.
+        directory_index (DirectoryIndex):
+        \t\\- The download root index refreshed by this check.
+        referenced_paths (Iterable[str]):
+        \t\\- The local paths of every torrent in Transmission.
+        notifier (Notifier, optional):
+        \t\\- The background notifier. The emails are sent right away when not set. Defaults to None.
+        torrent_store (TorrentStore, optional):
+        \t\\- The store that records the pending storage migrations. Defaults to None.
+
+    Returns:
+        list[tuple[str, int]]:
+        \t\\- The orphaned paths with their sizes in bytes.
+    """
+    logger = logging.getLogger(__name__)
+    logger.debug("=" * 20 + "%s" + "=" * 20, get_function_name())
+    # Custom flowchart tracking. This is ideal for large projects that move a lot.
+    # For any third-party modules, set the flow before making the function call.
+    logger_flowchart = logging.getLogger("flowchart")
+    logger_flowchart.debug("Flowchart --> Function: %s", get_function_name())
+
+    exclude_paths: list[str] = [f"{startup_settings.root_download_path}/{path}" for path in startup_settings.orphan_exclude]
+    if torrent_store:
+        for torrent, target_location in torrent_store.pending_migrations():
+            target_path = os.path.abspath(f"{startup_settings.root_download_path}/{target_location}/{torrent.name}")
+            exclude_paths += [target_path, get_partial_path(target_path)]
+    with TRACER.span("orphans") as span_args:
+        orphans: list[tuple[str, int]] = directory_index.find_orphans(
+            referenced_paths=referenced_paths,
+            min_age=startup_settings.orphan_min_age_hours * 3600,
+            exclude_paths=exclude_paths,
+        )
+        span_args["orphans"] = len(orphans)
+    new_orphans = [(path, size) for path, size in orphans if path not in directory_index.reported]
+    directory_index.reported = {path for path, _ in orphans}
+    METRICS.inc("orphans_found", len(new_orphans))
+    if new_orphans:
+        for path, size in new_orphans:
+            logger.warning("The path (%s) is not referenced by any torrent. Orphaned size: %s bytes", path, size)
+        orphan_lines = "\n".join(f"  - {path} ({size} bytes)" for path, size in new_orphans)
+        notify(
+            startup_settings=startup_settings,
+            notifier=notifier,
+            subject="Orphaned Torrent Data",
+            body=f"{len(new_orphans)} path(s) in the torrent download folders are not referenced by any torrent in Transmission.\n{orphan_lines}",
+        )
+
+    if orphans and startup_settings.reclaim_orphans:
+        deletion_pool = DeletionPool(
+            tree_workers=startup_settings.deletion_workers, file_workers=startup_settings.deletion_file_workers
+        )
+        try:
+            for deletion in [deletion_pool.submit(path=path) for path, _ in orphans]:
+                deletion_result: DeletionResult = deletion.result()
+                METRICS.inc("orphan_bytes_reclaimed", deletion_result.bytes_freed)
+                logger.info(
+                    "The orphaned path (%s) was deleted. Removed %s file(s) and freed %s bytes",
+                    deletion_result.path,
+                    deletion_result.files_removed,
+                    deletion_result.bytes_freed,
+                )
+                for error in deletion_result.errors:
+                    logger.error("The orphaned path deletion returned an error: %s", error)
+        finally:
+            deletion_pool.shutdown(wait=True)
+    return orphans
+
+
+def resume_removals(
+    startup_settings: StartupSettings,
+    client: Union[TransmissionRPC, TransmissionRemote],
+    torrent_store: TorrentStore,
+    deletion_pool: DeletionPool,
+    notifier: Union[Notifier, None] = None,
+) -> list[tuple[Torrent, Union["Future[DeletionResult]", None]]]:
+    """
+    Resumes the removals that were interrupted before they finished.
+
+    Removals interrupted before Transmission confirmed the removal are sent again. Removals
+    interrupted before the folder deletion queue the folder deletion without a torrent scan.
+
+    Args:
+        startup_settings (StartupSettings):
+        \t\\- The startup settings.
+        client (Union[TransmissionRPC, TransmissionRemote]):
+        \t\\- The connected Transmission client.
+        torrent_store (TorrentStore):
+        \t\\- The store that records the in-flight removals.
+        deletion_pool (DeletionPool):
+        \t\\- The pool that deletes the torrent folders.
+        notifier (Notifier, optional):
+        \t\\- The background notifier. The emails are sent right away when not set. Defaults to None.
+
+    Returns:
+        list[tuple[Torrent, Union[Future[DeletionResult], None]]]:
+        \t\\- The torrents with the pending deletion or None when no deletion was queued.
+    """
+    logger = logging.getLogger(__name__)
+    logger.debug("=" * 20 + "%s" + "=" * 20, get_function_name())
+    # Custom flowchart tracking. This is ideal for large projects that move a lot.
+    # For any third-party modules, set the flow before making the function call.
+    logger_flowchart = logging.getLogger("flowchart")
+    logger_flowchart.debug("Flowchart --> Function: %s", get_function_name())
+
+    pending_removals: list[tuple[Torrent, str]] = torrent_store.pending_removals()
+    if not pending_removals:
+        return []
+    logger.info("Resuming %s interrupted torrent removal(s)", len(pending_removals))
+
+    transmission_torrents: list[Torrent] = [torrent for torrent, stage in pending_removals if stage == STAGE_TRANSMISSION]
+    directory_torrents: list[Torrent] = [torrent for torrent, stage in pending_removals if stage == STAGE_DIRECTORY]
+    if transmission_torrents:
+        directory_torrents += remove_from_transmission(
+            startup_settings=startup_settings,
+            client=client,
+            torrents=transmission_torrents,
+            torrent_store=torrent_store,
+            notifier=notifier,
+        )
+
+    # Folders deleted before the interruption finish without the missing torrent alert.
+    finished_torrents: list[Torrent] = []
+    resume_torrents: list[Torrent] = []
+    for torrent in directory_torrents:
+        torrent_path = get_torrent_path(startup_settings=startup_settings, torrent=torrent)
+        if startup_settings.delete_local_data or os.path.lexists(torrent_path):
+            resume_torrents.append(torrent)
+        else:
+            finished_torrents.append(torrent)
+    if finished_torrents:
+        logger.debug("%s interrupted torrent folder removal(s) already completed", len(finished_torrents))
+        torrent_store.finish_removals(torrents=finished_torrents)
+
+    return remove_from_directory(
+        startup_settings=startup_settings, torrents=resume_torrents, deletion_pool=deletion_pool, notifier=notifier
+    )
+
+
+def get_removable_torrents(startup_settings: StartupSettings, torrents: list[Torrent]) -> list[Torrent]:
+    """
+    Checks every torrent against the removal policy in one pass over the torrent columns.
+
+    Args:
+        startup_settings (StartupSettings):
+        \t\\- The startup settings.
+        torrents (list[Torrent]):
+        \t\\- The torrent details.
+
+    Returns:
+        list[Torrent]:
+        \t\\- The torrents that need removed in the given order.
+    """
+    logger = logging.getLogger(__name__)
+    METRICS.inc("torrents_scanned", len(torrents))
+
+    removable_torrents = startup_settings.removal_policy.select(torrents)
+    logger.debug(
+        "%s of %s torrent(s) matched the removal policy %s",
+        len(removable_torrents),
+        len(torrents),
+        startup_settings.removal_policy.description,
+    )
+    for torrent in removable_torrents:
+        logger.info(
+            "The torrent (%s) matched the removal policy. Removing torrent from transmission and the directory\n  - Ratio: %s\n  - Progress: %.0f%%\n  - Stop Location: %s\n  - State: %s",
+            torrent.name,
+            torrent.ratio,
+            torrent.percent_done * 100,
+            torrent.location,
+            torrent.state,
+        )
+    return removable_torrents
+
+
+def start_remove(
+    startup_settings: StartupSettings,
+    torrent_sync: Union[TorrentSync, None] = None,
+    torrent_store: Union[TorrentStore, None] = None,
+    notifier: Union[Notifier, None] = None,
+    ratio_forecast: Union[RatioForecast, None] = None,
+    directory_index: Union[DirectoryIndex, None] = None,
+    call_limiter: Union[CallLimiter, None] = None,
+    circuit_breaker: Union[CircuitBreaker, None] = None,
+):
+    """
+    Starts the removal of torrents that match the removal policy.
+
+    The policy is checked over batches of torrents, so the streamed transmission-remote
+    torrents are checked while the output arrives. Torrents are removed one at a time by
+    default. The batch removal mode removes every matching torrent in one call per cycle.
+
+    Args:
+        startup_settings (StartupSettings):
+        \t\\- The startup settings.
+        torrent_sync (TorrentSync, optional):
+        \t\\- The torrent table kept between checks. Every torrent is fetched when not set. Defaults to None.
+        torrent_store (TorrentStore, optional):
+        \t\\- The store that records the in-flight removals. Interrupted removals resume first. Defaults to None.
+        notifier (Notifier, optional):
+        \t\\- The background notifier. The emails are sent right away when not set. Defaults to None.
+        ratio_forecast (RatioForecast, optional):
+        \t\\- The forecast updated with the torrents that were kept. Defaults to None.
+        directory_index (DirectoryIndex, optional):
+        \t\\- The download root index kept between checks. The orphaned data is reported when set. Defaults to None.
+        call_limiter (CallLimiter, optional):
+        \t\\- The limiter kept between checks that the client calls wait for. Defaults to None.
+        circuit_breaker (CircuitBreaker, optional):
+        \t\\- The circuit breaker of the Transmission daemon kept between checks. Defaults to None.
 
     Raises:
         FTypeError (fexception):
@@ -45,272 +660,165 @@ def start_remove(startup_settings: StartupSettings):
         TransmissionExtError:
         \t\\- Transmission Remove was not able to detect an installed version of transmission-remote.
         TransmissionExtError:
-        \t\\- The torrent 'name' did not return '1' entry.
+        \t\\- The Transmission RPC endpoint rejected the username or password.
         TransmissionExtError:
-        \t\\- The torrent 'ratio' did not return '1' entry.
+        \t\\- The Transmission RPC endpoint did not return a successful result.
         TransmissionExtError:
-        \t\\- The torrent 'progress' did not return '1' entry.
+        \t\\- The torrent '{field}' did not return '1' entry.
         TransmissionExtError:
-        \t\\- The torrent 'stop_location' did not return '1' entry.
-        TransmissionExtError:
-        \t\\- The torrent 'state' did not return '1' entry.
+        \t\\- The torrent 'ratio' line did return a float value.
+        TransmissionConnectionError:
+        \t\\- The Transmission RPC endpoint returned a server error.
+        TransmissionConnectionError:
+        \t\\- transmission-remote did not complete the call.
+        CircuitOpenError:
+        \t\\- The transmission circuit is open after repeated failures.
     """
     logger = logging.getLogger(__name__)
-    logger.debug(f"=" * 20 + get_function_name() + "=" * 20)
+    logger.debug("=" * 20 + "%s" + "=" * 20, get_function_name())
     # Custom flowchart tracking. This is ideal for large projects that move a lot.
     # For any third-party modules, set the flow before making the function call.
     logger_flowchart = logging.getLogger("flowchart")
-    logger_flowchart.debug(f"Flowchart --> Function: {get_function_name()}")
+    logger_flowchart.debug("Flowchart --> Function: %s", get_function_name())
 
     type_check(value=startup_settings, required_type=StartupSettings)
 
-    # Separate commands must be in a list with each spaced entry on a separate line.
-    server_connection = str_to_list(value=f"transmission-remote {startup_settings.server} --list", sep=" ")
+    # Calls function to connect and get the torrent details.
+    with METRICS.timer("phase_duration_seconds", phase="fetch"), TRACER.span("list"):
+        # The orphan check needs every torrent. A delta table can miss a torrent added between refreshes.
+        client, torrents = get_torrents(
+            startup_settings=startup_settings,
+            torrent_sync=torrent_sync,
+            call_limiter=call_limiter,
+            circuit_breaker=circuit_breaker,
+            full_sync=bool(directory_index),
+        )
+    if directory_index:
+        with METRICS.timer("phase_duration_seconds", phase="index"), TRACER.span("index"):
+            directory_index.refresh(root=startup_settings.root_download_path)
 
+    # The deletion pool deletes the torrent folders while the loop keeps checking torrents.
+    deletion_pool = DeletionPool(
+        tree_workers=startup_settings.deletion_workers, file_workers=startup_settings.deletion_file_workers
+    )
     try:
-        # Calls function to perform processing task.
-        torrents: list = start_subprocess(program_arguments=server_connection).stdout
-    except FileNotFoundError as exc:
-        if "The system cannot find the file specified" in str(exc):
-            exc_args = {
-                "main_message": "Transmission Remove was not able to detect an installed version of transmission-remote.",
-                "custom_type": TransmissionExtError,
-                "expected_result": "Response when running: transmission-remote",
-                "returned_result": "The system cannot find the file specified",
-                "suggested_resolution": [
-                    "Verify you have installed transmission-cli",
-                    "Run 'transmission-remote' from the command line and check for usage output.",
-                ],
-            }
-            raise TransmissionExtError(FCustomException(message_args=exc_args))
-        else:
-            raise
-
-    # Loops through each torrent.
-    for torrent_id in torrents:
-        # Example Return:
-        # - ['NAME', '  Id: 149',
-        #    '  Name: Sample.Torrent.Name',
-        #    '  Hash: fc298a353253232532541e3ba5adbec712f',
-        #    '  Magnet: magnet:?xt=urn:btih:135315sadfa3153151rfasdfasdfadsf2f&dn=Sample.Torrent.Name&tr=https%3A%2F%2Ftracker.13351632.com%2Fannounce.php%3Fpasskey%1532523513243113',
-        #    '',
-        #    'TRANSFER',
-        #    '  State: Idle',
-        #    '  Location: /downloads/complete/sonarr',
-        #    '  Percent Done: 100%',
-        #    '  ETA: 0 seconds (0 seconds)',
-        #    '  Download Speed: 0 kB/s',
-        #    '  Upload Speed: 0 kB/s',
-        #    '  Have: 3.54 GB (3.54 GB verified)',
-        #    '  Availability: 100%',
-        #    '  Total size: 3.54 GB (3.54 GB wanted)',
-        #    '  Downloaded: 3.54 GB',
-        #    '  Uploaded: 497.8 MB',
-        #    '  Ratio: 0.1',
-        #    '  Corrupt DL: None',
-        #    '  Peers: connected to 0, uploading to 0, downloading from 0',
-        #    '',
-        #    'HISTORY',
-        #    '  Date added:       Tue Jan 11 14:45:59 2022',
-        #    '  Date finished:    Tue Jan 11 15:16:41 2022',
-        #    '  Date started:     Sun Jul  3 12:15:27 2022',
-        #    '  Latest activity:  Wed Jan 12 07:30:57 2022',
-        #    '  Downloading Time: 34 minutes (2091 seconds)',
-        #    '  Seeding Time:     20 hours (72465 seconds)',
-        #    '', 'ORIGINS',
-        #    '  Public torrent: No',
-        #    '  Creator: mktorrent 1.0',
-        #    '  Piece Count: 1688',
-        #    '  Piece Size: 2.00 MiB',
-        #    '', 'LIMITS & BANDWIDTH',
-        #    '  Download Limit: Unlimited',
-        #    '  Upload Limit: Unlimited',
-        #    '  Ratio Limit: Default',
-        #    '  Honors Session Limits: Yes',
-        #    '  Peer limit: 50',
-        #    '  Bandwidth Priority: Normal',
-        #    '']
-
-        # Required Command: transmission-remote {startup_settings.server} --torrent •{torrent_id}• --info'
-        # This converts the command line to a list and inserts the torrent_id line. The torrent_id will
-        # stay intact and not get split.
-        server_info = str_to_list(
-            value=f"transmission-remote {startup_settings.server} --torrent •{torrent_id}• --info", sep=" ", exclude="•"
-        )
-        torrent_info: list[str] = start_subprocess(program_arguments=server_info).stdout
-
-        # Some torrent_info output may be empty.
-        if len(torrent_info) >= 1:
-            exc_msg: Union[str, None] = None
-            exc_expected_result: Union[str, int, None] = None
-            exc_returned_result: Union[str, int, None] = None
-            name: str = ""
-            ratio: float = 0
-            progress: str = ""
-            stop_location: str = ""
-            state: str = ""
-
-            # Pulls details from the torrent info.
-            torrent_name: list[str] = [entry for entry in torrent_info if "Name:" in entry]
-            if len(torrent_name) == 1:
-                # Replace Example:
-                #   Original: Name: TorrentName
-                #   Replaced: TorrentName
-                name: str = torrent_name[0].strip().replace("Name: ", "")
-            else:
-                exc_msg = "The torrent 'name' did not return '1' entry."
-                exc_expected_result = 1
-                exc_returned_result = len(torrent_name)
-            torrent_ratio: list[str] = [entry for entry in torrent_info if "Ratio:" in entry]
-            if len(torrent_ratio) == 1:
-                # Replace Example:
-                #   Original: Ratio: 1.3
-                #   Replaced: 1.3
-                possible_float: str = torrent_ratio[0].strip().replace("Ratio: ", "")
-                if "." in possible_float:
-                    ratio: float = float(possible_float)
-                elif "None" in possible_float:
-                    ratio: float = float(0.0)
-                else:
-                    exc_msg = "The torrent 'ratio' line did return a float value."
-                    exc_expected_result = "A float value within the string"
-                    exc_returned_result = torrent_ratio[0].strip()
-            else:
-                exc_msg = "The torrent 'ratio' did not return '1' entry."
-                exc_expected_result = 1
-                exc_returned_result = len(torrent_ratio)
-            torrent_progress: list[str] = [entry for entry in torrent_info if "Percent Done:" in entry]
-            if len(torrent_progress) == 1:
-                # Replace Example:
-                #   Original: Percent Done: 100%
-                #   Replaced: 100%
-                progress: str = torrent_progress[0].strip().replace("Percent Done: ", "")
-            else:
-                exc_msg = "The torrent 'progress' did not return '1' entry."
-                exc_expected_result = 1
-                exc_returned_result = len(torrent_progress)
-            torrent_stop_location: list[str] = [entry for entry in torrent_info if "Location:" in entry]
-            if len(torrent_stop_location) == 1:
-                # Replace Example:
-                #   Original: Location: /downloads/complete/radarr
-                #   Replaced: /downloads/complete/radarr
-                stop_location: str = torrent_stop_location[0].strip().replace("Location: ", "")
-            else:
-                exc_msg = "The torrent 'stop_location' did not return '1' entry."
-                exc_expected_result = 1
-                exc_returned_result = len(torrent_stop_location)
-            torrent_state: list[str] = [entry for entry in torrent_info if "State:" in entry]
-            if len(torrent_state) == 1:
-                # Replace Example:
-                #   Original: State: Idle
-                #   Replaced: Idle
-                state: str = torrent_state[0].strip().replace("State: ", "")
-            else:
-                exc_msg = "The torrent 'state' did not return '1' entry."
-                exc_expected_result = 1
-                exc_returned_result = len(torrent_state)
-
-            # Sets the torrent path.
-            torrent_path = os.path.abspath(f"{startup_settings.root_download_path}/{stop_location}/{name}")
-
-            # Checks if an exception needs flagged.
-            if exc_msg:
-                exc_args = {
-                    "main_message": exc_msg,
-                    "custom_type": TransmissionExtError,
-                    "expected_result": exc_expected_result,
-                    "returned_result": exc_returned_result,
-                }
-                raise TransmissionExtError(FCustomException(message_args=exc_args))
+        # Holds the torrents that meet the ratio when batch removal is enabled.
+        batch_torrents: list[Torrent] = []
+        # Holds the queued folder deletions until the end of the check.
+        deletions: list[tuple[Torrent, Union["Future[DeletionResult]", None]]] = []
 
-            logger.debug(
-                f"A torrent entry was discovered. Below are details about this torrent\n  - Name: {name}\n  - Ratio: {ratio}\n  - Progress: {progress}\n  - Stop Location: {stop_location}\n  - State: {state}"
+        # Holds the hashes of the resumed removals, so they are not removed twice.
+        resumed_hashes: set[str] = set()
+        if torrent_store:
+            resumed_hashes = {torrent.hash for torrent, _ in torrent_store.pending_removals()}
+            resumed_deletions = resume_removals(
+                startup_settings=startup_settings,
+                client=client,
+                torrent_store=torrent_store,
+                deletion_pool=deletion_pool,
+                notifier=notifier,
             )
+            if torrent_sync:
+                torrent_sync.discard(torrents=[torrent for torrent, _ in resumed_deletions])
+            deletions += resumed_deletions
 
-            # Converts the float values to decimal for compare.
-            ratio_to_faction = format(ratio)
-            removal_ratio_to_fraction = format(startup_settings.removal_ratio)
-            if ratio_to_faction >= removal_ratio_to_fraction or state == "Finished":
-                logger.info(
-                    f"The torrent ({name}) has reached its share ratio of {startup_settings.removal_ratio}. Removing torrent from transmission and the directory"
+        removable_torrents: list[Torrent] = []
+        # The kept torrents are only held when the disk pressure check or the forecast needs them.
+        keep_torrents: bool = startup_settings.disk_pressure or bool(ratio_forecast)
+        kept_torrents: list[Torrent] = []
+        # Holds the local path of every torrent for the orphan check.
+        referenced_paths: set[str] = set()
+        torrent_iterator = iter(torrents)
+        while True:
+            # The span includes the streamed transmission-remote output read for the batch.
+            with TRACER.span("inspect") as span_args:
+                streamed_torrents = list(islice(torrent_iterator, DECISION_BATCH_SIZE))
+                if not streamed_torrents:
+                    break
+                if directory_index:
+                    referenced_paths.update(
+                        get_torrent_path(startup_settings=startup_settings, torrent=torrent)
+                        for torrent in streamed_torrents
+                    )
+                candidate_torrents = [torrent for torrent in streamed_torrents if torrent.hash not in resumed_hashes]
+                batch_removable = get_removable_torrents(startup_settings=startup_settings, torrents=candidate_torrents)
+                removable_torrents += batch_removable
+                if keep_torrents:
+                    removable_hashes = {torrent.hash for torrent in batch_removable}
+                    kept_torrents += [torrent for torrent in candidate_torrents if torrent.hash not in removable_hashes]
+                span_args["torrents"] = len(streamed_torrents)
+                span_args["removable"] = len(batch_removable)
+        if keep_torrents:
+            if startup_settings.disk_pressure:
+                # Disk pressure removes more torrents when the policy removals do not free enough space.
+                pressure_torrents = get_pressure_torrents(
+                    startup_settings=startup_settings,
+                    torrents=kept_torrents,
+                    planned_bytes=sum(torrent.size for torrent in removable_torrents),
                 )
-                # ########################################################
-                # ###########Removes the torrent from transmission########
-                # ########################################################
-                server_info = str_to_list(
-                    value=f"transmission-remote {startup_settings.server} --torrent •{torrent_id}• --remove",
-                    sep=" ",
-                    exclude="•",
+                removable_torrents += pressure_torrents
+                pressure_hashes = {torrent.hash for torrent in pressure_torrents}
+                kept_torrents = [torrent for torrent in kept_torrents if torrent.hash not in pressure_hashes]
+            if ratio_forecast:
+                ratio_forecast.update(torrents=kept_torrents, removal_ratios=startup_settings.removal_policy.ratio_targets)
+        # Loops through each torrent.
+        for torrent in removable_torrents:
+            if startup_settings.batch_removal:
+                batch_torrents.append(torrent)
+            else:
+                removed_torrents = remove_from_transmission(
+                    startup_settings=startup_settings,
+                    client=client,
+                    torrents=[torrent],
+                    torrent_store=torrent_store,
+                    notifier=notifier,
+                    by_id=True,
+                )
+                if torrent_sync:
+                    torrent_sync.discard(torrents=removed_torrents)
+                deletions += remove_from_directory(
+                    startup_settings=startup_settings,
+                    torrents=removed_torrents,
+                    deletion_pool=deletion_pool,
+                    notifier=notifier,
+                    directory_index=directory_index,
                 )
-                # Successful Removal Response: ['x.x.x.x:9091/transmission/rpc/ responded: "success"']
-                torrent_remove_info: list[str] = start_subprocess(program_arguments=server_info).stdout
-                if "success" in str(torrent_remove_info):
-                    logger.debug(f"Transmission returned a successful response during the torrent ({name}) removal")
-                else:
-                    logger.error(f"The torrent ({name}) did not removed from Transmission successfully")
-                    # Converts the dataclass to a dictionary.
-                    email_settings_asdict: dict = asdict(startup_settings.email_settings)
-                    send_email(
-                        email_settings=email_settings_asdict,
-                        subject="Error: Transmission Torrent Removal Failed",
-                        body=f"Transmission did not returned a successful response during the torrent ({name}) removal.\n\nResponse = {torrent_remove_info}",
-                    )
 
-                # Sleeps 10 seconds to allow time for delete before validation.
-                sleep(10)
-
-                # Calls function to get an updated list of torrents to verify the torrent was removed.
-                torrents: list = start_subprocess(program_arguments=server_connection).stdout
-                if any(torrent for torrent in torrents if torrent == torrent_id):
-                    logger.error(f"The torrent ({name}) did not removed from Transmission successfully")
-                    # Converts the dataclass to a dictionary.
-                    email_settings_asdict: dict = asdict(startup_settings.email_settings)
-                    send_email(
-                        email_settings=email_settings_asdict,
-                        subject="Error: Transmission Torrent Removal Failed",
-                        body=f"The torrent ({name}) did not removed from Transmission successfully. Manually intervention is required.",
-                    )
-                else:
-                    logger.info(f"The torrent ({name}) removed from Transmission successfully")
-
-                # ########################################################
-                # ######Removes the torrent files from the directory######
-                # ########################################################
-                logger.debug(f"Removing torrent from complete path: {torrent_path}")
-                # Checks if the torrent folder exists.
-                if not os.path.exists(torrent_path):
-                    logger.warn(f"The torrent path ({torrent_path}) does not exist. No removal required")
-                    # Converts the dataclass to a dictionary.
-                    email_settings_asdict: dict = asdict(startup_settings.email_settings)
-                    send_email(
-                        email_settings=email_settings_asdict,
-                        subject="Torrent Missing",
-                        body=f"The torrent path ({torrent_path}) did not exist. No removal required",
-                    )
-                else:
-                    logger.debug(f"The torrent path ({torrent_path}) exist. Removing the torrent folder")
-
-                    # Removes the torrent folder.
-                    shutil.rmtree(path=torrent_path)
-
-                # Sleeps 10 seconds to allow time for delete before validation.
-                sleep(10)
-
-                # ########################################################
-                # #####Verifies the torrent removed from the directory####
-                # ########################################################
-                logger.debug(f"Verifing the torrent folder was removed")
-                # Checks if the torrent folder exists.
-                if not os.path.exists(torrent_path):
-                    logger.info(f"The torrent path ({torrent_path}) removed successfully")
-                else:
-                    logger.error(f"The torrent path ({torrent_path}) still exist. Removing the torrent folder failed")
-                    # Converts the dataclass to a dictionary.
-                    email_settings_asdict: dict = asdict(startup_settings.email_settings)
-                    send_email(
-                        email_settings=email_settings_asdict,
-                        subject="Error: Torrent Folder Removal Failed",
-                        body=f"The torrent ({name}) folder did not removed from the directory ({torrent_path}) successfully. Manually intervention is required.",
-                    )
-        else:
-            logger.debug("No usable torrent info provided. Skipping this entry")
+        if batch_torrents:
+            logger.info("Removing %s torrent(s) from transmission and the directory as one batch", len(batch_torrents))
+            removed_torrents = remove_from_transmission(
+                startup_settings=startup_settings,
+                client=client,
+                torrents=batch_torrents,
+                torrent_store=torrent_store,
+                notifier=notifier,
+                by_id=True,
+            )
+            if torrent_sync:
+                torrent_sync.discard(torrents=removed_torrents)
+            deletions += remove_from_directory(
+                startup_settings=startup_settings,
+                torrents=removed_torrents,
+                deletion_pool=deletion_pool,
+                notifier=notifier,
+                directory_index=directory_index,
+            )
+
+        if deletions:
+            verify_directory_removal(
+                startup_settings=startup_settings,
+                deletions=deletions,
+                torrent_store=torrent_store,
+                notifier=notifier,
+            )
+        if directory_index:
+            remove_orphans(
+                startup_settings=startup_settings,
+                directory_index=directory_index,
+                referenced_paths=referenced_paths,
+                notifier=notifier,
+                torrent_store=torrent_store,
+            )
+    finally:
+        deletion_pool.shutdown(wait=True)
+        client.close()
@@ -0,0 +1,389 @@
+"""This module is designed to persist the torrent snapshot and the in-flight removal and migration state in SQLite."""
+# Built-in/Generic Imports
+import time
+import sqlite3
+import logging
+import threading
+from typing import Iterable, Union
+
+# Local Dataclasses
+from common.common import Torrent
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, store"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+# The removal stages recorded for in-flight removals.
+STAGE_TRANSMISSION: str = "transmission"
+STAGE_DIRECTORY: str = "directory"
+
+# Increased when the torrents table changes. An older snapshot is dropped and rebuilt by the next full sync.
+SCHEMA_VERSION: int = 1
+
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS torrents (
+    hash TEXT PRIMARY KEY,
+    id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    ratio REAL NOT NULL,
+    percent_done REAL NOT NULL,
+    location TEXT NOT NULL,
+    state TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    seeding_time INTEGER NOT NULL,
+    added_date REAL NOT NULL,
+    trackers TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS removals (
+    hash TEXT PRIMARY KEY,
+    id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    location TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    started REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS migrations (
+    hash TEXT PRIMARY KEY,
+    id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    location TEXT NOT NULL,
+    target_location TEXT NOT NULL,
+    started REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+UPSERT_TORRENT: str = """
+INSERT INTO torrents (hash, id, name, ratio, percent_done, location, state, size, seeding_time, added_date, trackers)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(hash) DO UPDATE SET
+    id = excluded.id,
+    name = excluded.name,
+    ratio = excluded.ratio,
+    percent_done = excluded.percent_done,
+    location = excluded.location,
+    state = excluded.state,
+    size = excluded.size,
+    seeding_time = excluded.seeding_time,
+    added_date = excluded.added_date,
+    trackers = excluded.trackers
+"""
+
+
+def _torrent_row(torrent: Torrent) -> tuple:
+    return (
+        torrent.hash,
+        torrent.id,
+        torrent.name,
+        torrent.ratio,
+        torrent.percent_done,
+        torrent.location,
+        torrent.state,
+        torrent.size,
+        torrent.seeding_time,
+        torrent.added_date,
+        # Host names have no spaces.
+        " ".join(torrent.trackers),
+    )
+
+
+class TorrentStore(object):
+    """
+    SQLite store for the last-seen torrent snapshot and the in-flight removals and migrations.
+
+    The database runs in WAL mode. Each snapshot save is one transaction with bulk
+    executemany writes. The store is opened once and kept open between checks.
+    """
+
+    def __init__(self) -> None:
+        self.path: Union[str, None] = None
+        self._connection: Union[sqlite3.Connection, None] = None
+        # The pipeline writes from worker threads.
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """True when the database is open."""
+        return self._connection is not None
+
+    def open(self, path: str) -> None:
+        """
+        Opens the database and creates the tables. An open database with the same path is kept.
+
+        Args:
+            path (str):
+            \t\\- The database file path.
+        """
+        if self._connection is not None and self.path == path:
+            return
+        self.close()
+
+        logger = logging.getLogger(__name__)
+        connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        if connection.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            # The snapshot is a cache, so an older layout is dropped instead of migrated.
+            connection.executescript(
+                "DROP TABLE IF EXISTS torrents; DROP TABLE IF EXISTS meta; "
+                f"PRAGMA user_version = {SCHEMA_VERSION};"
+            )
+        connection.executescript(SCHEMA)
+        self._connection = connection
+        self.path = path
+        logger.debug("Opened the torrent state database (%s)", path)
+
+    def close(self) -> None:
+        """Closes the database."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _write(self, statements: Iterable[tuple[str, Union[Iterable[tuple], tuple]]]) -> None:
+        """
+        Runs the statements in one transaction.
+
+        Args:
+            statements (Iterable[tuple[str, Union[Iterable[tuple], tuple]]]):
+            \t\\- The SQL and parameters. A list of parameter tuples runs with executemany.
+        """
+        with self._lock:
+            connection = self._connection
+            if connection is None:
+                return
+            connection.execute("BEGIN")
+            try:
+                for sql, parameters in statements:
+                    if isinstance(parameters, list):
+                        connection.executemany(sql, parameters)
+                    else:
+                        connection.execute(sql, parameters)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    def load_snapshot(self) -> tuple[list[Torrent], Union[float, None]]:
+        """
+        Loads the last saved torrent snapshot.
+
+        Returns:
+            tuple[list[Torrent], Union[float, None]]:
+            \t\\- The torrents and the time.time() of the last full sync or None when no full sync was saved.
+        """
+        with self._lock:
+            if self._connection is None:
+                return [], None
+            rows = self._connection.execute(
+                "SELECT id, hash, name, ratio, percent_done, location, state, size, seeding_time, added_date, trackers "
+                "FROM torrents"
+            ).fetchall()
+            full_sync_row = self._connection.execute("SELECT value FROM meta WHERE key = 'last_full_sync'").fetchone()
+        torrents = [
+            Torrent(
+                id=row[0],
+                hash=row[1],
+                name=row[2],
+                ratio=row[3],
+                percent_done=row[4],
+                location=row[5],
+                state=row[6],
+                size=row[7],
+                seeding_time=row[8],
+                added_date=row[9],
+                trackers=tuple(row[10].split()),
+                # The upload speed is not saved. The next refresh reads the current speed.
+                upload_rate=0.0,
+            )
+            for row in rows
+        ]
+        return torrents, full_sync_row[0] if full_sync_row else None
+
+    def replace_snapshot(self, torrents: list[Torrent]) -> None:
+        """
+        Replaces the saved snapshot after a full sync.
+
+        Args:
+            torrents (list[Torrent]):
+            \t\\- Every torrent.
+        """
+        self._write(
+            [
+                ("DELETE FROM torrents", ()),
+                (UPSERT_TORRENT, [_torrent_row(torrent) for torrent in torrents]),
+                ("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_full_sync', ?)", (time.time(),)),
+            ]
+        )
+
+    def update_snapshot(self, changed_torrents: list[Torrent], removed_hashes: list[str]) -> None:
+        """
+        Bulk upserts the changed torrents and deletes the removed torrents after a delta sync.
+
+        Args:
+            changed_torrents (list[Torrent]):
+            \t\\- The changed torrents.
+            removed_hashes (list[str]):
+            \t\\- The hashes of the removed torrents.
+        """
+        if not changed_torrents and not removed_hashes:
+            return
+        self._write(
+            [
+                (UPSERT_TORRENT, [_torrent_row(torrent) for torrent in changed_torrents]),
+                ("DELETE FROM torrents WHERE hash = ?", [(torrent_hash,) for torrent_hash in removed_hashes]),
+            ]
+        )
+
+    def begin_removals(self, torrents: list[Torrent]) -> None:
+        """
+        Records torrents that are about to be removed from Transmission.
+
+        Args:
+            torrents (list[Torrent]):
+            \t\\- The torrents being removed.
+        """
+        started = time.time()
+        self._write(
+            [
+                (
+                    "INSERT OR REPLACE INTO removals (hash, id, name, location, stage, started) VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (torrent.hash, torrent.id, torrent.name, torrent.location, STAGE_TRANSMISSION, started)
+                        for torrent in torrents
+                    ],
+                )
+            ]
+        )
+
+    def set_removal_stage(self, torrents: list[Torrent], stage: str) -> None:
+        """
+        Moves in-flight removals to the next stage.
+
+        Args:
+            torrents (list[Torrent]):
+            \t\\- The torrents being removed.
+            stage (str):
+            \t\\- The new stage (ex: STAGE_DIRECTORY).
+        """
+        self._write(
+            [("UPDATE removals SET stage = ? WHERE hash = ?", [(stage, torrent.hash) for torrent in torrents])]
+        )
+
+    def finish_removals(self, torrents: list[Torrent]) -> None:
+        """
+        Clears completed or abandoned removals.
+
+        Args:
+            torrents (list[Torrent]):
+            \t\\- The torrents that finished the removal.
+        """
+        self._write([("DELETE FROM removals WHERE hash = ?", [(torrent.hash,) for torrent in torrents])])
+
+    def pending_removals(self) -> list[tuple[Torrent, str]]:
+        """
+        Gets the removals interrupted before they finished.
+
+        Returns:
+            list[tuple[Torrent, str]]:
+            \t\\- The torrents and the stage each removal stopped at.
+        """
+        with self._lock:
+            if self._connection is None:
+                return []
+            rows = self._connection.execute("SELECT id, hash, name, location, stage FROM removals").fetchall()
+        return [
+            (
+                Torrent(
+                    id=row[0],
+                    hash=row[1],
+                    name=row[2],
+                    ratio=0.0,
+                    percent_done=0.0,
+                    location=row[3],
+                    state="",
+                    size=0,
+                    seeding_time=0,
+                    added_date=0.0,
+                    trackers=(),
+                    upload_rate=0.0,
+                ),
+                row[4],
+            )
+            for row in rows
+        ]
+
+    def begin_migrations(self, torrents: list[Torrent], target_location: str) -> None:
+        """
+        Records torrents whose data is about to be copied to a new location.
+
+        Args:
+            torrents (list[Torrent]):
+            \t\\- The torrents being migrated. The torrent location is the source location.
+            target_location (str):
+            \t\\- The Transmission download directory the data moves to.
+        """
+        started = time.time()
+        self._write(
+            [
+                (
+                    "INSERT OR REPLACE INTO migrations (hash, id, name, location, target_location, started) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (torrent.hash, torrent.id, torrent.name, torrent.location, target_location, started)
+                        for torrent in torrents
+                    ],
+                )
+            ]
+        )
+
+    def finish_migrations(self, torrents: list[Torrent]) -> None:
+        """
+        Clears completed or abandoned migrations.
+
+        Args:
+            torrents (list[Torrent]):
+            \t\\- The torrents that finished the migration.
+        """
+        self._write([("DELETE FROM migrations WHERE hash = ?", [(torrent.hash,) for torrent in torrents])])
+
+    def pending_migrations(self) -> list[tuple[Torrent, str]]:
+        """
+        Gets the migrations interrupted before the source data was deleted.
+
+        Returns:
+            list[tuple[Torrent, str]]:
+            \t\\- The torrents with the source location and the target location of each migration.
+        """
+        with self._lock:
+            if self._connection is None:
+                return []
+            rows = self._connection.execute("SELECT id, hash, name, location, target_location FROM migrations").fetchall()
+        return [
+            (
+                Torrent(
+                    id=row[0],
+                    hash=row[1],
+                    name=row[2],
+                    ratio=0.0,
+                    percent_done=0.0,
+                    location=row[3],
+                    state="",
+                    size=0,
+                    seeding_time=0,
+                    added_date=0.0,
+                    trackers=(),
+                    upload_rate=0.0,
+                ),
+                row[4],
+            )
+            for row in rows
+        ]
@@ -0,0 +1,166 @@
+"""This module is designed to keep an in-memory torrent table that refreshes only recently changed torrents."""
+# Built-in/Generic Imports
+import time
+import logging
+from typing import Union
+
+# Local Functions
+from remove.store import TorrentStore
+
+# Local Clients
+from common.rpc import TransmissionRPC
+from common.remote import TransmissionRemote
+
+# Local Dataclasses
+from common.common import Torrent, TorrentTable
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, sync"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+# The seconds of activity Transmission reports as recently active. A delta refresh further apart misses changes.
+RECENTLY_ACTIVE_WINDOW: float = 60.0
+
+
+class TorrentSync(object):
+    """
+    In-memory torrent table indexed by hash and Transmission ID.
+
+    The first refresh loads every torrent. Later refreshes only request the recently active
+    torrents from the RPC endpoint and drop the removed IDs. A full resync runs on the
+    full sync interval, after a Transmission restart is detected, and on every
+    transmission-remote refresh because transmission-remote has no delta query.
+
+    Transmission reports activity from the last 60 seconds only, so a refresh that follows
+    the previous refresh by more than RECENTLY_ACTIVE_WINDOW seconds is a full resync.
+
+    An attached torrent store warms the table at startup and saves each refresh. The first
+    refresh of a restarted process is a full resync because the gap since the saved
+    refresh is not known.
+
+    Args:
+        full_sync_interval (int, optional):
+        \t\\- The seconds between full resyncs. Defaults to 900.
+    """
+
+    def __init__(self, full_sync_interval: int = 900) -> None:
+        self.full_sync_interval = full_sync_interval
+        self.torrents = TorrentTable()
+        self._last_full_sync: Union[float, None] = None
+        self._last_refresh: Union[float, None] = None
+        self.store: Union[TorrentStore, None] = None
+
+    def _load(self, torrents: list[Torrent]) -> None:
+        self.torrents.replace(torrents=torrents)
+        self._last_full_sync = time.monotonic()
+        if self.store:
+            self.store.replace_snapshot(torrents=torrents)
+
+    def attach_store(self, store: TorrentStore) -> None:
+        """
+        Warms the table from the saved snapshot and saves every following refresh to the store.
+
+        Args:
+            store (TorrentStore):
+            \t\\- The open torrent store.
+        """
+        logger = logging.getLogger(__name__)
+
+        self.store = store
+        if self.torrents:
+            return
+        torrents, last_full_sync = store.load_snapshot()
+        if torrents and last_full_sync is not None:
+            self.torrents.replace(torrents=torrents)
+            # The saved wall-clock time is converted to the monotonic clock of this process.
+            self._last_full_sync = time.monotonic() - max(time.time() - last_full_sync, 0)
+            logger.debug("Warmed the torrent table with %s saved torrent(s)", len(torrents))
+
+    def refresh(self, client: Union[TransmissionRPC, TransmissionRemote], full_sync: bool = False) -> list[Torrent]:
+        """
+        Refreshes the torrent table.
+
+        Args:
+            client (Union[TransmissionRPC, TransmissionRemote]):
+            \t\\- The connected Transmission client.
+            full_sync (bool, optional):
+            \t\\- Loads every torrent even when a delta refresh is possible. Defaults to False.
+
+        Returns:
+            list[Torrent]:
+            \t\\- Every torrent in the table.
+        """
+        logger = logging.getLogger(__name__)
+
+        now = time.monotonic()
+        full_sync_due = (
+            full_sync
+            or self._last_full_sync is None
+            or now - self._last_full_sync >= self.full_sync_interval
+            # The recently active torrents would not cover the whole gap since the last refresh.
+            or self._last_refresh is None
+            or now - self._last_refresh > RECENTLY_ACTIVE_WINDOW
+        )
+        self._last_refresh = now
+        if full_sync_due or not isinstance(client, TransmissionRPC):
+            self._load(torrents=client.get_torrents())
+            logger.debug("Completed a full torrent sync with %s torrent(s)", len(self.torrents))
+            return self.torrents.values()
+
+        changed_torrents, removed_ids = client.get_recently_active()
+
+        # IDs are reassigned when Transmission restarts. A known ID with a new hash means the table is stale.
+        if any(
+            (known_torrent := self.torrents.get_by_id(torrent.id)) is not None and known_torrent.hash != torrent.hash
+            for torrent in changed_torrents
+        ):
+            logger.debug("The torrent IDs changed since the last sync. Running a full torrent sync")
+            self._load(torrents=client.get_torrents())
+            return self.torrents.values()
+
+        removed_hashes: list[str] = []
+        for torrent_id in removed_ids:
+            removed_torrent = self.torrents.remove_id(torrent_id)
+            if removed_torrent:
+                removed_hashes.append(removed_torrent.hash)
+        for torrent in changed_torrents:
+            self.torrents.add(torrent)
+        if self.store:
+            self.store.update_snapshot(changed_torrents=changed_torrents, removed_hashes=removed_hashes)
+
+        logger.debug(
+            "Completed a delta torrent sync with %s changed and %s removed torrent(s)", len(changed_torrents), len(removed_ids)
+        )
+        return self.torrents.values()
+
+    def discard(self, torrents: list[Torrent]) -> None:
+        """
+        Drops removed torrents from the table.
+
+        Args:
+            torrents (list[Torrent]):
+            \t\\- The torrents removed from Transmission.
+        """
+        for torrent in torrents:
+            self.torrents.remove(torrent)
+        if self.store:
+            self.store.update_snapshot(changed_torrents=[], removed_hashes=[torrent.hash for torrent in torrents])
+
+    def update(self, torrents: list[Torrent]) -> None:
+        """
+        Replaces the records of torrents changed by this program (ex: a new location).
+
+        Args:
+            torrents (list[Torrent]):
+            \t\\- The current torrent details from Transmission.
+        """
+        for torrent in torrents:
+            self.torrents.add(torrent)
+        if self.store:
+            self.store.update_snapshot(changed_torrents=torrents, removed_hashes=[])
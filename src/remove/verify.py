@@ -0,0 +1,245 @@
+"""This module is designed to verify torrent removals with deadline-based polling instead of fixed sleeps."""
+# Built-in/Generic Imports
+import os
+import sys
+import time
+import errno
+import select
+import logging
+import ctypes
+import ctypes.util
+from typing import Callable, Iterable, Union
+
+# Local Dataclasses
+from common.common import Torrent
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, verify"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+# The first poll delay in seconds. Each following delay doubles up to MAX_POLL_DELAY.
+INITIAL_POLL_DELAY: float = 0.05
+MAX_POLL_DELAY: float = 2.0
+
+# inotify event masks from <sys/inotify.h>.
+IN_MOVED_FROM = 0x00000040
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+
+def backoff_delays(deadline: float, initial_delay: float = INITIAL_POLL_DELAY, max_delay: float = MAX_POLL_DELAY):
+    """
+    Yields exponential backoff delays until the deadline passes.
+
+    Args:
+        deadline (float):
+        \t\\- The time.monotonic() value to stop at.
+        initial_delay (float, optional):
+        \t\\- The first delay in seconds. Defaults to INITIAL_POLL_DELAY.
+        max_delay (float, optional):
+        \t\\- The largest delay in seconds. Defaults to MAX_POLL_DELAY.
+
+    Yields:
+        float:
+        \t\\- The next delay in seconds. The last delay is cut short at the deadline.
+    """
+    delay = initial_delay
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        yield min(delay, remaining)
+        delay = min(delay * 2, max_delay)
+
+
+def poll_until(check: Callable[[], bool], timeout: float) -> bool:
+    """
+    Polls a check with exponential backoff until it passes or the timeout expires.
+
+    Args:
+        check (Callable[[], bool]):
+        \t\\- Returns True when the wait is complete.
+        timeout (float):
+        \t\\- The deadline in seconds.
+
+    Returns:
+        bool:
+        \t\\- True when the check passed before the deadline.
+    """
+    deadline = time.monotonic() + timeout
+    if check():
+        return True
+    for delay in backoff_delays(deadline=deadline):
+        time.sleep(delay)
+        if check():
+            return True
+    # One final check at the deadline.
+    return check()
+
+
+class InotifyWatcher(object):
+    """
+    Watches directories for delete events with the Linux inotify API.
+
+    The watcher is only a wake-up signal. Callers still check the filesystem after each wake-up.
+
+    Args:
+        directories (Iterable[str]):
+        \t\\- The directories to watch.
+
+    Raises:
+        OSError:
+        \t\\- inotify is not available on this system.
+    """
+
+    def __init__(self, directories: Iterable[str]) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError(errno.ENOSYS, "The C library was not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd: int = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            error_number = ctypes.get_errno()
+            raise OSError(error_number, os.strerror(error_number))
+
+        mask = IN_DELETE | IN_DELETE_SELF | IN_MOVED_FROM
+        for directory in set(directories):
+            # Directories that are already gone do not need a watch.
+            self._libc.inotify_add_watch(self._fd, os.fsencode(directory), mask)
+
+    def wait(self, timeout: float) -> None:
+        """
+        Waits for the next delete event or the timeout.
+
+        Args:
+            timeout (float):
+            \t\\- The longest wait in seconds.
+        """
+        readable, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if readable:
+            try:
+                # The events are drained. Only the wake-up matters.
+                while os.read(self._fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self) -> None:
+        """Closes the inotify file descriptor."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def wait_for_torrent_removal(
+    client, torrents: list[Torrent], timeout: float, by_id: bool = False
+) -> set[Union[int, str]]:
+    """
+    Waits until Transmission no longer returns the removed torrents or the deadline expires.
+
+    All pending torrents are checked together with one query per poll. transmission-remote
+    takes one call per hash for the query, or one call for all torrents when they are
+    queried by ID. Torrents are matched by hash when available because IDs change after a
+    Transmission restart.
+
+    Args:
+        client (Union[TransmissionRPC, TransmissionRemote]):
+        \t\\- The connected Transmission client.
+        torrents (list[Torrent]):
+        \t\\- The torrents that were removed.
+        timeout (float):
+        \t\\- The deadline in seconds.
+        by_id (bool, optional):
+        \t\\- Queries the torrents by the Transmission IDs of the current listing. Defaults to False.
+
+    Returns:
+        set[Union[int, str]]:
+        \t\\- The torrent hashes (or IDs) that still exist in Transmission at the deadline.
+    """
+    logger = logging.getLogger(__name__)
+
+    pending_keys: set[Union[int, str]] = {torrent.hash or torrent.id for torrent in torrents}
+    torrent_ids: dict[Union[int, str], int] = {torrent.hash or torrent.id: torrent.id for torrent in torrents}
+
+    def check() -> bool:
+        nonlocal pending_keys
+        if by_id:
+            # The returned hashes are matched below, so a reused ID does not keep another torrent pending.
+            remaining = client.get_torrents(ids=sorted(torrent_ids[key] for key in pending_keys))
+        else:
+            remaining = client.get_torrents(ids=sorted(pending_keys, key=str))
+        pending_keys = {torrent.hash or torrent.id for torrent in remaining} & pending_keys
+        return not pending_keys
+
+    start = time.monotonic()
+    poll_until(check=check, timeout=timeout)
+    logger.debug(
+        "Transmission removal verification finished in %.3f seconds with %s torrent(s) remaining",
+        time.monotonic() - start,
+        len(pending_keys),
+    )
+    return pending_keys
+
+
+def wait_for_path_removal(paths: Iterable[str], timeout: float) -> set[str]:
+    """
+    Waits until the paths no longer exist or the deadline expires.
+
+    inotify wakes the check up on delete events when available. Polling with exponential
+    backoff is used on other systems. All pending paths are checked together.
+
+    Args:
+        paths (Iterable[str]):
+        \t\\- The paths that are being removed.
+        timeout (float):
+        \t\\- The deadline in seconds.
+
+    Returns:
+        set[str]:
+        \t\\- The paths that still exist at the deadline.
+    """
+    logger = logging.getLogger(__name__)
+
+    start = time.monotonic()
+    deadline = start + timeout
+    pending_paths: set[str] = {path for path in paths if os.path.lexists(path)}
+    if not pending_paths:
+        return pending_paths
+
+    watcher: Union[InotifyWatcher, None] = None
+    try:
+        # The parent directories report the delete of each path.
+        watcher = InotifyWatcher(directories=[os.path.dirname(path) for path in pending_paths] + list(pending_paths))
+    except (OSError, AttributeError) as exc:
+        logger.debug("inotify is not available. Falling back to polling. Reason: %s", exc)
+
+    try:
+        for delay in backoff_delays(deadline=deadline):
+            if watcher:
+                # Wakes up early on a delete event. The backoff delay still bounds each wait.
+                watcher.wait(timeout=delay)
+            else:
+                time.sleep(delay)
+            pending_paths = {path for path in pending_paths if os.path.lexists(path)}
+            if not pending_paths:
+                break
+    finally:
+        if watcher:
+            watcher.close()
+
+    logger.debug(
+        "Directory removal verification finished in %.3f seconds with %s path(s) remaining",
+        time.monotonic() - start,
+        len(pending_paths),
+    )
+    return pending_paths
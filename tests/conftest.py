@@ -0,0 +1,35 @@
+"""This module is designed to share the pytest fixtures and make the src modules and the benchmark stubs importable."""
+# Built-in/Generic Imports
+import os
+import sys
+import copy
+
+# Libraries
+import yaml
+import pytest
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, conftest"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+PACKAGE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# The modules import each other from src. The stub daemon lives with the benchmarks.
+sys.path[:0] = [os.path.join(PACKAGE_PATH, "src"), os.path.join(PACKAGE_PATH, "benchmarks")]
+
+with open(os.path.join(PACKAGE_PATH, "src", "sample_settings.yaml"), "r", encoding="utf-8") as sample_file:
+    SAMPLE_CONFIG: dict = yaml.safe_load(sample_file)
+
+
+@pytest.fixture
+def sample_config(tmp_path) -> dict:
+    """The sample settings with the download root in a temp directory and no call retries."""
+    config = copy.deepcopy(SAMPLE_CONFIG)
+    config["connection"]["call_retries"] = 0
+    config["removal"]["root_download_path"] = str(tmp_path)
+    return config
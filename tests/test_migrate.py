@@ -0,0 +1,149 @@
+"""This module is designed to test the torrent data migration against the stub daemon and temp directories."""
+# Built-in/Generic Imports
+import os
+
+# Local Functions
+import launch
+import fake_daemon
+from migrate import transfer
+from migrate.migrate import start_migrate
+
+# Local Classes
+from common.notify import Notifier
+from remove.store import TorrentStore
+
+# Libraries
+import pytest
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, test_migrate"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+TARGET_LOCATION = "/downloads/archive"
+
+
+@pytest.fixture
+def stub_daemon():
+    library = fake_daemon.build_library(torrent_count=4)
+    for torrent in library.values():
+        torrent.update(percentDone=1.0, status=6)
+    stub = fake_daemon.StubTransmission(library=library)
+    stub.start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def set_location_calls(stub_daemon, monkeypatch) -> list[list]:
+    """Records the ids of each torrent-set-location call. The hashes in stub_daemon.ignored_hashes are not moved."""
+    calls: list[list] = []
+    stub_daemon.ignored_hashes = set()
+    handle = stub_daemon.handle
+
+    def recording_handle(method: str, arguments: dict) -> dict:
+        if method == "torrent-set-location":
+            calls.append(arguments["ids"])
+            arguments = dict(arguments, ids=[i for i in arguments["ids"] if i not in stub_daemon.ignored_hashes])
+        return handle(method, arguments)
+
+    monkeypatch.setattr(stub_daemon, "handle", recording_handle)
+    return calls
+
+
+@pytest.fixture
+def migrate_settings(sample_config, stub_daemon, tmp_path):
+    sample_config["connection"]["server"] = f"127.0.0.1:{stub_daemon.port}"
+    sample_config["migration"].update(
+        enabled=True,
+        target_location=TARGET_LOCATION,
+        policy={"location": fake_daemon.DOWNLOAD_DIR},
+        copy_workers=2,
+        set_location_batch=2,
+    )
+    for torrent in stub_daemon.library.values():
+        torrent_path = tmp_path / fake_daemon.DOWNLOAD_DIR.lstrip("/") / torrent["name"]
+        torrent_path.mkdir(parents=True)
+        (torrent_path / "data.bin").write_bytes(os.urandom(1024))
+    return launch.get_startup_settings(yaml_config=sample_config)
+
+
+@pytest.fixture
+def torrent_store(tmp_path):
+    store = TorrentStore()
+    store.open(str(tmp_path / "state.db"))
+    yield store
+    store.close()
+
+
+def get_paths(root, torrent: dict) -> tuple:
+    """Gets the source and target data paths of a stub torrent."""
+    return (
+        root / fake_daemon.DOWNLOAD_DIR.lstrip("/") / torrent["name"],
+        root / TARGET_LOCATION.lstrip("/") / torrent["name"],
+    )
+
+
+def test_copy_tree_resumes_partial_copy(tmp_path, monkeypatch):
+    monkeypatch.setattr(transfer, "COPY_CHUNK_SIZE", 4)
+    source = tmp_path / "source"
+    source.mkdir()
+    data = os.urandom(20)
+    (source / "data.bin").write_bytes(data)
+    target = tmp_path / "target" / "source"
+    # An earlier copy stopped after 12 bytes.
+    partial_path = tmp_path / "target" / ".source.partial"
+    partial_path.mkdir(parents=True)
+    (partial_path / "data.bin").write_bytes(data[:12])
+
+    result = transfer.copy_tree(source=str(source), target=str(target))
+
+    # The last copied chunk is written again, so the copy continues from byte 8.
+    assert result.errors == []
+    assert result.bytes_copied == 12
+    assert (target / "data.bin").read_bytes() == data
+    assert not partial_path.exists()
+
+    # A complete copy is kept and not copied again.
+    assert transfer.copy_tree(source=str(source), target=str(target)).bytes_copied == 0
+
+
+def test_batched_set_location(stub_daemon, set_location_calls, migrate_settings, torrent_store, tmp_path):
+    start_migrate(startup_settings=migrate_settings, torrent_store=torrent_store, notifier=Notifier(enabled=False))
+
+    # Four copies in batches of two.
+    assert [len(ids) for ids in set_location_calls] == [2, 2]
+    for torrent in stub_daemon.library.values():
+        source, target = get_paths(tmp_path, torrent)
+        assert torrent["downloadDir"] == TARGET_LOCATION
+        assert (target / "data.bin").exists()
+        assert not source.exists()
+    assert torrent_store.pending_migrations() == []
+
+
+def test_source_deleted_after_confirmation(stub_daemon, set_location_calls, migrate_settings, torrent_store, tmp_path):
+    unconfirmed_torrent = stub_daemon.library[1]
+    stub_daemon.ignored_hashes.add(unconfirmed_torrent["hashString"])
+
+    start_migrate(startup_settings=migrate_settings, torrent_store=torrent_store, notifier=Notifier(enabled=False))
+
+    # Transmission did not confirm the new location, so the source data stays with the copy.
+    source, target = get_paths(tmp_path, unconfirmed_torrent)
+    assert unconfirmed_torrent["downloadDir"] == fake_daemon.DOWNLOAD_DIR
+    assert source.exists() and target.exists()
+    assert [torrent.hash for torrent, _ in torrent_store.pending_migrations()] == [unconfirmed_torrent["hashString"]]
+
+    # The next check only changes the location of the complete copy and then deletes the source.
+    stub_daemon.ignored_hashes.clear()
+    set_location_calls.clear()
+    start_migrate(startup_settings=migrate_settings, torrent_store=torrent_store, notifier=Notifier(enabled=False))
+
+    assert set_location_calls == [[unconfirmed_torrent["hashString"]]]
+    assert unconfirmed_torrent["downloadDir"] == TARGET_LOCATION
+    assert not source.exists() and target.exists()
+    assert torrent_store.pending_migrations() == []
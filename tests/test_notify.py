@@ -0,0 +1,162 @@
+"""This module is designed to test the background email notifier against a local stub SMTP server."""
+# Built-in/Generic Imports
+import email
+import threading
+import socketserver
+
+# Local Functions
+from common import notify
+
+# Local Dataclasses
+from common.common import EmailSettings
+
+# Libraries
+import pytest
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, test_notify"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+class StubSMTP(object):
+    """
+    Stub SMTP server that keeps the received messages.
+
+    Set refuse to answer MAIL FROM with a 451 temporary failure.
+    """
+
+    def __init__(self) -> None:
+        self.messages: list[email.message.Message] = []
+        self.refuse: bool = False
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line: str) -> None:
+                self.wfile.write(f"{line}\r\n".encode())
+
+            def handle(self) -> None:
+                self.reply("220 stub ESMTP")
+                for line in self.rfile:
+                    command = line[:4].upper()
+                    if command in (b"EHLO", b"HELO"):
+                        self.reply("250 stub")
+                    elif command == b"MAIL" and stub.refuse:
+                        self.reply("451 Try again later")
+                    elif command == b"DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        data = b"".join(iter(self.rfile.readline, b".\r\n"))
+                        stub.messages.append(email.message_from_bytes(data))
+                        self.reply("250 Queued")
+                    elif command == b"QUIT":
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        self.reply("250 OK")
+
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.port: int = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def subjects(self) -> list[str]:
+        return [message["Subject"] for message in self.messages]
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def smtp_server():
+    server = StubSMTP()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def email_settings(smtp_server) -> EmailSettings:
+    return EmailSettings(
+        smtp=f"127.0.0.1:{smtp_server.port}",
+        authentication_required=False,
+        use_tls=False,
+        username="",
+        password="",
+        from_email="transmission@example.com",
+        to_email="admin@example.com",
+    )
+
+
+def test_sends_one_session(smtp_server, email_settings):
+    notifier = notify.Notifier(email_settings=email_settings)
+    notifier.notify(subject="First", body="One")
+    notifier.notify(subject="Second", body="Two")
+
+    assert notifier.flush(timeout=10)
+    notifier.close(timeout=10)
+    assert smtp_server.subjects == ["First", "Second"]
+
+
+def test_digest(smtp_server, email_settings):
+    notifier = notify.Notifier(email_settings=email_settings, digest=True)
+    for number in range(3):
+        notifier.notify(subject=f"Removed {number}", body=f"Torrent {number}")
+
+    assert notifier.flush(timeout=10)
+    notifier.close(timeout=10)
+    assert smtp_server.subjects == ["Transmission Remove - 3 Notifications"]
+    digest_body = smtp_server.messages[0].get_payload()
+    assert all(f"Torrent {number}" in digest_body for number in range(3))
+
+
+def test_rate_limit_per_subject(smtp_server, email_settings):
+    notifier = notify.Notifier(email_settings=email_settings, rate_limit=3600)
+    for _ in range(3):
+        notifier.notify(subject="Removed", body="Torrent")
+    notifier.notify(subject="Moved", body="Torrent")
+    assert notifier.flush(timeout=10)
+    assert smtp_server.subjects == ["Removed", "Moved"]
+
+    # The next notification after the rate limit reports the suppressed count.
+    notifier._last_sent["Removed"] -= 3600
+    notifier.notify(subject="Removed", body="Torrent")
+    assert notifier.flush(timeout=10)
+    notifier.close(timeout=10)
+    assert smtp_server.subjects == ["Removed", "Moved", "Removed"]
+    assert "2 more notification(s)" in smtp_server.messages[-1].get_payload()
+
+
+def test_held_until_the_server_is_back(smtp_server, email_settings, monkeypatch):
+    monkeypatch.setattr(notify, "SMTP_RETRIES", 0)
+    notifier = notify.Notifier(email_settings=email_settings)
+
+    smtp_server.refuse = True
+    notifier.notify(subject="Held", body="Torrent")
+    assert notifier.flush(timeout=10)
+    assert smtp_server.subjects == []
+    assert [subject for subject, _ in notifier._held] == ["Held"]
+
+    # The next successful send also sends the held notification.
+    smtp_server.refuse = False
+    notifier.notify(subject="Sent", body="Torrent")
+    assert notifier.flush(timeout=10)
+    notifier.close(timeout=10)
+    assert smtp_server.subjects == ["Sent", "Held"]
+    assert not notifier._held
+
+
+def test_worker_survives_an_unexpected_error(smtp_server, email_settings):
+    notifier = notify.Notifier(email_settings=email_settings)
+    # A line break in a header raises ValueError while the message is built.
+    notifier.notify(subject="Bad\nSubject", body="Torrent")
+    assert notifier.flush(timeout=10)
+
+    notifier.notify(subject="Good", body="Torrent")
+    assert notifier.flush(timeout=10)
+    notifier.close(timeout=10)
+    assert smtp_server.subjects == ["Good"]
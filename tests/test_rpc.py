@@ -0,0 +1,184 @@
+"""This module is designed to test the Transmission RPC client against local stub daemons."""
+# Built-in/Generic Imports
+import json
+import base64
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local Functions
+import launch
+import fake_daemon
+from remove.remove import get_torrents
+from common.parser import parse_torrent_info
+
+# Local Clients
+from common.remote import TransmissionRemote
+from common.rpc import TransmissionRPC, rpc_to_torrent
+
+# Local Exceptions
+from common.common import TransmissionExtError
+
+# Libraries
+import pytest
+
+
+__author__ = "IncognitoCoding"
+__copyright__ = "Copyright 2022, test_rpc"
+__credits__ = ["IncognitoCoding"]
+__license__ = "GPL"
+__version__ = "0.1"
+__maintainer__ = "IncognitoCoding"
+__status__ = "Development"
+
+
+class RecordingDaemon(object):
+    """
+    Stub RPC endpoint that records the request headers and the client address of each request.
+
+    Args:
+        username (str, optional):
+        \t\\- The accepted username. Every request is accepted when not set. Defaults to None.
+        password (str, optional):
+        \t\\- The accepted password. Defaults to None.
+    """
+
+    def __init__(self, username=None, password=None) -> None:
+        self.requests: list[tuple[tuple[str, int], dict]] = []
+        self.auth_header = None
+        if username is not None:
+            self.auth_header = "Basic " + base64.b64encode(f"{username}:{password}".encode()).decode()
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                daemon.requests.append((self.client_address, dict(self.headers)))
+                if daemon.auth_header and self.headers.get("Authorization") != daemon.auth_header:
+                    status, headers, body = 401, {}, b""
+                elif self.headers.get("X-Transmission-Session-Id") != fake_daemon.SESSION_ID:
+                    status, headers, body = 409, {"X-Transmission-Session-Id": fake_daemon.SESSION_ID}, b""
+                else:
+                    status, headers, body = 200, {}, json.dumps({"result": "success", "arguments": {}}).encode()
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.port: int = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub_daemon():
+    stub = fake_daemon.StubTransmission(library=fake_daemon.build_library(torrent_count=20))
+    stub.start()
+    yield stub
+    stub.stop()
+
+
+def test_session_id_handshake(stub_daemon, monkeypatch):
+    client = TransmissionRPC(host="127.0.0.1", port=stub_daemon.port)
+
+    assert len(client.get_torrents()) == 20
+    assert len(client.get_torrents(ids=[1, 2])) == 2
+    # The session ID from the first 409 is sent with the later requests.
+    assert stub_daemon.stats["handshakes"] == 1
+
+    # A restarted daemon answers the old session ID with a new 409.
+    monkeypatch.setattr(fake_daemon, "SESSION_ID", "restarted-session")
+    assert len(client.get_torrents(ids=[3])) == 1
+    assert stub_daemon.stats["handshakes"] == 2
+    client.close()
+
+
+def test_basic_auth():
+    daemon = RecordingDaemon(username="user", password="secret")
+    try:
+        client = TransmissionRPC(host="127.0.0.1", port=daemon.port, username="user", password="secret")
+        assert client.request(method="session-get") == {}
+        assert all(headers.get("Authorization") == daemon.auth_header for _, headers in daemon.requests)
+        client.close()
+
+        client = TransmissionRPC(host="127.0.0.1", port=daemon.port, username="user", password="wrong")
+        with pytest.raises(TransmissionExtError):
+            client.request(method="session-get")
+        client.close()
+    finally:
+        daemon.stop()
+
+
+def test_auth_from_server_string():
+    client = TransmissionRPC.from_server(server="192.168.1.2:9092 --auth user:pa:ss")
+
+    assert (client.host, client.port) == ("192.168.1.2", 9092)
+    assert client._auth_header == "Basic " + base64.b64encode(b"user:pa:ss").decode()
+
+
+def test_keep_alive_reuse():
+    daemon = RecordingDaemon()
+    try:
+        client = TransmissionRPC(host="127.0.0.1", port=daemon.port)
+        for _ in range(3):
+            client.request(method="session-get")
+        client.close()
+    finally:
+        daemon.stop()
+
+    # The handshake and the three requests share one connection.
+    assert len(daemon.requests) == 4
+    assert len({client_address for client_address, _ in daemon.requests}) == 1
+
+
+def test_falls_back_to_transmission_remote_on_os_error(sample_config):
+    # A port that was just released refuses the connection.
+    with socket.socket() as unused_socket:
+        unused_socket.bind(("127.0.0.1", 0))
+        port = unused_socket.getsockname()[1]
+    sample_config["connection"]["server"] = f"127.0.0.1:{port}"
+    startup_settings = launch.get_startup_settings(yaml_config=sample_config)
+
+    client, _ = get_torrents(startup_settings=startup_settings)
+
+    # The transmission-remote torrents are streamed, so no call runs until they are read.
+    assert isinstance(client, TransmissionRemote)
+
+
+@pytest.mark.parametrize(
+    "status, percent_done, cli_state, state",
+    [
+        (6, 1.0, "Idle", "Seeding"),
+        (6, 1.0, "Seeding", "Seeding"),
+        (4, 0.5, "Up & Down", "Downloading"),
+        (4, 0.5, "Idle", "Downloading"),
+        (2, 0.5, "Verifying", "Verifying"),
+        (1, 0.5, "Will Verify", "Verifying"),
+    ],
+)
+def test_states_match_transmission_remote(status, percent_done, cli_state, state):
+    entry = {"id": 1, "name": "Sample", "status": status, "percentDone": percent_done, "downloadDir": "/downloads"}
+    info = [
+        "NAME",
+        "  Id: 1",
+        "  Name: Sample",
+        f"  State: {cli_state}",
+        "  Location: /downloads",
+        f"  Percent Done: {percent_done * 100:g}%",
+        "  Ratio: 1.0",
+    ]
+
+    assert rpc_to_torrent(entry).state == state
+    assert next(parse_torrent_info(lines=info)).state == state